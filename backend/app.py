@@ -1,31 +1,321 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, current_app, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from services.git_service import GitService
-from services.ai_service import AIService
+from services.ai_service import AIService, MODEL, PROMPT_VERSION
 from services.github_service import GitHubService
+from services.webhook_service import WebhookService
+from services.pipeline_service import PipelineService
+from services.job_service import JobService
+from services.changelog_store import ChangelogStore
+from services.mirror_service import DEFAULT_ALLOWED_HOSTS, MirrorService
+from services.admission import AdmissionController, AdmissionRejected
+from services.rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from services.lazy import LazyService
+from services.log_parser import detect_format, parse_git_log
+from services.responses import (
+    FastJSONProvider, GzipRequestMiddleware, compress_response, parse_fields, select_fields
+)
+from services.metrics import REGISTRY, HTTP_IN_FLIGHT, HTTP_REQUESTS, HTTP_SECONDS, STAGE_SECONDS
+from services.config import load_config
 import os
-from dotenv import load_dotenv
+import time
+import uuid
 
 
 # Load environment variables from .env file
-load_dotenv()
+load_config()
 
-app = Flask(__name__)
+# All routes live on this blueprint; create_app() builds the Flask app
+api = Blueprint('api', __name__)
 
-# Enable CORS (Cross-Origin Resource Sharing) allows Next.js frontend (running on a different port) to call this API
-CORS(app)
+# Shared by every process of one server start (forked workers inherit it).
+# With the worker pid, the job queue uses it to tell interrupted jobs from a
+# live sibling worker's.
+BOOT_ID = os.environ.setdefault("SHIPNOTE_BOOT_ID", uuid.uuid4().hex)
 
-# Initialize services
+
+def _create_job_service():
+    service = JobService(
+        db_path=os.getenv("JOB_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.db")),
+        max_workers=int(os.getenv("JOB_WORKERS", "4")),
+        boot_id=BOOT_ID,
+        ttl=float(os.getenv("JOB_TTL_HOURS", "168")) * 3600
+    )
+    service.register('generate-from-repo', pipeline_service.generate_from_repo)
+    service.register('generate-from-url', pipeline_service.generate_from_github_url)
+    service.resume()
+    return service
+
+
+def _create_changelog_store():
+    return ChangelogStore(
+        db_path=os.getenv("CHANGELOG_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "changelogs.db")),
+        model=MODEL,
+        prompt_version=PROMPT_VERSION
+    )
+
+
+def _create_mirror_service():
+    # Only https:// URLs on these hosts are mirrored (there is no "allow any")
+    allowed_hosts = os.getenv("MIRROR_ALLOWED_HOSTS", ",".join(DEFAULT_ALLOWED_HOSTS))
+    return MirrorService(
+        root_dir=os.getenv("MIRROR_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "mirrors")),
+        max_bytes=int(os.getenv("MIRROR_MAX_MB", "2048")) * 1024 * 1024,
+        fetch_ttl=float(os.getenv("MIRROR_FETCH_TTL", "30")),
+        maintenance_interval=float(os.getenv("MIRROR_MAINTENANCE_HOURS", "24")) * 3600,
+        timeout=float(os.getenv("MIRROR_TIMEOUT", "300")),
+        allowed_hosts=[host.strip() for host in allowed_hosts.split(",") if host.strip()]
+    )
+
+
+def _create_admission_controller():
+    # ADMISSION_ENDPOINT_LIMITS="/api/generate-bulk=1,/api/generate-notes=3"
+    endpoint_limits = {"/api/generate-bulk": 1}
+    for item in os.getenv("ADMISSION_ENDPOINT_LIMITS", "").split(","):
+        if "=" in item:
+            endpoint, limit = item.rsplit("=", 1)
+            endpoint_limits[endpoint.strip()] = int(limit)
+    
+    return AdmissionController(
+        max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "4")),
+        queue_size=int(os.getenv("ADMISSION_QUEUE_SIZE", "2")),
+        max_wait=float(os.getenv("ADMISSION_MAX_WAIT", "15")),
+        endpoint_limits=endpoint_limits
+    )
+
+
+# Endpoints that hold a request open while Claude generates notes, and the
+# priority their requests wait with when the server is at its limits
+ADMITTED_ENDPOINTS = {
+    '/api/generate-notes': PRIORITY_INTERACTIVE,
+    '/api/generate-from-repo': PRIORITY_INTERACTIVE,
+    '/api/generate-from-text': PRIORITY_INTERACTIVE,
+    '/api/github/generate-from-url': PRIORITY_INTERACTIVE,
+    '/api/generate-bulk': PRIORITY_BACKGROUND
+}
+
+
+# Initialize services (each one is built on first use, see create_app)
 # GitService: Handles reading git repositories
 # AIService: Handles AI generation with Claude
 # GitHubService: Handles GitHub OAuth and API interactions
-git_service = GitService()
-ai_service = AIService()
-github_service = GitHubService()
+# ChangelogStore: Generated notes by repository and resolved commit range
+# MirrorService: Bare mirror clones of repositories given by clone URL
+# WebhookService: Ingests push webhooks and precomputes notes
+# PipelineService: The fetch + generate workflows of the generation endpoints
+# JobService: Runs those workflows in the background for async requests
+# AdmissionController: Limits how many generation requests run at once
+git_service = LazyService(GitService, "git")
+ai_service = LazyService(AIService, "ai")
+github_service = LazyService(GitHubService, "github")
+changelog_store = LazyService(_create_changelog_store, "changelogs")
+mirror_service = LazyService(_create_mirror_service, "mirrors")
+webhook_service = LazyService(
+    lambda: WebhookService(
+        pipeline_service, github_service, changelog_store=changelog_store,
+        db_path=os.getenv("WEBHOOK_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "webhooks.db"))
+    ),
+    "webhook"
+)
+pipeline_service = LazyService(
+    lambda: PipelineService(git_service, ai_service, github_service, changelog_store, mirror_service),
+    "pipeline"
+)
+job_service = LazyService(_create_job_service, "jobs")
+admission = LazyService(_create_admission_controller, "admission")
+
+# Services that are safe to build before a server forks its workers.
+# The job service is left out: it starts worker threads when it resumes jobs.
+PRELOAD_SERVICES = [git_service, ai_service, github_service, changelog_store, mirror_service,
+                    webhook_service, pipeline_service, admission]
+
+
+def create_app(preload: bool = False) -> Flask:
+    """
+    Build the ShipNote Flask application.
+    
+    Services are created lazily on first use. With preload=True they are
+    built right away instead, e.g. in a production server's master process
+    before it forks, so workers share the loaded code and clients
+    copy-on-write and the first request does not pay for startup.
+    """
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    
+    # Enable CORS (Cross-Origin Resource Sharing) allows Next.js frontend (running on a different port) to call this API
+    CORS(app)
+    
+    app.register_blueprint(api)
+    
+    # Request counts, latency and in-flight gauges per endpoint (see /metrics)
+    app.before_request(start_request_metrics)
+    app.after_request(finish_request_metrics)
+    
+    # Concurrency limits and a bounded wait queue for generation endpoints
+    app.before_request(admit_request)
+    app.after_request(release_admission_on_close)
+    app.teardown_request(release_admission)
+    
+    # gzip request bodies (e.g. the CLI's commit payloads) are inflated before
+    # Flask reads them
+    app.wsgi_app = GzipRequestMiddleware(
+        app.wsgi_app, max_bytes=int(float(os.getenv("REQUEST_MAX_INFLATED_MB", "32")) * 1024 * 1024)
+    )
+    
+    # gzip / brotli for JSON responses, following the client's Accept-Encoding
+    @app.after_request
+    def compress(response):
+        with STAGE_SECONDS.time(stage="compress"):
+            return compress_response(response, request.accept_encodings)
+    
+    if preload:
+        preload_services()
+    
+    return app
+
+
+def preload_services():
+    """
+    Build the fork-safe services now and report how long each one took.
+    """
+    start = time.perf_counter()
+    for service in PRELOAD_SERVICES:
+        service.load()
+    
+    timings = ", ".join(f"{s.name} {s.load_seconds:.2f}s" for s in PRELOAD_SERVICES)
+    print(f"Services ready in {time.perf_counter() - start:.2f}s ({timings})")
+
+
+def requested_fields():
+    """
+    The field selection of the current request ("fields" query parameter or
+    JSON body key), or None to return every field.
+    """
+    fields = request.args.get('fields')
+    if fields is None:
+        fields = (request.get_json(silent=True) or {}).get('fields')
+    return parse_fields(fields)
+
+
+def json_response(result, status=200):
+    """
+    jsonify() a result, keeping only the fields the client selected.
+    
+    Example: ?fields=notes,commit_count,commits.hash
+    """
+    with STAGE_SECONDS.time(stage="render"):
+        return jsonify(select_fields(result, requested_fields())), status
+
+
+def stream_notes_response(commits, from_ref, to_ref, **fields):
+    """
+    Generate release notes as Server-Sent Events, for clients that render
+    the notes while Claude writes them ("stream": true).
+    
+    Sends a "start" event with commit_count and the extra fields, "notes"
+    events with text deltas, then a "done" event with the same body the
+    endpoint returns without streaming, or an "error" event.
+    """
+    def sse(event, payload):
+        return f"event: {event}\ndata: {current_app.json.dumps(payload)}\n\n"
+    
+    def events():
+        yield sse("start", {"commit_count": len(commits), **fields})
+        chunks = []
+        try:
+            for text in ai_service.stream_release_notes(commits, from_ref, to_ref):
+                chunks.append(text)
+                yield sse("notes", {"text": text})
+        except Exception as e:
+            print(f"Error streaming notes: {str(e)}")
+            yield sse("error", {"success": False, "error": str(e)})
+            return
+        yield sse("done", {
+            "success": True,
+            "notes": "".join(chunks),
+            "commit_count": len(commits),
+            **fields
+        })
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def start_request_metrics():
+    # Route pattern (e.g. /api/jobs/<job_id>) keeps the label set small
+    g.metrics_endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    g.metrics_start = time.perf_counter()
+    HTTP_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+
+def finish_request_metrics(response):
+    if "metrics_start" not in g:
+        return response
+    endpoint, start = g.metrics_endpoint, g.metrics_start
+    method, status = request.method, str(response.status_code)
+    
+    # Recorded when the response is closed, i.e. after a streamed body has been sent
+    def record():
+        HTTP_IN_FLIGHT.dec(endpoint=endpoint)
+        HTTP_REQUESTS.inc(endpoint=endpoint, method=method, status=status)
+        HTTP_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+    
+    response.call_on_close(record)
+    return response
+
+
+def admit_request():
+    """
+    Wait for an admission slot, or answer 429 / 503 with Retry-After.
+    """
+    rule = request.url_rule.rule if request.url_rule else None
+    if rule not in ADMITTED_ENDPOINTS:
+        return None
+    
+    # Async requests only queue a job, which the job workers limit anyway
+    if (request.get_json(silent=True) or {}).get('async'):
+        return None
+    
+    try:
+        g.admission_ticket = admission.acquire(rule, ADMITTED_ENDPOINTS[rule])
+    except AdmissionRejected as e:
+        response = jsonify({"success": False, "error": str(e)})
+        response.status_code = e.status_code
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
+    return None
+
+
+def release_admission_on_close(response):
+    # Keep the slot until the body (possibly streamed) has been sent
+    ticket = g.pop("admission_ticket", None)
+    if ticket is not None:
+        response.call_on_close(lambda: admission.release(ticket))
+    return response
+
+
+def release_admission(exc):
+    # Fallback for requests that never reached release_admission_on_close
+    ticket = g.pop("admission_ticket", None)
+    if ticket is not None:
+        admission.release(ticket)
+
+
+def shutdown_services():
+    """
+    Stop the background workers of the services that were started.
+    """
+    for service in (job_service, webhook_service):
+        instance = service.instance()
+        if instance is not None:
+            instance.shutdown()
 
 
 # Server Running Endpoint
-@app.route('/health', methods=['GET'])
+@api.route('/health', methods=['GET'])
 def health_check():
     """
     The CORE endpoint of ShipNote!
@@ -53,11 +343,31 @@ def health_check():
         "notes": "# Release Notes\n\n## ✨ New Features\n- Added dark mode..."
     }
     """
-    return jsonify({"status": "healthy"}), 200
+    # model / prompt_version let clients tell whether notes they cached are
+    # still what this server would generate; request_encodings lists the
+    # Content-Encodings request bodies may use (see GzipRequestMiddleware)
+    return jsonify({
+        "status": "healthy",
+        "model": MODEL,
+        "prompt_version": PROMPT_VERSION,
+        "request_encodings": ["gzip"]
+    }), 200
+
+
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus metrics of this process (text exposition format).
+    
+    Includes request counts, latency histograms and in-flight gauges per
+    endpoint, per-stage timings (git_read, github_fetch, llm_call, render,
+    compress), Claude token counters and cache hit ratios.
+    """
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 # Main CHANGELOG Generation Endpoint
-@app.route('/api/generate-notes', methods=['POST']) 
+@api.route('/api/generate-notes', methods=['POST']) 
 def generate_notes():
     try:
         # Extract data from the incoming request
@@ -73,6 +383,9 @@ def generate_notes():
                 "error": "No commits provided"
             }), 400
         
+        if data.get('stream'):
+            return stream_notes_response(commits, from_ref, to_ref)
+        
         # Call our AI service to generate the release notes
         # This is where the magic happens - Claude reads the commits
         # and turns them into human-readable notes
@@ -94,7 +407,7 @@ def generate_notes():
         }), 500
     
 
-@app.route('/api/fetch-commits', methods=['POST'])
+@api.route('/api/fetch-commits', methods=['POST'])
 def fetch_commits():
     """
     This endpoint reads commits directly from a local git repository.
@@ -104,7 +417,8 @@ def fetch_commits():
     {
         "repo_path": "/path/to/repo",
         "from": "v1.0.0",  # Optional: starting commit/tag
-        "to": "HEAD"       # Optional: ending commit/tag
+        "to": "HEAD",      # Optional: ending commit/tag
+        "fields": "count,commits.hash"  # Optional: only return these fields
     }
     
     Returns JSON:
@@ -141,11 +455,11 @@ def fetch_commits():
         commits = git_service.get_commits(repo_path, from_ref, to_ref)
         
         # Return the commits
-        return jsonify({
+        return json_response({
             "success": True,
             "commits": commits,
             "count": len(commits)
-        }), 200
+        }, 200)
         
     except Exception as e:
         # Handle errors (e.g., invalid repo path, git errors)
@@ -157,32 +471,32 @@ def fetch_commits():
     
 
 # Combined Endpoint: FETCH + GENERATE
-@app.route('/api/generate-from-repo', methods=['POST'])
+@api.route('/api/generate-from-repo', methods=['POST'])
 def generate_from_repo():
+    """
+    Read commits from a local repository and generate release notes.
+    
+    With "repo_url" instead of "repo_path", the repository is read from a
+    server-side mirror that is cloned once and then only fetched.
+    
+    Expected JSON input:
+    {
+        "repo_path": "/path/to/repo",  # or "repo_url": "https://github.com/owner/repo"
+        "from": "v1.0.0",  # Optional
+        "to": "HEAD",      # Optional
+        "limit": 50,       # Optional, default 50
+        "async": false,    # Optional: return a job id right away (see /api/jobs)
+        "fields": "notes,commit_count"  # Optional: only return these fields
+    }
+    """
     try:
         data = request.json
-        repo_path = data.get('repo_path')
-        from_ref = data.get('from', None)
-        to_ref = data.get('to', 'HEAD')
-        limit = data.get('limit', 50)  # NEW: Accept limit parameter (default 50)
-        
-        if not repo_path:
-            return jsonify({"success": False, "error": "Repository path is required"}), 400
-        
-        # Pass limit to git_service
-        commits = git_service.get_commits(repo_path, from_ref, to_ref, limit=limit)
-        
-        if not commits:
-            return jsonify({"success": False, "error": "No commits found in the specified range"}), 400
         
-        release_notes = ai_service.generate_release_notes(commits, from_ref, to_ref)
+        if data.get('async'):
+            return submit_job('generate-from-repo', data)
         
-        return jsonify({
-            "success": True,
-            "commits": commits,
-            "notes": release_notes,
-            "commit_count": len(commits)
-        }), 200
+        result, status = pipeline_service.generate_from_repo(data)
+        return json_response(result, status)
         
     except Exception as e:
         print(f"Error in generate_from_repo: {str(e)}")
@@ -190,11 +504,15 @@ def generate_from_repo():
     
 
 # Quick PASTE ENDPOINT (For Website)
-@app.route('/api/generate-from-text', methods=['POST'])
+@api.route('/api/generate-from-text', methods=['POST'])
 def generate_from_text():
     """
     Simplified endpoint for the website where users paste raw git log text.
     
+    Accepts `git log` output in the oneline, medium/full/fuller or the CLI's
+    "%h|%cd|%an|%s" format, with or without --name-status / --numstat /
+    --stat file lists (see services/log_parser.py).
+    
     Expected JSON input:
     {
         "git_log_text": "a83b1c9 fix(auth): resolve password reset token bug\nb1d4e2a feat(ui): add new dark mode toggle\n..."
@@ -203,8 +521,13 @@ def generate_from_text():
     Returns JSON:
     {
         "success": true,
-        "notes": "# Release Notes\n\n..."
+        "notes": "# Release Notes\n\n...",
+        "commit_count": 2,
+        "format": "oneline"
     }
+    
+    With "stream": true the notes are sent as Server-Sent Events while
+    they are generated (see stream_notes_response).
     """
     try:
         data = request.json
@@ -216,30 +539,9 @@ def generate_from_text():
                 "error": "No git log text provided"
             }), 400
         
-        # Parse the raw text into commit objects
-        # Each line is assumed to be: <hash> <message>
-        commits = []
-        for idx, line in enumerate(git_log_text.strip().split('\n')):
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Try to extract hash and message
-            parts = line.split(' ', 1)
-            if len(parts) >= 2:
-                hash_val = parts[0]
-                message = parts[1]
-            else:
-                # If no hash detected, treat entire line as message
-                hash_val = f"commit-{idx}"
-                message = line
-            
-            commits.append({
-                "hash": hash_val,
-                "message": message,
-                "author": "Unknown",
-                "date": ""
-            })
+        # Parse the raw text into commit objects (one record per commit,
+        # including multi-line messages and changed files)
+        commits = list(parse_git_log(git_log_text))
         
         if not commits:
             return jsonify({
@@ -247,13 +549,17 @@ def generate_from_text():
                 "error": "Could not parse any commits from the provided text"
             }), 400
         
+        if data.get('stream'):
+            return stream_notes_response(commits, None, 'HEAD', format=detect_format(git_log_text))
+        
         # Generate release notes
         release_notes = ai_service.generate_release_notes(commits, None, 'HEAD')
         
         return jsonify({
             "success": True,
             "notes": release_notes,
-            "commit_count": len(commits)
+            "commit_count": len(commits),
+            "format": detect_format(git_log_text)
         }), 200
         
     except Exception as e:
@@ -268,7 +574,7 @@ def generate_from_text():
 # GITHUB OAUTH ENDPOINTS
 # ===========================
 
-@app.route('/api/github/auth', methods=['POST'])
+@api.route('/api/github/auth', methods=['POST'])
 def github_auth():
     """
     Exchange GitHub OAuth code for access token.
@@ -336,14 +642,18 @@ def github_auth():
         }), 500
 
 
-@app.route('/api/github/repositories', methods=['POST'])
+@api.route('/api/github/repositories', methods=['POST'])
 def get_github_repositories():
     """
-    Get user's GitHub repositories.
+    Get all of the user's GitHub repositories.
+    
+    The list is served from a per-user cache and refreshed in the background
+    when it gets stale.
     
     Expected JSON input:
     {
-        "access_token": "gho_..."
+        "access_token": "gho_...",
+        "refresh": false  # Optional: bypass the cache
     }
     
     Returns JSON:
@@ -361,7 +671,8 @@ def get_github_repositories():
                 "updated_at": "2024-01-15T10:30:00Z"
             },
             ...
-        ]
+        ],
+        "cached": true
     }
     """
     try:
@@ -374,7 +685,9 @@ def get_github_repositories():
                 "error": "Access token is required"
             }), 400
         
-        result = github_service.get_user_repositories(access_token)
+        result = github_service.get_user_repositories(
+            access_token, refresh=bool(data.get('refresh', False))
+        )
         return jsonify(result), 200 if result.get('success') else 400
         
     except Exception as e:
@@ -385,7 +698,7 @@ def get_github_repositories():
         }), 500
 
 
-@app.route('/api/github/commits', methods=['POST'])
+@api.route('/api/github/commits', methods=['POST'])
 def fetch_github_commits():
     """
     Fetch commits from a GitHub repository using OAuth token.
@@ -397,7 +710,11 @@ def fetch_github_commits():
         "repo": "repository-name",
         "since": "2024-01-01T00:00:00Z",  # Optional
         "until": "2024-12-31T23:59:59Z",  # Optional
-        "limit": 100  # Optional, default 100
+        "base": "v2.0",  # Optional: fetch exactly the commits in base...head
+        "head": "v2.1",  # Optional, default HEAD (only used with base)
+        "limit": 100,  # Optional, default 100
+        "include_files": false,  # Optional: add stats and file names (GraphQL)
+        "fields": "commits.hash,commits.message"  # Optional: only return these fields
     }
     
     Returns JSON:
@@ -423,7 +740,10 @@ def fetch_github_commits():
         repo = data.get('repo')
         since = data.get('since')
         until = data.get('until')
+        base = data.get('base')
+        head = data.get('head') or 'HEAD'
         limit = data.get('limit', 100)
+        include_files = data.get('include_files', False)
         
         if not access_token:
             return jsonify({
@@ -437,11 +757,20 @@ def fetch_github_commits():
                 "error": "Owner and repository name are required"
             }), 400
         
-        result = github_service.fetch_repo_commits(
-            access_token, owner, repo, since, until, limit
-        )
+        if base:
+            result = github_service.fetch_compare_commits(
+                access_token, owner, repo, base, head, limit, include_files=include_files
+            )
+        elif include_files:
+            result = github_service.fetch_repo_commits_graphql(
+                access_token, owner, repo, since, until, limit, include_files=True
+            )
+        else:
+            result = github_service.fetch_repo_commits(
+                access_token, owner, repo, since, until, limit
+            )
         
-        return jsonify(result), 200 if result.get('success') else 400
+        return json_response(result, 200 if result.get('success') else 400)
         
     except Exception as e:
         print(f"Error in fetch_github_commits: {str(e)}")
@@ -451,7 +780,31 @@ def fetch_github_commits():
         }), 500
 
 
-@app.route('/api/github/parse-url', methods=['POST'])
+@api.route('/api/github/cache-stats', methods=['GET'])
+def get_github_cache_stats():
+    """
+    Get statistics of the GitHub conditional-request cache.
+    
+    Returns JSON:
+    {
+        "success": true,
+        "cache": {
+            "hits": 120,
+            "misses": 14,
+            "not_modified": 118,
+            "entries": 14,
+            "bytes": 482133,
+            "disk": false
+        }
+    }
+    """
+    return jsonify({
+        "success": True,
+        "cache": github_service.get_cache_stats()
+    }), 200
+
+
+@api.route('/api/github/parse-url', methods=['POST'])
 def parse_github_url():
     """
     Parse a GitHub repository URL to extract owner and repo name.
@@ -500,7 +853,7 @@ def parse_github_url():
         }), 500
 
 
-@app.route('/api/github/generate-from-url', methods=['POST'])
+@api.route('/api/github/generate-from-url', methods=['POST'])
 def generate_from_github_url():
     """
     Complete workflow: Parse GitHub URL → Fetch commits → Generate changelog.
@@ -511,7 +864,12 @@ def generate_from_github_url():
         "repo_url": "https://github.com/owner/repo",
         "since": "2024-01-01T00:00:00Z",  # Optional
         "until": "2024-12-31T23:59:59Z",  # Optional
-        "limit": 100  # Optional
+        "base": "v2.0",  # Optional: generate for exactly base...head
+        "head": "v2.1",  # Optional, default HEAD (only used with base)
+        "limit": 100,  # Optional
+        "include_files": false,  # Optional: mention changed files in the notes
+        "async": false,  # Optional: return a job id right away (see /api/jobs)
+        "fields": "notes,commit_count"  # Optional: only return these fields
     }
     
     Returns JSON:
@@ -524,69 +882,298 @@ def generate_from_github_url():
     """
     try:
         data = request.json
-        access_token = data.get('access_token')
-        repo_url = data.get('repo_url')
-        since = data.get('since')
-        until = data.get('until')
-        limit = data.get('limit', 100)
         
-        if not access_token:
+        if data.get('async'):
+            return submit_job('generate-from-url', data)
+        
+        result, status = pipeline_service.generate_from_github_url(data)
+        return json_response(result, status)
+        
+    except Exception as e:
+        print(f"Error in generate_from_github_url: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+    
+
+@api.route('/api/changelogs/lookup', methods=['POST'])
+def lookup_changelog():
+    """
+    Get previously generated notes for a ref range (e.g. two tags) without generating.
+    
+    Expected JSON input:
+    {
+        "repo_url": "https://github.com/owner/repo",  # or "repo_path": "/path/to/repo"
+        "access_token": "gho_...",  # Required with repo_url
+        "from": "v2.0",
+        "to": "v2.1",
+        "fields": "notes"  # Optional: only return these fields
+    }
+    
+    Returns JSON (404 if nothing is stored for the range as it resolves now):
+    {
+        "success": true,
+        "notes": "# Release Notes\n\n...",
+        "commits": [...],
+        "commit_count": 42,
+        "base_sha": "...",
+        "head_sha": "...",
+        "generated_at": 1731080000.0
+    }
+    """
+    try:
+        result, status = pipeline_service.lookup_release(request.json)
+        return json_response(result, status)
+        
+    except Exception as e:
+        print(f"Error in lookup_changelog: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+    
+
+@api.route('/api/github/webhook', methods=['POST'])
+def github_webhook():
+    """
+    Receive GitHub push webhooks (branch and tag pushes).
+    
+    The delivery must be signed with GITHUB_WEBHOOK_SECRET
+    (X-Hub-Signature-256). New commits on the default branch are stored and
+    the "unreleased" and "latest release" notes are generated in the
+    background (with GITHUB_WEBHOOK_TOKEN), the same way
+    /api/github/generate-from-url would, so requesting them later is free.
+    
+    Returns JSON:
+    {
+        "success": true,
+        "event": "push",
+        "ingested": 3,
+        "queued": ["unreleased"]
+    }
+    """
+    try:
+        body = request.get_data()
+        if not webhook_service.verify_signature(body, request.headers.get('X-Hub-Signature-256')):
             return jsonify({
                 "success": False,
-                "error": "Access token is required"
+                "error": "Invalid webhook signature"
+            }), 401
+        
+        event = request.headers.get('X-GitHub-Event', '')
+        payload = request.get_json(force=True, silent=True)
+        if payload is None:
+            return jsonify({
+                "success": False,
+                "error": "Invalid JSON payload"
             }), 400
         
-        if not repo_url:
+        result = webhook_service.handle_event(event, payload)
+        return jsonify(result), 202 if result.get('success') else 400
+        
+    except Exception as e:
+        print(f"Error in github_webhook: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+# ===========================
+# BULK GENERATION ENDPOINT
+# ===========================
+
+@api.route('/api/generate-bulk', methods=['POST'])
+def generate_bulk():
+    """
+    Generate release notes for many repo/range targets in one request.
+    
+    Commits of all targets are fetched in parallel and the AI calls run
+    under a global concurrency limit (BULK_AI_CONCURRENCY). Results are
+    streamed as newline-delimited JSON, one line per target as soon as it
+    completes (so not in request order), followed by a summary line.
+    
+    Expected JSON input:
+    {
+        "access_token": "gho_...",  # Optional: used by repo_url targets without one
+        "targets": [
+            {"repo_path": "/path/to/repo", "from": "v1.0.0", "to": "v1.1.0"},
+            {"repo_url": "https://github.com/owner/repo", "base": "v2.0", "head": "v2.1"},
+            ...
+        ]
+    }
+    
+    Each target takes the same fields as /api/generate-from-repo
+    (repo_path) or /api/github/generate-from-url (repo_url). An optional
+    "fields" selection applies to each target's result.
+    
+    Streams (application/x-ndjson):
+    {"index": 1, "status": 200, "success": true, "notes": "...", "commits": [...], "commit_count": 12}
+    {"index": 0, "status": 400, "success": false, "error": "No commits found in the specified range"}
+    {"done": true, "total": 2, "succeeded": 1, "failed": 1, "seconds": 8.4}
+    """
+    try:
+        data = request.json
+        targets = data.get('targets')
+        
+        if not isinstance(targets, list) or not targets:
             return jsonify({
                 "success": False,
-                "error": "Repository URL is required"
+                "error": "A non-empty list of targets is required"
             }), 400
         
-        # Step 1: Parse the GitHub URL
-        parsed = github_service.parse_github_url(repo_url)
-        if not parsed:
+        if len(targets) > pipeline_service.bulk_max_targets:
             return jsonify({
                 "success": False,
-                "error": "Invalid GitHub URL format"
+                "error": f"At most {pipeline_service.bulk_max_targets} targets are allowed per request"
             }), 400
         
-        owner = parsed['owner']
-        repo = parsed['repo']
+        fields = requested_fields()
         
-        # Step 2: Fetch commits from GitHub
-        commits_result = github_service.fetch_repo_commits(
-            access_token, owner, repo, since, until, limit
-        )
+        def lines():
+            for result in pipeline_service.generate_bulk(targets, data.get('access_token')):
+                if not result.get('done'):
+                    # "fields" applies to each target's result
+                    result = select_fields(result, fields, always=("index", "status", "success", "error"))
+                yield current_app.json.dumps(result) + "\n"
         
-        if not commits_result.get('success'):
-            return jsonify(commits_result), 400
+        return Response(
+            stream_with_context(lines()),
+            mimetype='application/x-ndjson',
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
         
-        commits = commits_result.get('commits', [])
+    except Exception as e:
+        print(f"Error in generate_bulk: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+# ===========================
+# BACKGROUND JOB ENDPOINTS
+# ===========================
+
+def submit_job(job_type, payload):
+    """
+    Queue a generation pipeline and answer with 202 and the job id.
+    """
+    job = job_service.submit(job_type, {k: v for k, v in payload.items() if k != 'async'})
+    return jsonify({
+        "success": True,
+        "job_id": job['id'],
+        "status": job['status'],
+        "status_url": f"/api/jobs/{job['id']}",
+        "events_url": f"/api/jobs/{job['id']}/events"
+    }), 202
+
+
+@api.route('/api/jobs', methods=['POST'])
+def create_job():
+    """
+    Run a generation pipeline in the background.
+    
+    Expected JSON input:
+    {
+        "type": "generate-from-repo" | "generate-from-url",
+        "payload": { ... same input as the matching endpoint ... }
+    }
+    
+    Returns JSON (202):
+    {
+        "success": true,
+        "job_id": "3f2a...",
+        "status": "queued",
+        "status_url": "/api/jobs/3f2a...",
+        "events_url": "/api/jobs/3f2a.../events"
+    }
+    """
+    try:
+        data = request.json
+        job_type = data.get('type')
+        payload = data.get('payload') or {}
         
-        if not commits:
+        if job_type not in ('generate-from-repo', 'generate-from-url'):
             return jsonify({
                 "success": False,
-                "error": "No commits found in the specified range"
+                "error": "Job type must be 'generate-from-repo' or 'generate-from-url'"
             }), 400
         
-        # Step 3: Generate release notes from commits
-        release_notes = ai_service.generate_release_notes(commits, since, until or 'HEAD')
-        
-        # Step 4: Return everything
-        return jsonify({
-            "success": True,
-            "commits": commits,
-            "notes": release_notes,
-            "commit_count": len(commits)
-        }), 200
+        return submit_job(job_type, payload)
         
     except Exception as e:
-        print(f"Error in generate_from_github_url: {str(e)}")
+        print(f"Error in create_job: {str(e)}")
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
+
+
+@api.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Poll a background job.
+    
+    Returns JSON:
+    {
+        "success": true,
+        "job": {
+            "id": "3f2a...",
+            "type": "generate-from-url",
+            "status": "queued" | "running" | "completed" | "failed",
+            "stage": "fetching_commits" | "generating_notes" | null,
+            "result": { ... endpoint response once finished ... }
+        }
+    }
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": "Job not found"
+        }), 404
     
+    return jsonify({
+        "success": True,
+        "job": job
+    }), 200
+
+
+@api.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """
+    Follow a background job as Server-Sent Events.
+    
+    Sends "progress" events on every status or stage change and a final
+    "done" event carrying the job (including its result).
+    """
+    if job_service.get(job_id) is None:
+        return jsonify({
+            "success": False,
+            "error": "Job not found"
+        }), 404
+    
+    return Response(
+        stream_with_context(job_service.events(job_id)),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def __getattr__(name):
+    """
+    Build the module-level `app` (used by `flask run`) on first access.
+    
+    Importing this module builds no app, so wsgi.py's create_app(preload=True)
+    is the only one in production servers (see gunicorn.conf.py).
+    """
+    if name == "app":
+        application = globals()["app"] = create_app()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Run The Server
 if __name__ == '__main__':
@@ -608,4 +1195,10 @@ if __name__ == '__main__':
     print("API available at: http://localhost:5000")
     print("Health check: http://localhost:5000/health")
     print("\n")
+    
+    # With the reloader on, only the child process serves requests
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        job_service.load()
+    
+    app = create_app()
     app.run(debug=True, port=5000)
@@ -0,0 +1,99 @@
+"""
+Import-time benchmark for the ShipNote backend
+
+Measures how long "import app" takes in a fresh interpreter (the cost every
+process start, reload and worker boot pays) and checks that the heavy
+libraries are still deferred until first use.
+
+Usage:
+    python benchmarks/import_time.py [--runs 5] [--budget-ms 400]
+
+Exits with status 1 if the import is slower than the budget or a deferred
+library is imported eagerly again, so it can run as a regression check.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Measured at roughly 190ms on a developer laptop; leaves room for slower machines
+DEFAULT_BUDGET_MS = 400
+
+# Libraries that must only be imported when a service first needs them
+DEFERRED_MODULES = ("anthropic", "git", "requests", "httpx")
+
+
+def measure_import_ms() -> float:
+    """
+    Import the app once in a fresh interpreter
+
+    Returns:
+        Cumulative import time of the app module in milliseconds
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing the app failed:\n{result.stderr}")
+
+    # Lines look like "import time:  self [us] | cumulative | module"
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| app$", line)
+        if match:
+            return int(match.group(1)) / 1000.0
+    raise RuntimeError("No import time reported for the app module")
+
+
+def eager_imports() -> list:
+    """
+    Find deferred libraries that importing the app loads anyway
+
+    Returns:
+        Names of the deferred modules found in sys.modules
+    """
+    check = (
+        "import sys, app; "
+        f"print(' '.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", check],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure the backend's import time")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh imports to time")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Fail if the fastest import is slower than this")
+    args = parser.parse_args()
+
+    timings = [measure_import_ms() for _ in range(max(args.runs, 1))]
+    best = min(timings)
+    print(f"import app: best {best:.1f}ms, median {sorted(timings)[len(timings) // 2]:.1f}ms "
+          f"over {len(timings)} runs (budget {args.budget_ms:.0f}ms)")
+
+    failed = False
+    if best > args.budget_ms:
+        print(f"FAIL: import time is over budget by {best - args.budget_ms:.1f}ms")
+        failed = True
+
+    eager = eager_imports()
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
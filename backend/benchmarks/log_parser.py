@@ -0,0 +1,109 @@
+"""
+Benchmark for the git log parser behind /api/generate-from-text
+
+Builds synthetic multi-megabyte pastes in each supported format, parses
+them with services/log_parser.py and compares against the old
+one-commit-per-line split, which is what the prompt size used to follow.
+
+Usage:
+    python benchmarks/log_parser.py [--commits 20000] [--runs 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.log_parser import parse_git_log  # noqa: E402
+
+
+WORDS = ("fix", "add", "update", "remove", "auth", "token", "cache", "parser", "docs",
+         "login", "page", "worker", "queue", "retry", "config", "build", "test", "api")
+STATUSES = ("A", "M", "M", "M", "D", "R100")
+
+
+def make_commit(rng: random.Random, i: int) -> dict:
+    sha = f"{rng.getrandbits(160):040x}"
+    subject = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8)))
+    body = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 12)))
+            for _ in range(rng.randint(0, 4))]
+    files = [(rng.choice(STATUSES), f"src/{rng.choice(WORDS)}/{rng.choice(WORDS)}_{i}.py",
+              rng.randint(0, 200), rng.randint(0, 50))
+             for _ in range(rng.randint(1, 6))]
+    return {"sha": sha, "subject": subject, "body": body, "files": files,
+            "author": f"Dev {rng.randint(1, 40)}"}
+
+
+def render(commits: list, fmt: str) -> str:
+    out = []
+    for c in commits:
+        if fmt == "oneline":
+            out.append(f"{c['sha'][:7]} {c['subject']}")
+        elif fmt == "pipe":
+            out.append(f"{c['sha'][:7]}|Nov 08, 03:24 PM|{c['author']}|{c['subject']}")
+            out.extend(f"{s}\t{path}" for s, path, _, _ in c["files"])
+            out.append("")
+        else:
+            out.append(f"commit {c['sha']}")
+            out.append(f"Author: {c['author']} <dev@example.com>")
+            out.append("Date:   Sat Nov 8 15:24:30 2025 -0700")
+            out.append("")
+            out.append(f"    {c['subject']}")
+            if c["body"]:
+                out.append("    ")
+                out.extend(f"    {line}" for line in c["body"])
+            out.append("")
+            if fmt == "medium --name-status":
+                out.extend(f"{s}\t{path}" for s, path, _, _ in c["files"])
+            elif fmt == "medium --numstat":
+                out.extend(f"{a}\t{d}\t{path}" for _, path, a, d in c["files"])
+            out.append("")
+    return "\n".join(out)
+
+
+def old_split(text: str) -> int:
+    # The previous parser: every non-blank line became a commit
+    return sum(1 for line in text.strip().split("\n") if line.strip())
+
+
+def best_time(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the git log parser")
+    parser.add_argument("--commits", type=int, default=20000, help="Commits per synthetic log")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per format (best is kept)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    commits = [make_commit(rng, i) for i in range(args.commits)]
+
+    print(f"{'format':<22}{'size':>9}{'parse':>10}{'MB/s':>8}{'commits':>10}{'old split':>11}")
+    for fmt in ("oneline", "pipe", "medium", "medium --name-status", "medium --numstat"):
+        text = render(commits, fmt)
+        size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+
+        parsed = []
+        seconds = best_time(lambda: parsed.__setitem__(slice(None), parse_git_log(text)), args.runs)
+
+        if len(parsed) != len(commits):
+            print(f"FAIL: {fmt} parsed {len(parsed)} commits, expected {len(commits)}")
+            return 1
+
+        print(f"{fmt:<22}{size_mb:>7.1f}MB{seconds * 1000:>8.0f}ms{size_mb / seconds:>8.1f}"
+              f"{len(parsed):>10}{old_split(text):>11}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Gunicorn configuration for ShipNote
+===================================
+Production launch path (Linux/macOS):
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden with the environment variables below.
+"""
+
+import multiprocessing
+import os
+import uuid
+
+# One boot ID for the master and all workers, so the job queue knows which
+# unfinished jobs belong to this server start (see app.py)
+os.environ.setdefault("SHIPNOTE_BOOT_ID", uuid.uuid4().hex)
+
+bind = os.getenv("SHIPNOTE_BIND", "0.0.0.0:5000")
+
+# Worker processes, each running a pool of request threads. Most request
+# time is spent waiting on GitHub and Claude, so threads go a long way.
+workers = int(os.getenv("SHIPNOTE_WORKERS", str(min(multiprocessing.cpu_count() * 2 + 1, 8))))
+threads = int(os.getenv("SHIPNOTE_THREADS", "8"))
+worker_class = "gthread"
+
+# Generation requests can wait on Claude for a couple of minutes
+timeout = int(os.getenv("SHIPNOTE_TIMEOUT", "180"))
+
+# On SIGTERM, workers get this long to finish in-flight requests
+graceful_timeout = int(os.getenv("SHIPNOTE_GRACEFUL_TIMEOUT", "60"))
+keepalive = 5
+
+# Import the app and build the services once in the master before forking
+preload_app = True
+
+
+def post_worker_init(worker):
+    # Pick up jobs interrupted by an earlier run (each job is claimed by one worker)
+    import app as shipnote
+    shipnote.job_service.load()
+
+
+def worker_exit(server, worker):
+    # Let running background jobs and precomputations finish
+    import app as shipnote
+    shipnote.shutdown_services()
@@ -2,7 +2,15 @@
 Services package for ShipNote backend
 """
 
-from .git_service import GitService
-from .ai_service import AIService
-
 __all__ = ['GitService', 'AIService']
+
+
+def __getattr__(name):
+    # Imported on demand so "import services.<module>" stays cheap
+    if name == 'GitService':
+        from .git_service import GitService
+        return GitService
+    if name == 'AIService':
+        from .ai_service import AIService
+        return AIService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
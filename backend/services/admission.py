@@ -0,0 +1,204 @@
+"""
+Admission Control for ShipNote
+Caps how many expensive requests run at once (overall and per endpoint),
+queues a bounded number of the rest for a limited time and turns the
+others away right away with 429 / 503 and a Retry-After hint, so a spike
+cannot pile up minute-long Claude calls until everything times out.
+"""
+
+import itertools
+import math
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from .metrics import ADMISSION_REJECTED, ADMISSION_WAITING, STAGE_SECONDS
+from .rate_limiter import PRIORITY_INTERACTIVE
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is not admitted
+
+    Attributes:
+        status_code: 429 when the endpoint is at its limit, 503 when the server is
+        retry_after: Suggested seconds before retrying
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        self.status_code = status_code
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class _Waiter:
+    """A request waiting for a slot"""
+
+    def __init__(self, endpoint: str, priority: int, seq: int):
+        self.endpoint = endpoint
+        self.priority = priority
+        self.seq = seq
+        self.evicted = False
+
+
+class AdmissionController:
+    """
+    In-flight limits with a bounded, prioritized wait queue.
+
+    A request runs when fewer than max_in_flight requests are running and
+    its endpoint is below its own limit. Otherwise it waits (at most
+    max_wait seconds) in a queue of at most queue_size requests. Waiters
+    are admitted by priority, then arrival; an interactive request that
+    finds the queue full takes the place of a waiting background (bulk)
+    request instead of being rejected.
+
+    Limits are per process: behind gunicorn every worker has its own, so
+    keep max_in_flight + queue_size below the worker's thread count.
+    """
+
+    def __init__(self, max_in_flight: int = 4, queue_size: int = 2, max_wait: float = 15.0,
+                 endpoint_limits: Optional[Dict[str, int]] = None):
+        self.max_in_flight = max_in_flight
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.endpoint_limits = endpoint_limits or {}
+
+        self._in_flight = 0
+        self._endpoint_in_flight = {}
+        self._waiters = []
+        self._seq = itertools.count()
+        # Moving average of how long each endpoint holds a slot (Retry-After estimate)
+        self._avg_seconds = {}
+        self._cond = threading.Condition()
+
+    def acquire(self, endpoint: str, priority: int = PRIORITY_INTERACTIVE) -> Dict[str, Any]:
+        """
+        Wait for a slot
+
+        Args:
+            endpoint: Endpoint (route) the request is for
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND
+
+        Returns:
+            Ticket to pass to release()
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out
+        """
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.max_wait
+
+        with self._cond:
+            waiter = _Waiter(endpoint, priority, next(self._seq))
+            self._waiters.append(waiter)
+
+            if self._next_admissible() is not waiter and len(self._waiters) - 1 >= self.queue_size:
+                # The queue already holds queue_size other requests
+                if not self._evict_for(waiter):
+                    self._waiters.remove(waiter)
+                    raise self._rejection(endpoint, "queue_full")
+
+            try:
+                ADMISSION_WAITING.set(len(self._waiters))
+                while self._next_admissible() is not waiter:
+                    if waiter.evicted:
+                        raise self._rejection(endpoint, "evicted")
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._rejection(endpoint, "timeout")
+                    self._cond.wait(remaining)
+                self._waiters.remove(waiter)
+            except AdmissionRejected:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                # Our place in line may have been holding others back
+                self._cond.notify_all()
+                raise
+            finally:
+                ADMISSION_WAITING.set(len(self._waiters))
+
+            self._in_flight += 1
+            self._endpoint_in_flight[endpoint] = self._endpoint_in_flight.get(endpoint, 0) + 1
+
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="admission_wait")
+        return {"endpoint": endpoint, "started": time.monotonic()}
+
+    def release(self, ticket: Dict[str, Any]) -> None:
+        """
+        Give back the slot of an admitted request
+
+        Args:
+            ticket: Ticket from acquire()
+        """
+        endpoint = ticket["endpoint"]
+        held = time.monotonic() - ticket["started"]
+        with self._cond:
+            self._in_flight -= 1
+            self._endpoint_in_flight[endpoint] -= 1
+            previous = self._avg_seconds.get(endpoint)
+            self._avg_seconds[endpoint] = held if previous is None else 0.8 * previous + 0.2 * held
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the current load
+
+        Returns:
+            Dict with in_flight, waiting and per-endpoint in-flight counts
+        """
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "endpoints": {k: v for k, v in self._endpoint_in_flight.items() if v}
+            }
+
+    def _next_admissible(self) -> Optional[_Waiter]:
+        # Caller must hold self._cond
+        if self._in_flight >= self.max_in_flight:
+            return None
+        for waiter in sorted(self._waiters, key=lambda w: (w.priority, w.seq)):
+            limit = self.endpoint_limits.get(waiter.endpoint)
+            if limit is None or self._endpoint_in_flight.get(waiter.endpoint, 0) < limit:
+                return waiter
+        return None
+
+    def _evict_for(self, waiter: _Waiter) -> bool:
+        """
+        Make room in a full queue by dropping the newest lower-priority waiter
+
+        Returns:
+            True if a waiter was evicted
+        """
+        # Caller must hold self._cond
+        candidates = [w for w in self._waiters if w.priority > waiter.priority and not w.evicted]
+        if not candidates:
+            return False
+        victim = max(candidates, key=lambda w: (w.priority, w.seq))
+        victim.evicted = True
+        self._waiters.remove(victim)
+        self._cond.notify_all()
+        return True
+
+    def _rejection(self, endpoint: str, reason: str) -> AdmissionRejected:
+        # Caller must hold self._cond
+        ADMISSION_REJECTED.inc(endpoint=endpoint, reason=reason)
+
+        limit = self.endpoint_limits.get(endpoint)
+        endpoint_full = limit is not None and self._endpoint_in_flight.get(endpoint, 0) >= limit
+        server_full = self._in_flight >= self.max_in_flight
+
+        # Roughly how long until the requests ahead of this one are done
+        per_request = self._avg_seconds.get(endpoint, 5.0)
+        slots = limit if endpoint_full and not server_full else self.max_in_flight
+        retry_after = int(min(max(math.ceil(per_request * (len(self._waiters) + 1) / max(slots, 1)), 1), 300))
+
+        if endpoint_full and not server_full:
+            return AdmissionRejected(
+                "Too many requests to this endpoint right now. Please try again shortly.",
+                429, retry_after
+            )
+        return AdmissionRejected(
+            "The server is busy right now. Please try again shortly.",
+            503, retry_after
+        )
@@ -1,46 +1,24 @@
-import anthropic
+import hashlib
 import os
-from typing import Dict, Any
-from dotenv import load_dotenv
+import time
+from typing import Dict, Any, Iterator, Optional
 
-load_dotenv()
+from .cache import open_cache
+from .config import load_config
+from .lazy import LazyModule
+from .metrics import LLM_IN_FLIGHT, LLM_REQUESTS, LLM_TOKENS, STAGE_SECONDS
 
-class AIService:
-    def __init__(self):
-        self.api_key = os.getenv("ANTHROPIC_API_KEY")
-        
-        if not self.api_key:
-            raise ValueError(
-                "ANTHROPIC_API_KEY not found. "
-                "Please set it in your .env file or environment variables. "
-                "Get your API key from: https://console.anthropic.com/"
-            )
-        
-        self.client = anthropic.Anthropic(api_key=self.api_key)
-    
-    def generate_release_notes(self, commits: list, from_ref: str = None, to_ref: str = 'HEAD') -> str:
-        """
-        Generate release notes from a list of commits.
-        This method is called by app.py endpoints.
-        
-        Args:
-            commits: List of commit dictionaries with hash, message, author, date
-            from_ref: Starting reference (optional)
-            to_ref: Ending reference
-            
-        Returns:
-            Markdown-formatted release notes as a string
-        """
-        # Format commits into readable text
-        commit_text = "\n".join([
-            f"- {commit['message']} - by {commit.get('author', 'Unknown')} ({commit['date']})" for commit in commits
-        ])
-        git_log = f"Commits from {from_ref or 'start'} to {to_ref}:\n\n{commit_text}"
-        result = self.generate_changelog(git_log)
-        return result['changelog'] if result['success'] else ''
-        
-    def generate_changelog(self, git_log: str) -> Dict[str, Any]:
-        system_prompt = """You are a professional technical writer who creates simple, easy-to-read changelogs.
+# Imported on first use; the SDK takes a large share of startup time
+anthropic = LazyModule("anthropic")
+
+load_config()
+
+# Model used for generation, and the version of the prompt below. Bump
+# PROMPT_VERSION whenever the prompt changes so stored notes are regenerated.
+MODEL = "claude-sonnet-4-20250514"
+PROMPT_VERSION = "1"
+
+SYSTEM_PROMPT = """You are a professional technical writer who creates simple, easy-to-read changelogs.
 
 Your task is to analyze git commits and create a changelog that anyone can understand:
 
@@ -110,22 +88,148 @@ Your task is to analyze git commits and create a changelog that anyone can under
 - Make it easy for anyone to understand
 - For deletions, clearly state what file or feature was removed"""
 
-        try:
-            message = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4000,
-                temperature=0.3,
-                system=system_prompt,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"Here is the git log to convert into a changelog:\n\n{git_log}"
-                    }
-                ]
+class AIService:
+    def __init__(self):
+        self.api_key = os.getenv("ANTHROPIC_API_KEY")
+        
+        if not self.api_key:
+            raise ValueError(
+                "ANTHROPIC_API_KEY not found. "
+                "Please set it in your .env file or environment variables. "
+                "Get your API key from: https://console.anthropic.com/"
+            )
+        
+        self.client = anthropic.Anthropic(api_key=self.api_key)
+        
+        # Generated notes keyed by the exact prompt they were generated from,
+        # so a repeated request (from any worker, with a shared
+        # SHIPNOTE_CACHE_URL) is served without calling Claude again, and
+        # notes generated for one request are never served for a different one
+        self._notes_cache = open_cache("notes", int(os.getenv("NOTES_CACHE_SIZE", "256")))
+    
+    def generate_release_notes(self, commits: list, from_ref: str = None, to_ref: str = 'HEAD') -> str:
+        """
+        Generate release notes from a list of commits.
+        This method is called by app.py endpoints.
+        
+        Args:
+            commits: List of commit dictionaries with hash, message, author, date
+            from_ref: Starting reference (optional)
+            to_ref: Ending reference
+            
+        Returns:
+            Markdown-formatted release notes as a string
+        """
+        git_log = self._format_git_log(commits, from_ref, to_ref)
+        key = self._notes_key(git_log)
+        cached = self._notes_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        result = self.generate_changelog(git_log)
+        if not result['success']:
+            return ''
+        
+        self._notes_cache.set(key, result['changelog'])
+        return result['changelog']
+    
+    def stream_release_notes(self, commits: list, from_ref: str = None, to_ref: str = 'HEAD') -> Iterator[str]:
+        """
+        Generate release notes like generate_release_notes(), yielding the
+        text as Claude writes it
+        
+        Cached notes are yielded as a single chunk. The notes are cached
+        once the stream has completed.
+        
+        Args:
+            commits: List of commit dictionaries with hash, message, author, date
+            from_ref: Starting reference (optional)
+            to_ref: Ending reference
+            
+        Yields:
+            Chunks of the Markdown-formatted release notes
+            
+        Raises:
+            Exception: If the Claude request fails
+        """
+        git_log = self._format_git_log(commits, from_ref, to_ref)
+        key = self._notes_key(git_log)
+        cached = self._notes_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        for text in self.stream_changelog(git_log):
+            chunks.append(text)
+            yield text
+        
+        self._notes_cache.set(key, "".join(chunks))
+    
+    def get_cached_release_notes(self, commits: list, from_ref: str = None, to_ref: str = 'HEAD') -> Optional[str]:
+        """
+        Look up notes previously generated for exactly this request
+        
+        Args:
+            commits: List of commit dictionaries, as passed to generate_release_notes()
+            from_ref: Starting reference (optional)
+            to_ref: Ending reference
+            
+        Returns:
+            The cached notes, or None
+        """
+        return self._notes_cache.get(self._notes_key(self._format_git_log(commits, from_ref, to_ref)))
+    
+    def _notes_key(self, git_log: str) -> str:
+        """
+        Cache key for the exact prompt sent to Claude (commits with their
+        authors, dates and files, and the refs) and the model and prompt
+        version that generate its notes
+        """
+        digest = hashlib.sha256(git_log.encode("utf-8")).hexdigest()
+        return f"{MODEL}:{PROMPT_VERSION}:{digest}"
+        
+    def _format_git_log(self, commits: list, from_ref: Optional[str], to_ref: str) -> str:
+        """
+        Format commits into the readable text sent to Claude
+        """
+        commit_text = "\n".join([self._format_commit_line(commit) for commit in commits])
+        return f"Commits from {from_ref or 'start'} to {to_ref}:\n\n{commit_text}"
+        
+    def _format_commit_line(self, commit: dict) -> str:
+        """
+        Format a single commit as one line of the prompt, including file names when known
+        """
+        line = f"- {commit['message']} - by {commit.get('author', 'Unknown')} ({commit['date']})"
+        files = commit.get('files')
+        if files:
+            file_list = ", ".join(
+                f"{f['filename']} ({f.get('status', 'modified')})" for f in files
             )
+            line += f"\n  Files: {file_list}"
+        return line
+    
+    def generate_changelog(self, git_log: str) -> Dict[str, Any]:
+        try:
+            with LLM_IN_FLIGHT.track(), STAGE_SECONDS.time(stage="llm_call"):
+                message = self.client.messages.create(
+                    model=MODEL,
+                    max_tokens=4000,
+                    temperature=0.3,
+                    system=SYSTEM_PROMPT,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": f"Here is the git log to convert into a changelog:\n\n{git_log}"
+                        }
+                    ]
+                )
             
             changelog = message.content[0].text
             total_tokens = message.usage.input_tokens + message.usage.output_tokens
+            LLM_REQUESTS.inc(outcome="success")
+            LLM_TOKENS.inc(message.usage.input_tokens, type="input")
+            LLM_TOKENS.inc(message.usage.output_tokens, type="output")
             
             return {
                 "success": True,
@@ -136,6 +240,7 @@ Your task is to analyze git commits and create a changelog that anyone can under
             }
             
         except anthropic.APIError as e:
+            LLM_REQUESTS.inc(outcome="api_error")
             return {
                 "success": False,
                 "error": f"API Error: {str(e)}",
@@ -143,6 +248,7 @@ Your task is to analyze git commits and create a changelog that anyone can under
                 "tokens_used": 0
             }
         except anthropic.APIConnectionError as e:
+            LLM_REQUESTS.inc(outcome="connection_error")
             return {
                 "success": False,
                 "error": f"Connection Error: Unable to reach Claude API. Check your internet connection.",
@@ -150,6 +256,7 @@ Your task is to analyze git commits and create a changelog that anyone can under
                 "tokens_used": 0
             }
         except anthropic.RateLimitError as e:
+            LLM_REQUESTS.inc(outcome="rate_limited")
             return {
                 "success": False,
                 "error": f"Rate Limit Error: Too many requests. Please try again later.",
@@ -157,6 +264,7 @@ Your task is to analyze git commits and create a changelog that anyone can under
                 "tokens_used": 0
             }
         except Exception as e:
+            LLM_REQUESTS.inc(outcome="error")
             return {
                 "success": False,
                 "error": f"Unexpected error: {str(e)}",
@@ -164,6 +272,62 @@ Your task is to analyze git commits and create a changelog that anyone can under
                 "tokens_used": 0
             }
 
+    def stream_changelog(self, git_log: str) -> Iterator[str]:
+        """
+        Stream a changelog for a git log, as generate_changelog() does
+        
+        Args:
+            git_log: Git log text to convert
+            
+        Yields:
+            Text deltas of the changelog
+            
+        Raises:
+            Exception: With the same messages as generate_changelog()'s errors
+        """
+        try:
+            with LLM_IN_FLIGHT.track(), STAGE_SECONDS.time(stage="llm_call"):
+                with self.client.messages.stream(
+                    model=MODEL,
+                    max_tokens=4000,
+                    temperature=0.3,
+                    system=SYSTEM_PROMPT,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": f"Here is the git log to convert into a changelog:\n\n{git_log}"
+                        }
+                    ]
+                ) as stream:
+                    started = time.perf_counter()
+                    for text in stream.text_stream:
+                        if started is not None:
+                            STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_first_token")
+                            started = None
+                        yield text
+                    message = stream.get_final_message()
+            
+            LLM_REQUESTS.inc(outcome="success")
+            LLM_TOKENS.inc(message.usage.input_tokens, type="input")
+            LLM_TOKENS.inc(message.usage.output_tokens, type="output")
+            
+        except GeneratorExit:
+            # The client went away mid-stream
+            LLM_REQUESTS.inc(outcome="cancelled")
+            raise
+        except anthropic.RateLimitError:
+            LLM_REQUESTS.inc(outcome="rate_limited")
+            raise Exception("Rate Limit Error: Too many requests. Please try again later.")
+        except anthropic.APIConnectionError:
+            LLM_REQUESTS.inc(outcome="connection_error")
+            raise Exception("Connection Error: Unable to reach Claude API. Check your internet connection.")
+        except anthropic.APIError as e:
+            LLM_REQUESTS.inc(outcome="api_error")
+            raise Exception(f"API Error: {str(e)}")
+        except Exception:
+            LLM_REQUESTS.inc(outcome="error")
+            raise
+
 if __name__ == "__main__":
     service = AIService()
     
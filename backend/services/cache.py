@@ -0,0 +1,518 @@
+"""
+Cache Backends for ShipNote
+One cache interface for the services, with three backends chosen by
+SHIPNOTE_CACHE_URL:
+
+    memory://                      in-process LRU (default; one per process)
+    sqlite:///var/cache/shipnote.db  local SQLite file (memory-mapped, WAL),
+                                     shared by the workers of one machine
+    redis://[:password@]host:6379/0  any Redis-protocol server, shared by
+                                     every worker and machine
+
+Values are stored in a compact, versioned encoding (see encode/decode), so
+a cache shared by servers running different code never hands back data
+that the reader cannot understand.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from urllib.parse import unquote, urlparse
+
+from .config import load_config
+from .metrics import CACHE_REQUESTS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+load_config()
+
+
+# Bump when the meaning of cached values changes; old entries are then ignored
+FORMAT_VERSION = 1
+
+# Encoding flags (second header byte)
+_FLAG_ZLIB = 0x01
+_FLAG_BYTES = 0x02
+
+# Values at least this large are zlib-compressed
+COMPRESS_MIN_BYTES = 512
+
+
+def encode(value: Any) -> bytes:
+    """
+    Serialize a value for the cache
+
+    Layout: version byte, flags byte, payload. The payload is JSON (or raw
+    bytes for bytes values), zlib-compressed when that makes it smaller.
+
+    Args:
+        value: bytes, or any JSON-serializable value
+
+    Returns:
+        Encoded bytes
+    """
+    flags = 0
+    if isinstance(value, bytes):
+        payload = value
+        flags |= _FLAG_BYTES
+    elif orjson is not None:
+        payload = orjson.dumps(value)
+    else:
+        payload = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    if len(payload) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(payload, 6)
+        if len(compressed) < len(payload):
+            payload = compressed
+            flags |= _FLAG_ZLIB
+
+    return bytes((FORMAT_VERSION, flags)) + payload
+
+
+def decode(data: bytes) -> Any:
+    """
+    Deserialize a value written by encode()
+
+    Args:
+        data: Encoded bytes
+
+    Returns:
+        The value
+
+    Raises:
+        ValueError: If the data was written with another format version
+    """
+    if len(data) < 2 or data[0] != FORMAT_VERSION:
+        raise ValueError("Unsupported cache format version")
+
+    flags = data[1]
+    payload = data[2:]
+    if flags & _FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    if flags & _FLAG_BYTES:
+        return payload
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+class MemoryBackend:
+    """
+    In-process LRU of encoded values, bounded by entry count.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteBackend:
+    """
+    Cache in a local SQLite file, shared by all processes on the machine.
+
+    The file is memory-mapped and in WAL mode, so reads from many workers
+    do not block each other. When it grows past max_bytes, expired and
+    then least recently written entries are removed.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_updated_at ON cache (updated_at)")
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return bytes(row[0])
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, updated_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl if ttl else None, now)
+            )
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % 200 == 0
+        if prune:
+            self._prune()
+
+    def delete(self, key: str) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def _prune(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+            size = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM cache").fetchone()[0]
+            if size <= self.max_bytes:
+                return
+            # Drop the oldest entries until roughly 80% of the budget is left
+            excess = size - int(self.max_bytes * 0.8)
+            conn.execute("""
+                DELETE FROM cache WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(LENGTH(value)) OVER (ORDER BY updated_at) AS running
+                        FROM cache
+                    ) WHERE running <= ?
+                )
+            """, (excess,))
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread and process (connections must not cross a fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+class RedisBackend:
+    """
+    Minimal Redis-protocol (RESP2) client for GET / SET / DEL.
+
+    Works with Redis and compatible servers (Valkey, KeyDB, Dragonfly, ...).
+    Connections are pooled per process and opened on first use.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, timeout: float = 2.0, max_idle: int = 8):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle = []
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        # After a failed connect, skip the server for a while instead of
+        # making every lookup wait for the timeout again
+        self._down_until = 0.0
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.execute("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if ttl:
+            self.execute("SET", key, value, "PX", str(max(int(ttl * 1000), 1)))
+        else:
+            self.execute("SET", key, value)
+
+    def delete(self, key: str) -> None:
+        self.execute("DEL", key)
+
+    def execute(self, *args: Any) -> Any:
+        """
+        Send one command and return its reply
+
+        Raises:
+            RuntimeError: For an error reply from the server
+            OSError: If the server cannot be reached
+        """
+        conn = self._checkout()
+        try:
+            conn.send(args)
+            reply = conn.read_reply()
+        except Exception:
+            conn.close()
+            raise
+        self._checkin(conn)
+        if isinstance(reply, RedisError):
+            raise RuntimeError(f"Redis error: {reply}")
+        return reply
+
+    def _checkout(self) -> "_RedisConnection":
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked: the parent's sockets are not ours to use
+                self._idle = []
+                self._pid = os.getpid()
+            if self._idle:
+                return self._idle.pop()
+            if time.monotonic() < self._down_until:
+                raise ConnectionError("Redis server unavailable, retrying shortly")
+
+        try:
+            conn = _RedisConnection(self.host, self.port, self.timeout)
+        except OSError:
+            self._down_until = time.monotonic() + 5.0
+            raise
+        try:
+            if self.password:
+                self._check(conn, "AUTH", self.password)
+            if self.db:
+                self._check(conn, "SELECT", str(self.db))
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _checkin(self, conn: "_RedisConnection") -> None:
+        with self._lock:
+            if len(self._idle) < self.max_idle and self._pid == os.getpid():
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    @staticmethod
+    def _check(conn: "_RedisConnection", *args: Any) -> None:
+        conn.send(args)
+        reply = conn.read_reply()
+        if isinstance(reply, RedisError):
+            raise RuntimeError(f"Redis error: {reply}")
+
+
+class RedisError(str):
+    """An error reply ("-ERR ...") from a Redis-protocol server"""
+
+
+class _RedisConnection:
+    """One socket speaking RESP2"""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+
+    def send(self, args: tuple) -> None:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.sock.sendall(b"".join(parts))
+
+    def read_reply(self) -> Any:
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by the Redis server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            return RedisError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by the Redis server")
+            return data[:-2]
+        if kind == b"*":
+            count = int(rest)
+            return None if count < 0 else [self.read_reply() for _ in range(count)]
+        raise ConnectionError(f"Unexpected reply from the Redis server: {line!r}")
+
+    def close(self) -> None:
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class Cache:
+    """
+    A named cache on top of a backend.
+
+    Keys are prefixed with the namespace and FORMAT_VERSION, values are
+    encoded with encode(), and lookups are counted in the cache metrics.
+    Backend failures (e.g. Redis unreachable) are logged and treated as
+    misses, so a cache outage slows requests down but never fails them.
+
+    Example:
+        notes = open_cache("notes", max_entries=256)
+        notes.set(key, "# Release Notes ...")
+        notes.get(key)
+    """
+
+    def __init__(self, namespace: str, backend: Any):
+        self.namespace = namespace
+        self.backend = backend
+        self._prefix = f"shipnote:v{FORMAT_VERSION}:{namespace}:"
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a value
+
+        Returns:
+            The cached value, or None
+        """
+        value = None
+        try:
+            data = self.backend.get(self._prefix + key)
+            if data is not None:
+                value = decode(data)
+        except Exception as e:
+            print(f"Error reading {self.namespace} cache: {str(e)}")
+        CACHE_REQUESTS.inc(cache=self.namespace, result="hit" if value is not None else "miss")
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value
+
+        Args:
+            key: Cache key (namespaced automatically)
+            value: bytes or a JSON-serializable value (not None)
+            ttl: Seconds until the entry expires (optional)
+        """
+        try:
+            self.backend.set(self._prefix + key, encode(value), ttl)
+        except Exception as e:
+            print(f"Error writing {self.namespace} cache: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        """Remove a value"""
+        try:
+            self.backend.delete(self._prefix + key)
+        except Exception as e:
+            print(f"Error deleting from {self.namespace} cache: {str(e)}")
+
+
+_shared_backend = None
+_shared_lock = threading.Lock()
+
+
+def create_backend(url: str) -> Any:
+    """
+    Build a backend from a cache URL
+
+    Args:
+        url: memory://, sqlite:///path/to/file.db or redis://[:password@]host[:port][/db]
+
+    Returns:
+        The backend
+
+    Raises:
+        ValueError: For an unsupported URL scheme
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryBackend()
+    if parsed.scheme == "sqlite":
+        path = unquote(parsed.path)
+        if parsed.netloc:
+            # sqlite://relative/path.db
+            path = parsed.netloc + path
+        return SQLiteBackend(
+            path, max_bytes=int(os.getenv("SHIPNOTE_CACHE_MAX_MB", "512")) * 1024 * 1024
+        )
+    if parsed.scheme == "redis":
+        db = parsed.path.strip("/")
+        return RedisBackend(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=unquote(parsed.password) if parsed.password else None
+        )
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+def shared_backend() -> Optional[Any]:
+    """
+    The process-wide shared backend from SHIPNOTE_CACHE_URL
+
+    Returns:
+        The SQLite or Redis backend, or None when caches are in-process
+    """
+    global _shared_backend
+    url = os.getenv("SHIPNOTE_CACHE_URL", "memory://")
+    if url.startswith("memory:"):
+        return None
+    with _shared_lock:
+        if _shared_backend is None:
+            _shared_backend = create_backend(url)
+        return _shared_backend
+
+
+def open_cache(namespace: str, max_entries: int = 1024) -> Cache:
+    """
+    Open a named cache on the configured backend
+
+    With the default in-process backend every cache gets its own LRU of
+    max_entries entries; shared backends are bounded by their own limits.
+
+    Args:
+        namespace: Cache name (also the "cache" label in /metrics)
+        max_entries: Entry limit of the in-process LRU
+
+    Returns:
+        The cache
+    """
+    backend = shared_backend()
+    return Cache(namespace, backend if backend is not None else MemoryBackend(max_entries))
+
+
+def open_shared_cache(namespace: str) -> Optional[Cache]:
+    """
+    Open a named cache only if a shared backend is configured
+
+    For callers that already keep their own in-process cache and only
+    want a second, shared layer.
+
+    Returns:
+        The cache, or None with the default in-process backend
+    """
+    backend = shared_backend()
+    return Cache(namespace, backend) if backend is not None else None
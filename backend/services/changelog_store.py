@@ -0,0 +1,228 @@
+"""
+Changelog Store for ShipNote
+Keeps generated release notes in a local SQLite database, keyed by
+repository, resolved commit range (base and head SHA), model and prompt
+version, so opening the same release again is a single primary-key lookup
+instead of another Claude call.
+
+Commit SHAs are immutable, so a stored entry never goes stale by itself:
+moved refs resolve to new SHAs and miss. Entries are removed when a newer
+generation supersedes the same ref range (e.g. a re-pushed tag) and when a
+force push or branch/tag deletion rewrites history.
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from .cache import decode, encode
+
+
+# (repo_id, base_sha, head_sha, variant)
+RangeKey = Tuple[str, str, str, str]
+
+
+def github_repo_id(full_name: str) -> str:
+    """Repository identity of a GitHub repository ("owner/repo")"""
+    return f"github.com/{full_name.lower()}"
+
+
+def local_repo_id(repo_path: str) -> str:
+    """Repository identity of a local clone"""
+    return f"local:{os.path.realpath(repo_path)}"
+
+
+def remote_repo_id(url: str) -> str:
+    """Repository identity of a clone URL (normalized, see MirrorService.normalize_url)"""
+    return f"url:{url}"
+
+
+class ChangelogStore:
+    """
+    Generated notes by repository and resolved range, backed by SQLite.
+
+    A range key is (repo_id, base_sha, head_sha, variant): base_sha is ""
+    for "everything up to head", and variant holds the request options that
+    change which commits are included (limit, file lists). Entries written
+    with another model or prompt version are never returned.
+
+    A second table records which ref names (e.g. v2.0...v2.1) each range was
+    requested as, for lookups by tag range. When a ref name moves to other
+    commits, the entry it pointed at is removed unless other names still
+    point at it.
+    """
+
+    def __init__(self, db_path: str = "changelogs.db", model: str = "", prompt_version: str = ""):
+        self.db_path = db_path
+        self.model = model
+        self.prompt_version = prompt_version
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS changelogs (
+                    repo_id TEXT NOT NULL,
+                    base_sha TEXT NOT NULL,
+                    head_sha TEXT NOT NULL,
+                    variant TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    notes TEXT NOT NULL,
+                    commits BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (repo_id, base_sha, head_sha, variant, model, prompt_version)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS changelog_refs (
+                    repo_id TEXT NOT NULL,
+                    from_ref TEXT NOT NULL,
+                    to_ref TEXT NOT NULL,
+                    variant TEXT NOT NULL,
+                    base_sha TEXT NOT NULL,
+                    head_sha TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (repo_id, from_ref, to_ref, variant)
+                ) WITHOUT ROWID
+            """)
+
+    def get(self, key: RangeKey) -> Optional[Dict[str, Any]]:
+        """
+        Look up the notes of a resolved range
+
+        Args:
+            key: (repo_id, base_sha, head_sha, variant)
+
+        Returns:
+            Dict with notes, commits and created_at, or None
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT notes, commits, created_at FROM changelogs "
+                "WHERE repo_id = ? AND base_sha = ? AND head_sha = ? AND variant = ? "
+                "AND model = ? AND prompt_version = ?",
+                (*key, self.model, self.prompt_version)
+            ).fetchone()
+        return self._entry(key, row) if row else None
+
+    def find(self, repo_id: str, from_ref: Optional[str], to_ref: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the most recent notes generated for a ref range, e.g. two tags
+
+        The caller should check that the refs still resolve to the returned
+        base_sha / head_sha before serving the notes.
+
+        Args:
+            repo_id: From github_repo_id() or local_repo_id()
+            from_ref: Starting ref as requested (None for "up to to_ref")
+            to_ref: Ending ref as requested
+
+        Returns:
+            Dict with base_sha, head_sha, variant, notes, commits and
+            created_at, or None
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT c.base_sha, c.head_sha, c.variant, c.notes, c.commits, c.created_at "
+                "FROM changelog_refs r JOIN changelogs c ON c.repo_id = r.repo_id "
+                "AND c.base_sha = r.base_sha AND c.head_sha = r.head_sha AND c.variant = r.variant "
+                "WHERE r.repo_id = ? AND r.from_ref = ? AND r.to_ref = ? "
+                "AND c.model = ? AND c.prompt_version = ? ORDER BY r.updated_at DESC LIMIT 1",
+                (repo_id, from_ref or "", to_ref, self.model, self.prompt_version)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._entry((repo_id, row[0], row[1], row[2]), row[3:])
+
+    def put(self, key: RangeKey, from_ref: Optional[str], to_ref: str,
+            notes: str, commits: List[Dict[str, Any]]) -> None:
+        """
+        Store generated notes for a resolved range, requested as from_ref..to_ref
+
+        Args:
+            key: (repo_id, base_sha, head_sha, variant)
+            from_ref: Starting ref as requested
+            to_ref: Ending ref as requested
+            notes: Generated release notes
+            commits: The commits the notes were generated from
+        """
+        repo_id, base_sha, head_sha, variant = key
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO changelogs (repo_id, base_sha, head_sha, variant, model, "
+                "prompt_version, notes, commits, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (repo_id, base_sha, head_sha, variant, self.model, self.prompt_version,
+                 notes, encode(commits), now)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO changelog_refs (repo_id, from_ref, to_ref, variant, "
+                "base_sha, head_sha, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (repo_id, from_ref or "", to_ref, variant, base_sha, head_sha, now)
+            )
+            # The names may have pointed at other commits before
+            self._delete_orphans(conn, repo_id)
+
+    def invalidate(self, repo_id: str, ref: Optional[str] = None, sha: Optional[str] = None) -> int:
+        """
+        Remove the entries of a rewritten ref or commit
+
+        Args:
+            repo_id: Repository identity
+            ref: Branch or tag name; ranges requested from or to it are removed
+            sha: Commit SHA; ranges starting or ending at it are removed
+
+        Returns:
+            Number of entries removed
+        """
+        if not ref and not sha:
+            return 0
+
+        with self._connect() as conn:
+            if ref:
+                conn.execute(
+                    "DELETE FROM changelog_refs WHERE repo_id = ? AND (from_ref = ? OR to_ref = ?)",
+                    (repo_id, ref, ref)
+                )
+            if sha:
+                conn.execute(
+                    "DELETE FROM changelog_refs WHERE repo_id = ? AND (base_sha = ? OR head_sha = ?)",
+                    (repo_id, sha, sha)
+                )
+            # Entries are kept while any remaining name points at them
+            return self._delete_orphans(conn, repo_id)
+
+    def _delete_orphans(self, conn: sqlite3.Connection, repo_id: str) -> int:
+        # Entries of a repository that no ref name points at anymore
+        return conn.execute("""
+            DELETE FROM changelogs WHERE repo_id = ? AND NOT EXISTS (
+                SELECT 1 FROM changelog_refs r WHERE r.repo_id = changelogs.repo_id
+                AND r.base_sha = changelogs.base_sha AND r.head_sha = changelogs.head_sha
+                AND r.variant = changelogs.variant
+            )
+        """, (repo_id,)).rowcount
+
+    @staticmethod
+    def _entry(key: RangeKey, row: tuple) -> Dict[str, Any]:
+        notes, commits, created_at = row
+        return {
+            "repo_id": key[0],
+            "base_sha": key[1],
+            "head_sha": key[2],
+            "variant": key[3],
+            "notes": notes,
+            "commits": decode(bytes(commits)),
+            "created_at": created_at
+        }
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per operation (commits on success)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
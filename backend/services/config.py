@@ -0,0 +1,25 @@
+"""
+Configuration for ShipNote
+Loads the .env file into the environment once per process, no matter how
+many modules ask for it.
+"""
+
+import threading
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_config() -> None:
+    """
+    Load variables from the .env file into os.environ (only the first call does anything)
+    """
+    global _loaded
+    if _loaded:
+        return
+
+    with _lock:
+        if not _loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _loaded = True
@@ -5,10 +5,15 @@ This service handles all Git repository operations.
 It reads commit history from local Git repositories.
 """
 
-from git import Repo
 from datetime import datetime
 from typing import List, Dict, Optional
 
+from .lazy import LazyModule
+from .metrics import STAGE_SECONDS
+
+# GitPython is imported on first use
+git = LazyModule("git")
+
 
 class GitService:
     """
@@ -32,24 +37,44 @@ class GitService:
             commits = git_service.get_commits("/path/to/repo", "v1.0.0", "HEAD")
         """
         try:
-            repo = Repo(repo_path)
-            if from_ref:
-                commit_range = f"{from_ref}..{to_ref}"
-            else:
-                commit_range = to_ref
-            commits = []
-            for commit in repo.iter_commits(commit_range, max_count=limit):
-                commit_date = datetime.fromtimestamp(commit.committed_date).strftime('%b %d, %I:%M %p')
-                commits.append({
-                    "hash": commit.hexsha[:7],
-                    "message": commit.message.strip(),
-                    "author": commit.author.name,
-                    "date": commit_date,
-                    "files_changed": len(commit.stats.files)
-                })
+            with STAGE_SECONDS.time(stage="git_read"):
+                repo = git.Repo(repo_path)
+                if from_ref:
+                    commit_range = f"{from_ref}..{to_ref}"
+                else:
+                    commit_range = to_ref
+                commits = []
+                for commit in repo.iter_commits(commit_range, max_count=limit):
+                    commit_date = datetime.fromtimestamp(commit.committed_date).strftime('%b %d, %I:%M %p')
+                    commits.append({
+                        "hash": commit.hexsha[:7],
+                        "message": commit.message.strip(),
+                        "author": commit.author.name,
+                        "date": commit_date,
+                        "files_changed": len(commit.stats.files)
+                    })
             return commits
         except Exception as e:
             raise Exception(f"Failed to fetch commits from {repo_path}: {str(e)}")
+    
+    def resolve_ref(self, repo_path: str, ref: str) -> str:
+        """
+        Resolve a branch, tag or abbreviated SHA to the full commit SHA
+        
+        Args:
+            repo_path: Path to the local git repository
+            ref: Ref to resolve (e.g., "v1.0.0" or "HEAD")
+        
+        Returns:
+            The full 40-character commit SHA
+        
+        Raises:
+            Exception: If the repository or ref does not exist
+        """
+        try:
+            return git.Repo(repo_path).commit(ref).hexsha
+        except Exception as e:
+            raise Exception(f"Failed to resolve {ref} in {repo_path}: {str(e)}")
 
 # Test code (only runs when you execute this file directly)
 if __name__ == "__main__":
@@ -3,12 +3,74 @@ GitHub Service for ShipNote
 Handles GitHub API interactions including OAuth and repository operations
 """
 
-import requests
+import hashlib
+import json
 import os
-from typing import Dict, List, Any, Optional
-from dotenv import load_dotenv
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Iterator
+from urllib.parse import urlparse, parse_qs
+from .cache import open_cache, open_shared_cache
+from .config import load_config
+from .lazy import LazyModule
+from .metrics import GITHUB_IN_FLIGHT
+from .response_cache import ResponseCache
+from .rate_limiter import RateLimitScheduler, PRIORITY_BACKGROUND
 
-load_dotenv()
+# Imported on first use
+requests = LazyModule("requests")
+
+load_config()
+
+
+# GraphQL query for commit history (with per-commit stats) of any ref expression
+COMMIT_HISTORY_QUERY = """
+query($owner: String!, $repo: String!, $ref: String!, $first: Int!, $after: String,
+      $since: GitTimestamp, $until: GitTimestamp) {
+  repository(owner: $owner, name: $repo) {
+    object(expression: $ref) {
+      ... on Commit {
+        history(first: $first, after: $after, since: $since, until: $until) {
+          pageInfo { hasNextPage endCursor }
+          nodes {
+            oid
+            message
+            url
+            authoredDate
+            additions
+            deletions
+            changedFilesIfAvailable
+            author { name user { login } }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+class GitHubResponse:
+    """
+    Minimal response object shared by live and cached GitHub responses
+    """
+    
+    def __init__(self, status_code: int, body: bytes, link: Optional[str] = None,
+                 from_cache: bool = False):
+        self.status_code = status_code
+        self.body = body
+        self.from_cache = from_cache
+        self.links = {}
+        
+        # Same structure as requests.Response.links
+        if link:
+            for entry in requests.utils.parse_header_links(link):
+                self.links[entry.get("rel") or entry.get("url")] = entry
+    
+    def json(self) -> Any:
+        return json.loads(self.body)
 
 
 class GitHubService:
@@ -17,6 +79,46 @@ class GitHubService:
         self.client_secret = os.getenv("GITHUB_CLIENT_SECRET")
         self.api_base = "https://api.github.com"
         
+        # Maximum number of list pages downloaded in parallel once the
+        # last page number is known from the Link header
+        self.max_page_workers = int(os.getenv("GITHUB_PAGE_WORKERS", "8"))
+        
+        # Conditional-request cache: polls that come back 304 are served
+        # from here and do not use up rate limit quota
+        self.response_cache = ResponseCache(
+            max_bytes=int(os.getenv("GITHUB_CACHE_MAX_MB", "64")) * 1024 * 1024,
+            disk_dir=os.getenv("GITHUB_CACHE_DIR") or None,
+            disk_max_bytes=int(os.getenv("GITHUB_CACHE_DISK_MB", "256")) * 1024 * 1024,
+            shared=open_shared_cache("github_response_shared")
+        )
+        
+        # Per-token quota tracking; background work runs behind interactive calls
+        self.rate_limiter = RateLimitScheduler(
+            background_reserve=int(os.getenv("GITHUB_BACKGROUND_RESERVE", "500"))
+        )
+        
+        # Resolved ref -> SHA (short TTL, branches move) and compare results
+        # keyed by SHA pair (immutable, so kept until evicted)
+        self.ref_ttl = float(os.getenv("GITHUB_REF_TTL", "60"))
+        self._ref_cache = open_cache("github_refs", 4096)
+        self._compare_cache = open_cache("github_compare", 128)
+        self._cache_lock = threading.Lock()
+        
+        # Per-user repository list cache (stale-while-revalidate)
+        self.repo_cache_ttl = float(os.getenv("GITHUB_REPO_CACHE_TTL", "60"))
+        self.repo_cache_max_age = float(os.getenv("GITHUB_REPO_CACHE_MAX_AGE", "3600"))
+        self.max_repositories = 5000
+        self._repo_cache = open_cache("github_repositories", 1024)
+        self._refreshing = set()
+        
+        # Per-commit file lists for prompts. Commits never change, so the
+        # cache is keyed by token and SHA and only bounded to cap memory use.
+        self.enrich_workers = int(os.getenv("GITHUB_ENRICH_WORKERS", "8"))
+        self.enrich_max_lines = int(os.getenv("GITHUB_ENRICH_MAX_LINES", "5000"))
+        self.enrich_max_bytes = int(os.getenv("GITHUB_ENRICH_MAX_BYTES", str(2 * 1024 * 1024)))
+        self.enrich_max_files = 100
+        self._commit_files_cache = open_cache("commit_files", 50000)
+        
         if not self.client_id or not self.client_secret:
             print("WARNING: GitHub OAuth credentials not configured")
             print("Set GITHUB_CLIENT_ID and GITHUB_CLIENT_SECRET in .env file")
@@ -77,8 +179,7 @@ class GitHubService:
         }
         
         try:
-            response = requests.get(f"{self.api_base}/user", headers=headers)
-            response.raise_for_status()
+            response = self._get(f"{self.api_base}/user", headers)
             user_data = response.json()
             
             return {
@@ -94,32 +195,74 @@ class GitHubService:
                 "error": str(e)
             }
     
-    def get_user_repositories(self, access_token: str, per_page: int = 30) -> Dict[str, Any]:
+    def get_user_repositories(self, access_token: str, per_page: int = 100,
+                              refresh: bool = False) -> Dict[str, Any]:
         """
-        Get user's repositories
+        Get all of the user's repositories
+        
+        The full list is cached per user (stale-while-revalidate): a fresh
+        entry is returned as is, a stale one is returned immediately while a
+        background refresh updates it, and only a missing or expired entry
+        makes the caller wait for GitHub.
         
         Args:
             access_token: GitHub access token
             per_page: Number of repos per page
+            refresh: Ignore the cache and fetch the list now
             
         Returns:
             Dict with list of repositories
         """
+        cache_key = self._token_key(access_token)
+        cached = None if refresh else self._repo_cache.get(cache_key)
+        
+        if cached:
+            age = time.time() - cached["fetched_at"]
+            if age < self.repo_cache_ttl:
+                return {"success": True, "repositories": cached["repositories"], "cached": True}
+            if age < self.repo_cache_max_age:
+                self._refresh_repositories_in_background(access_token, per_page)
+                return {"success": True, "repositories": cached["repositories"], "cached": True}
+        
+        try:
+            repositories = self._list_repositories(access_token, per_page)
+            self._store_repositories(cache_key, repositories)
+            
+            return {
+                "success": True,
+                "repositories": repositories,
+                "cached": False
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def _list_repositories(self, access_token: str, per_page: int) -> List[Dict[str, Any]]:
+        """
+        Fetch every page of the user's repositories from GitHub
+        
+        Args:
+            access_token: GitHub access token
+            per_page: Number of repos per page
+            
+        Returns:
+            List of repositories, most recently updated first
+        """
         headers = {
             "Authorization": f"Bearer {access_token}",
             "Accept": "application/vnd.github.v3+json"
         }
         
-        try:
-            response = requests.get(
-                f"{self.api_base}/user/repos",
-                headers=headers,
-                params={"per_page": per_page, "sort": "updated"}
-            )
-            response.raise_for_status()
-            repos_data = response.json()
-            
-            repositories = []
+        repositories = []
+        pages = self._fetch_pages(
+            f"{self.api_base}/user/repos",
+            headers,
+            {"per_page": per_page, "sort": "updated"},
+            max_items=self.max_repositories
+        )
+        for repos_data in pages:
             for repo in repos_data:
                 repositories.append({
                     "id": repo["id"],
@@ -132,16 +275,42 @@ class GitHubService:
                     "stars": repo["stargazers_count"],
                     "updated_at": repo["updated_at"]
                 })
-            
-            return {
-                "success": True,
-                "repositories": repositories
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e)
-            }
+        return repositories
+    
+    def _refresh_repositories_in_background(self, access_token: str, per_page: int) -> None:
+        """
+        Start a background refresh of the cached repository list (at most one per user)
+        
+        Args:
+            access_token: GitHub access token
+            per_page: Number of repos per page
+        """
+        cache_key = self._token_key(access_token)
+        with self._cache_lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+        
+        def refresh():
+            try:
+                with self.rate_limiter.priority(PRIORITY_BACKGROUND):
+                    repositories = self._list_repositories(access_token, per_page)
+                self._store_repositories(cache_key, repositories)
+            except Exception as e:
+                print(f"Error refreshing repositories: {str(e)}")
+            finally:
+                with self._cache_lock:
+                    self._refreshing.discard(cache_key)
+        
+        threading.Thread(target=refresh, daemon=True).start()
+    
+    def _store_repositories(self, cache_key: str, repositories: List[Dict[str, Any]]) -> None:
+        """Cache a freshly fetched repository list until it is too old to serve even stale"""
+        self._repo_cache.set(
+            cache_key,
+            {"fetched_at": time.time(), "repositories": repositories},
+            ttl=self.repo_cache_max_age
+        )
     
     def fetch_repo_commits(self, access_token: str, owner: str, repo: str, 
                           since: Optional[str] = None, until: Optional[str] = None,
@@ -172,38 +341,17 @@ class GitHubService:
             params["until"] = until
         
         try:
-            response = requests.get(
+            commits = []
+            pages = self._fetch_pages(
                 f"{self.api_base}/repos/{owner}/{repo}/commits",
-                headers=headers,
-                params=params
+                headers, params, limit
             )
-            response.raise_for_status()
-            commits_data = response.json()
-            
-            commits = []
-            for commit in commits_data:
-                commit_obj = commit.get("commit", {})
-                
-                # Try to get author name from multiple sources
-                author_name = "Unknown"
-                
-                # First try: GitHub user (authenticated author)
-                if commit.get("author") and commit["author"].get("login"):
-                    author_name = commit["author"]["login"]
-                # Second try: Git commit author name
-                elif commit_obj.get("author") and commit_obj["author"].get("name"):
-                    author_name = commit_obj["author"]["name"]
-                # Third try: Committer if author not available
-                elif commit_obj.get("committer") and commit_obj["committer"].get("name"):
-                    author_name = commit_obj["committer"]["name"]
-                
-                commits.append({
-                    "hash": commit["sha"][:7],  # Short hash
-                    "message": commit_obj.get("message", ""),
-                    "author": author_name,
-                    "date": commit_obj.get("author", {}).get("date", ""),
-                    "url": commit.get("html_url", "")
-                })
+            for commits_data in pages:
+                for commit in commits_data:
+                    commits.append(self._format_commit(commit))
+                if len(commits) >= limit:
+                    break
+            commits = commits[:limit]
             
             return {
                 "success": True,
@@ -216,6 +364,13 @@ class GitHubService:
                     "success": False,
                     "error": "Repository not found or you don't have access"
                 }
+            elif e.response.status_code in (403, 429) and (
+                    e.response.headers.get("X-RateLimit-Remaining") == "0"
+                    or e.response.headers.get("Retry-After")):
+                return {
+                    "success": False,
+                    "error": "GitHub rate limit exceeded. Please try again later."
+                }
             elif e.response.status_code == 403:
                 return {
                     "success": False,
@@ -232,6 +387,652 @@ class GitHubService:
                 "error": str(e)
             }
     
+    def fetch_repo_commits_graphql(self, access_token: str, owner: str, repo: str,
+                                   since: Optional[str] = None, until: Optional[str] = None,
+                                   limit: int = 100, ref: Optional[str] = None,
+                                   include_files: bool = False) -> Dict[str, Any]:
+        """
+        Fetch commits with additions, deletions and changed-file counts using GraphQL
+        
+        One GraphQL query returns a full page of commits including their
+        stats, which the REST /commits list does not have. Pages are walked
+        with the history cursor.
+        
+        Args:
+            access_token: GitHub access token
+            owner: Repository owner
+            repo: Repository name
+            since: ISO 8601 date string (optional)
+            until: ISO 8601 date string (optional)
+            limit: Maximum number of commits to fetch
+            ref: Branch, tag or SHA to read history from (default branch if omitted)
+            include_files: Also fetch file names via REST for the commits that need them
+            
+        Returns:
+            Dict with list of commits
+        """
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/vnd.github.v3+json"
+        }
+        
+        variables = {
+            "owner": owner,
+            "repo": repo,
+            "ref": ref or "HEAD",
+            "since": since,
+            "until": until
+        }
+        
+        try:
+            commits = []
+            cursor = None
+            while len(commits) < limit:
+                # GitHub caps a connection at 100 nodes per query
+                variables["first"] = min(limit - len(commits), 100)
+                variables["after"] = cursor
+                
+                response = self._request(
+                    "POST",
+                    f"{self.api_base}/graphql",
+                    headers,
+                    resource="graphql",
+                    json={"query": COMMIT_HISTORY_QUERY, "variables": variables}
+                )
+                response.raise_for_status()
+                result = response.json()
+                
+                if result.get("errors"):
+                    error = result["errors"][0]
+                    if error.get("type") == "NOT_FOUND":
+                        return {
+                            "success": False,
+                            "error": "Repository not found or you don't have access"
+                        }
+                    return {
+                        "success": False,
+                        "error": f"GitHub API error: {error.get('message', 'GraphQL query failed')}"
+                    }
+                
+                repository = (result.get("data") or {}).get("repository") or {}
+                history = (repository.get("object") or {}).get("history")
+                if history is None:
+                    return {
+                        "success": False,
+                        "error": f"Could not read commit history for {ref or 'the default branch'}"
+                    }
+                
+                for node in history["nodes"]:
+                    commits.append(self._format_graphql_commit(node))
+                
+                page_info = history["pageInfo"]
+                if not page_info["hasNextPage"]:
+                    break
+                cursor = page_info["endCursor"]
+            
+            commits = commits[:limit]
+            
+            if include_files:
+                self.enrich_commits(access_token, owner, repo, commits)
+            
+            return {
+                "success": True,
+                "commits": commits,
+                "count": len(commits)
+            }
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code in (401, 403):
+                return {
+                    "success": False,
+                    "error": "Access forbidden. Check your permissions."
+                }
+            return {
+                "success": False,
+                "error": f"GitHub API error: {str(e)}"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def resolve_ref(self, access_token: str, owner: str, repo: str, ref: str) -> str:
+        """
+        Resolve a branch, tag or short SHA to a full commit SHA
+        
+        Full SHAs are returned without a request, so resolving them proves
+        nothing about the token's access (see check_repo_access). Other refs
+        are cached for GITHUB_REF_TTL seconds; after that the lookup is a
+        conditional request, which is free when the ref has not moved.
+        
+        Args:
+            access_token: GitHub access token
+            owner: Repository owner
+            repo: Repository name
+            ref: Branch, tag or SHA
+            
+        Returns:
+            The full 40-character commit SHA
+            
+        Raises:
+            requests.exceptions.HTTPError: If the ref does not exist
+        """
+        if re.fullmatch(r"[0-9a-f]{40}", ref):
+            return ref
+        
+        cache_key = f"{self._token_key(access_token)}:{owner}/{repo}:{ref}"
+        cached = self._ref_cache.get(cache_key)
+        if cached:
+            return cached
+        
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/vnd.github.sha"
+        }
+        response = self._get(f"{self.api_base}/repos/{owner}/{repo}/commits/{ref}", headers)
+        sha = response.body.decode("utf-8").strip()
+        
+        self._ref_cache.set(cache_key, sha, ttl=self.ref_ttl)
+        return sha
+    
+    def check_repo_access(self, access_token: str, owner: str, repo: str) -> Dict[str, Any]:
+        """
+        Check that a token can read a repository
+        
+        Serving stored notes and commits needs no other GitHub call, so this
+        one is made first. It is a conditional request, which costs no quota
+        once the repository is cached.
+        
+        Args:
+            access_token: GitHub access token
+            owner: Repository owner
+            repo: Repository name
+            
+        Returns:
+            Dict with success, plus error and the HTTP status to answer with
+            when the token cannot read the repository
+        """
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/vnd.github.v3+json"
+        }
+        
+        try:
+            self._get(f"{self.api_base}/repos/{owner}/{repo}", headers)
+            return {"success": True}
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code in (401, 403, 404):
+                return {
+                    "success": False,
+                    "error": "Repository not found or you don't have access",
+                    "status": 403 if e.response.status_code == 403 else 404
+                }
+            return {"success": False, "error": f"GitHub API error: {str(e)}", "status": 502}
+        except Exception as e:
+            return {"success": False, "error": str(e), "status": 502}
+    
+    def fetch_compare_commits(self, access_token: str, owner: str, repo: str,
+                              base: str, head: str = "HEAD",
+                              limit: Optional[int] = None,
+                              include_files: bool = False) -> Dict[str, Any]:
+        """
+        Fetch exactly the commits between two refs using the compare endpoint
+        
+        Both refs are resolved to SHAs first (cached), so the compare URL is
+        immutable and its result can be reused. Compares larger than one page
+        are paginated; once the first page reports the total, the remaining
+        pages are fetched concurrently. With a limit, only the last pages
+        (the newest commits) are fetched.
+        
+        Args:
+            access_token: GitHub access token
+            owner: Repository owner
+            repo: Repository name
+            base: Base ref (e.g. "v2.0")
+            head: Head ref (default: "HEAD", the default branch)
+            limit: Maximum number of commits to return (newest first, optional)
+            include_files: Also fetch the file names of each commit
+            
+        Returns:
+            Dict with list of commits (newest first) and the resolved SHAs
+        """
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/vnd.github.v3+json"
+        }
+        
+        try:
+            try:
+                base_sha = self.resolve_ref(access_token, owner, repo, base)
+                head_sha = self.resolve_ref(access_token, owner, repo, head)
+            except requests.exceptions.HTTPError as e:
+                if e.response.status_code in (404, 422):
+                    return {
+                        "success": False,
+                        "error": f"Could not resolve ref range {base}...{head}"
+                    }
+                raise
+            
+            cache_key = f"{self._token_key(access_token)}:{owner}/{repo}:{base_sha}...{head_sha}"
+            commits = self._compare_cache.get(cache_key)
+            if commits is None and limit:
+                commits = self._compare_cache.get(f"{cache_key}:{limit}")
+            
+            if commits is None:
+                commits = []
+                # Compare lists oldest first, so a limit needs the last pages
+                pages = self._fetch_pages(
+                    f"{self.api_base}/repos/{owner}/{repo}/compare/{base_sha}...{head_sha}",
+                    headers, {"per_page": 100}, max_items=limit or 100000,
+                    from_end=bool(limit)
+                )
+                for page in pages:
+                    for commit in page.get("commits", []):
+                        commits.append(self._format_commit(commit))
+                
+                # Compare lists oldest first; everything else is newest first
+                commits.reverse()
+                
+                if limit:
+                    commits = commits[:limit]
+                    self._compare_cache.set(f"{cache_key}:{limit}", commits)
+                else:
+                    self._compare_cache.set(cache_key, commits)
+            
+            # Copy so enrichment does not modify the cached commits
+            commits = [dict(commit) for commit in (commits[:limit] if limit else commits)]
+            
+            if include_files:
+                self.enrich_commits(access_token, owner, repo, commits)
+            
+            return {
+                "success": True,
+                "commits": commits,
+                "count": len(commits),
+                "base_sha": base_sha,
+                "head_sha": head_sha
+            }
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404:
+                return {
+                    "success": False,
+                    "error": "Repository not found or you don't have access"
+                }
+            return {
+                "success": False,
+                "error": f"GitHub API error: {str(e)}"
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    def enrich_commits(self, access_token: str, owner: str, repo: str,
+                       commits: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Add the changed file names to each commit
+        
+        File names are only available from the per-commit REST endpoint, so
+        details are fetched by a bounded pool of GITHUB_ENRICH_WORKERS
+        threads. Commits are immutable, so the result is cached by token and
+        SHA (so one user's private files are never served to another) and
+        never fetched twice. Commits that changed nothing are skipped, and
+        huge commits (more than GITHUB_ENRICH_MAX_LINES changed lines when
+        stats are known, or a response larger than GITHUB_ENRICH_MAX_BYTES)
+        are left without file names.
+        
+        Args:
+            access_token: GitHub access token
+            owner: Repository owner
+            repo: Repository name
+            commits: Commits with a "sha" key (modified in place)
+            
+        Returns:
+            Dict with the number of commits fetched, served from cache and skipped
+        """
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/vnd.github.v3+json"
+        }
+        counts = {"fetched": 0, "cached": 0, "skipped": 0}
+        token_key = self._token_key(access_token)
+        
+        to_fetch = []
+        for commit in commits:
+            files = self._commit_files_cache.get(f"{token_key}:{owner}/{repo}:{commit['sha']}")
+            if files is not None:
+                commit["files"] = files
+                counts["cached"] += 1
+            elif commit.get("files_changed") == 0:
+                # Merges and empty commits have nothing to list
+                commit["files"] = []
+                counts["skipped"] += 1
+            elif (commit.get("additions") or 0) + (commit.get("deletions") or 0) > self.enrich_max_lines:
+                commit["files"] = []
+                counts["skipped"] += 1
+            else:
+                to_fetch.append(commit)
+        
+        if not to_fetch:
+            return counts
+        
+        # Worker threads do not inherit the caller's priority, so pass it on
+        priority = self.rate_limiter.current_priority()
+        
+        def fetch_files(commit: Dict[str, Any]) -> Optional[List[Dict[str, str]]]:
+            return self._fetch_commit_files(headers, owner, repo, commit["sha"], priority)
+        
+        workers = max(1, min(self.enrich_workers, len(to_fetch)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for commit, files in zip(to_fetch, executor.map(fetch_files, to_fetch)):
+                if files is None:
+                    # Oversized: remembered as empty so it is not downloaded again
+                    files = []
+                    counts["skipped"] += 1
+                else:
+                    counts["fetched"] += 1
+                
+                commit["files"] = files
+                self._commit_files_cache.set(f"{token_key}:{owner}/{repo}:{commit['sha']}", files)
+        
+        return counts
+    
+    def _fetch_commit_files(self, headers: Dict[str, str], owner: str, repo: str,
+                            sha: str, priority: int) -> Optional[List[Dict[str, str]]]:
+        """
+        Fetch the changed files of one commit, giving up on oversized responses
+        
+        The body is streamed so a huge diff is abandoned once it passes
+        enrich_max_bytes instead of being downloaded completely.
+        
+        Args:
+            headers: Request headers
+            owner: Repository owner
+            repo: Repository name
+            sha: Full commit SHA
+            priority: Scheduler priority
+            
+        Returns:
+            List of {"filename", "status"} dicts, or None if the commit is too large
+        """
+        response = self._request(
+            "GET", f"{self.api_base}/repos/{owner}/{repo}/commits/{sha}",
+            headers, priority=priority, stream=True
+        )
+        try:
+            response.raise_for_status()
+            
+            if int(response.headers.get("Content-Length") or 0) > self.enrich_max_bytes:
+                return None
+            
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=65536):
+                body.extend(chunk)
+                if len(body) > self.enrich_max_bytes:
+                    return None
+        finally:
+            response.close()
+        
+        files = json.loads(bytes(body)).get("files", [])
+        return [
+            {"filename": f["filename"], "status": f.get("status", "modified")}
+            for f in files[:self.enrich_max_files]
+        ]
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss/304 counters of the GitHub response cache
+        
+        Returns:
+            Dict with cache statistics
+        """
+        return self.response_cache.stats()
+    
+    @staticmethod
+    def _token_key(access_token: str) -> str:
+        """Hash an access token for use in cache keys"""
+        return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+    
+    def _request(self, method: str, url: str, headers: Dict[str, str],
+                 priority: Optional[int] = None, resource: str = "core",
+                 **kwargs) -> "requests.Response":
+        """
+        Send a GitHub API request through the rate limit scheduler
+        
+        Calls are paced per token. Rate-limited responses (403/429 with
+        Retry-After or no remaining quota) are retried after the backoff
+        the scheduler computes.
+        
+        Args:
+            method: HTTP method
+            url: API URL
+            headers: Request headers (including Authorization)
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND
+                      (default: the current thread's priority)
+            resource: GitHub rate limit resource ("core" or "graphql")
+            **kwargs: Passed to requests.request
+            
+        Returns:
+            The last response received
+            
+        Raises:
+            RateLimitExceeded: If quota will not be available soon enough
+        """
+        if priority is None:
+            priority = self.rate_limiter.current_priority()
+        key = self.rate_limiter.make_key(headers.get("Authorization", ""), resource)
+        
+        response = None
+        for attempt in range(self.rate_limiter.max_retries + 1):
+            self.rate_limiter.acquire(key, priority)
+            response = None
+            try:
+                with GITHUB_IN_FLIGHT.track():
+                    response = requests.request(method, url, headers=headers, **kwargs)
+            finally:
+                retry_after = self.rate_limiter.release(key, priority, response, attempt)
+            if retry_after is None:
+                break
+        
+        # Still rate limited after all retries: the caller's
+        # raise_for_status() reports it
+        return response
+    
+    def _get(self, url: str, headers: Dict[str, str],
+             params: Optional[Dict[str, Any]] = None,
+             priority: Optional[int] = None) -> GitHubResponse:
+        """
+        GET a GitHub API URL using the conditional-request cache
+        
+        If we have a cached copy, its ETag / Last-Modified values are sent
+        as If-None-Match / If-Modified-Since. A 304 answer is served from the
+        cache; a fresh 200 answer replaces the cached copy.
+        
+        Args:
+            url: API URL
+            headers: Request headers (including Authorization)
+            params: Query parameters (optional)
+            priority: Scheduler priority (default: the current thread's priority)
+            
+        Returns:
+            GitHubResponse with the (possibly cached) body
+            
+        Raises:
+            requests.exceptions.HTTPError: For 4xx/5xx responses
+        """
+        key = self.response_cache.make_key(headers, url, params)
+        cached = self.response_cache.get(key)
+        
+        request_headers = dict(headers)
+        if cached:
+            if cached.get("etag"):
+                request_headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                request_headers["If-Modified-Since"] = cached["last_modified"]
+        
+        response = self._request("GET", url, request_headers, priority=priority, params=params)
+        
+        if response.status_code == 304 and cached:
+            self.response_cache.record_not_modified()
+            return GitHubResponse(200, cached["body"], cached.get("link"), from_cache=True)
+        
+        response.raise_for_status()
+        
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.response_cache.set(
+                key, etag, last_modified, response.headers.get("Link"), response.content
+            )
+        
+        return GitHubResponse(response.status_code, response.content, response.headers.get("Link"))
+    
+    def _format_commit(self, commit: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert a commit from the GitHub REST API into ShipNote's commit format
+        
+        Args:
+            commit: Commit object as returned by the /commits endpoint
+            
+        Returns:
+            Dict with hash, sha, message, author, date and url
+        """
+        commit_obj = commit.get("commit", {})
+        
+        # Try to get author name from multiple sources
+        author_name = "Unknown"
+        
+        # First try: GitHub user (authenticated author)
+        if commit.get("author") and commit["author"].get("login"):
+            author_name = commit["author"]["login"]
+        # Second try: Git commit author name
+        elif commit_obj.get("author") and commit_obj["author"].get("name"):
+            author_name = commit_obj["author"]["name"]
+        # Third try: Committer if author not available
+        elif commit_obj.get("committer") and commit_obj["committer"].get("name"):
+            author_name = commit_obj["committer"]["name"]
+        
+        return {
+            "hash": commit["sha"][:7],  # Short hash
+            "sha": commit["sha"],
+            "message": commit_obj.get("message", ""),
+            "author": author_name,
+            "date": commit_obj.get("author", {}).get("date", ""),
+            "url": commit.get("html_url", "")
+        }
+    
+    def _format_graphql_commit(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert a GraphQL commit node into ShipNote's commit format
+        
+        Args:
+            node: Commit node from COMMIT_HISTORY_QUERY
+            
+        Returns:
+            Dict with hash, sha, message, author, date, url and stats
+        """
+        author = node.get("author") or {}
+        user = author.get("user") or {}
+        
+        return {
+            "hash": node["oid"][:7],  # Short hash
+            "sha": node["oid"],
+            "message": node.get("message", ""),
+            "author": user.get("login") or author.get("name") or "Unknown",
+            "date": node.get("authoredDate", ""),
+            "url": node.get("url", ""),
+            # GraphQL sends null for stats it could not compute
+            "additions": node.get("additions") or 0,
+            "deletions": node.get("deletions") or 0,
+            "files_changed": node.get("changedFilesIfAvailable")
+        }
+    
+    def _fetch_pages(self, url: str, headers: Dict[str, str], params: Dict[str, Any],
+                     max_items: int, from_end: bool = False) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Fetch a paginated GitHub list endpoint, yielding one page at a time in order
+        
+        The first page is fetched on its own so the Link header tells us the
+        last page number. The remaining pages (only as many as needed to reach
+        max_items) are then downloaded concurrently, bounded by
+        max_page_workers. If GitHub only gives a "next" link, pages are
+        followed one by one instead.
+        
+        With from_end, the pages wanted are the last ones (for endpoints
+        that list oldest first): the first page is still yielded first,
+        followed by enough trailing pages to hold max_items.
+        
+        Args:
+            url: List endpoint URL
+            headers: Request headers
+            params: Query parameters (per_page should be set)
+            max_items: Stop once this many items have been fetched
+            from_end: Take max_items from the end of the list instead
+            
+        Yields:
+            The JSON list of each page, in page order
+        """
+        per_page = params.get("per_page") or 30
+        pages_wanted = max(1, -(-max_items // per_page))  # ceil division
+        
+        response = self._get(url, headers, params)
+        yield response.json()
+        
+        last_page = self._page_number(response.links.get("last", {}).get("url"))
+        
+        if last_page is None:
+            # No "last" link: follow "next" links serially
+            page = 1
+            next_url = response.links.get("next", {}).get("url")
+            # Without a page count the tail can only be reached by reading everything
+            while next_url and (from_end or page < pages_wanted):
+                response = self._get(next_url, headers)
+                yield response.json()
+                page += 1
+                next_url = response.links.get("next", {}).get("url")
+            return
+        
+        if from_end:
+            # One extra page, since the last page may be only partly filled
+            first_page = max(2, last_page - pages_wanted)
+        else:
+            first_page = 2
+            last_page = min(last_page, pages_wanted)
+        if last_page < first_page:
+            return
+        
+        # Worker threads do not inherit the caller's priority, so pass it on
+        priority = self.rate_limiter.current_priority()
+        
+        def fetch_page(page: int) -> List[Dict[str, Any]]:
+            return self._get(url, headers, {**params, "page": page}, priority=priority).json()
+        
+        workers = max(1, min(self.max_page_workers, last_page - first_page + 1))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # map() runs the downloads in parallel but returns them in page order
+            for page_data in executor.map(fetch_page, range(first_page, last_page + 1)):
+                yield page_data
+    
+    @staticmethod
+    def _page_number(link_url: Optional[str]) -> Optional[int]:
+        """
+        Extract the page number from a Link header URL
+        
+        Args:
+            link_url: URL from a Link header entry (may be None)
+            
+        Returns:
+            The page number, or None if it cannot be determined
+        """
+        if not link_url:
+            return None
+        page = parse_qs(urlparse(link_url).query).get("page")
+        try:
+            return int(page[0]) if page else None
+        except ValueError:
+            return None
+    
     def parse_github_url(self, url: str) -> Optional[Dict[str, str]]:
         """
         Parse GitHub repository URL to extract owner and repo name
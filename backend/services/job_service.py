@@ -0,0 +1,361 @@
+"""
+Job Service for ShipNote
+Runs long generation pipelines in a background worker pool. Jobs are kept
+in a local SQLite database so their status survives restarts; clients poll
+a job or follow its progress as Server-Sent Events.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+
+
+# Payload fields that are never written to disk
+SECRET_FIELDS = ("access_token",)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+# Finished jobs are swept at most this often (seconds) per process
+PRUNE_INTERVAL = 3600
+
+
+class JobService:
+    """
+    Background job queue backed by SQLite.
+
+    Job types are registered with a handler that takes the job payload and
+    a progress callback and returns a (result_dict, http_status) tuple, so
+    the pipelines used by the synchronous endpoints can be reused as is.
+
+    Every job records the boot ID of the server and the pid of the worker
+    process that owns it. Worker processes of the same server share a boot
+    ID, so resume() recovers jobs left behind by an earlier run and those of
+    a worker that died (e.g. one restarted by gunicorn), never those of a
+    live sibling worker.
+
+    Finished jobs are deleted once they are older than ttl seconds.
+    """
+
+    def __init__(self, db_path: str = "jobs.db", max_workers: int = 4,
+                 boot_id: Optional[str] = None, ttl: float = 7 * 86400):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.boot_id = boot_id or uuid.uuid4().hex
+        self.ttl = ttl
+        self._last_prune = 0.0
+        self._handlers = {}
+        self._secrets = {}
+        self._executor = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition()
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    http_status INTEGER,
+                    boot_id TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]
+            if "boot_id" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN boot_id TEXT")
+            if "worker_pid" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN worker_pid INTEGER")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at)")
+
+    def register(self, job_type: str, handler: Callable[..., Tuple[Dict[str, Any], int]]) -> None:
+        """
+        Register the handler for a job type
+
+        Args:
+            job_type: Name used in submit()
+            handler: handler(payload, progress) -> (result_dict, http_status)
+        """
+        self._handlers[job_type] = handler
+
+    def submit(self, job_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store a new job and queue it
+
+        Args:
+            job_type: A registered job type
+            payload: Pipeline input (secrets are kept in memory only)
+
+        Returns:
+            The job record
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        job_id = uuid.uuid4().hex
+        secrets = {k: payload[k] for k in SECRET_FIELDS if k in payload}
+        stored_payload = {k: v for k, v in payload.items() if k not in SECRET_FIELDS}
+        stored_payload["_secret_fields"] = sorted(secrets)
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, type, status, stage, payload, boot_id, worker_pid, "
+                "created_at, updated_at) VALUES (?, ?, 'queued', NULL, ?, ?, ?, ?, ?)",
+                (job_id, job_type, json.dumps(stored_payload), self.boot_id, os.getpid(), now, now)
+            )
+
+        with self._lock:
+            self._secrets[job_id] = secrets
+        self._workers().submit(self._run, job_id)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job record
+
+        Args:
+            job_id: Job ID from submit()
+
+        Returns:
+            Dict with id, type, status, stage, result and timestamps, or None
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, type, status, stage, result, http_status, created_at, updated_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return {
+            "id": row[0],
+            "type": row[1],
+            "status": row[2],
+            "stage": row[3],
+            "result": json.loads(row[4]) if row[4] else None,
+            "http_status": row[5],
+            "created_at": row[6],
+            "updated_at": row[7]
+        }
+
+    def events(self, job_id: str, keepalive: float = 15.0) -> Iterator[str]:
+        """
+        Stream a job's progress as Server-Sent Events
+
+        Emits a "progress" event whenever the status or stage changes and a
+        final "done" event with the result. The job is re-read from the
+        database, so this also follows jobs run by another worker process.
+
+        Args:
+            job_id: Job ID from submit()
+            keepalive: Seconds between keep-alive comments
+
+        Yields:
+            SSE-formatted strings
+        """
+        last_state = None
+        last_sent = time.time()
+
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'error': 'Job not found'})}\n\n"
+                return
+
+            state = (job["status"], job["stage"])
+            if state != last_state:
+                last_state = state
+                last_sent = time.time()
+                if job["status"] in TERMINAL_STATUSES:
+                    yield f"event: done\ndata: {json.dumps(job)}\n\n"
+                    return
+                progress = {"id": job_id, "status": job["status"], "stage": job["stage"]}
+                yield f"event: progress\ndata: {json.dumps(progress)}\n\n"
+            elif time.time() - last_sent >= keepalive:
+                last_sent = time.time()
+                yield ": keep-alive\n\n"
+
+            with self._changed:
+                self._changed.wait(timeout=1.0)
+
+    def resume(self) -> int:
+        """
+        Recover jobs that were queued or running when their worker stopped
+
+        A job is orphaned when it belongs to an earlier server start, or to
+        a worker process of this one that no longer exists. Jobs that need
+        a secret (e.g. a GitHub token) cannot be resumed, because secrets
+        are never stored; they are marked as failed. The others are taken
+        over by this process and queued again. Old finished jobs are
+        pruned first.
+
+        Returns:
+            Number of jobs re-queued
+        """
+        self.prune()
+
+        resumable = []
+        interrupted = []
+        pid = os.getpid()
+        with self._connect() as conn:
+            # Take the write lock first so only one worker claims each job
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, payload, boot_id, worker_pid FROM jobs "
+                "WHERE status IN ('queued', 'running')"
+            ).fetchall()
+            for job_id, payload, boot_id, worker_pid in rows:
+                if boot_id == self.boot_id and worker_pid is not None and _pid_alive(worker_pid):
+                    continue
+                if json.loads(payload).get("_secret_fields"):
+                    interrupted.append(job_id)
+                else:
+                    resumable.append(job_id)
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', stage = NULL, boot_id = ?, worker_pid = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    (self.boot_id, pid, time.time(), job_id)
+                )
+
+        for job_id in interrupted:
+            self._finish(job_id, {
+                "success": False,
+                "error": "Job was interrupted by a server restart. Please submit it again."
+            }, 503)
+        for job_id in resumable:
+            self._workers().submit(self._run, job_id)
+        return len(resumable)
+
+    def prune(self) -> int:
+        """
+        Delete finished jobs that have not changed for ttl seconds
+
+        Returns:
+            Number of jobs deleted
+        """
+        self._last_prune = time.time()
+        with self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (*TERMINAL_STATUSES, time.time() - self.ttl)
+            ).rowcount
+        if deleted:
+            print(f"Pruned {deleted} finished jobs older than {self.ttl / 3600:g}h")
+        return deleted
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker pool
+
+        Args:
+            wait: Wait for running jobs to finish (unfinished jobs are
+                  recovered by the next server start)
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job_id: str) -> None:
+        with self._connect() as conn:
+            # Claim the job; another worker may already have started it
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', stage = 'started', worker_pid = ?, "
+                "updated_at = ? WHERE id = ? AND status = 'queued'",
+                (os.getpid(), time.time(), job_id)
+            ).rowcount
+            row = conn.execute("SELECT type, payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not claimed or row is None:
+            return
+        with self._changed:
+            self._changed.notify_all()
+
+        job_type, payload = row[0], json.loads(row[1])
+        payload.pop("_secret_fields", None)
+        with self._lock:
+            payload.update(self._secrets.get(job_id, {}))
+
+        try:
+            result, http_status = self._handlers[job_type](
+                payload, lambda stage: self._update(job_id, stage=stage)
+            )
+        except Exception as e:
+            print(f"Error in job {job_id}: {str(e)}")
+            result, http_status = {"success": False, "error": str(e)}, 500
+
+        self._finish(job_id, result, http_status)
+
+        if time.time() - self._last_prune >= PRUNE_INTERVAL:
+            try:
+                self.prune()
+            except sqlite3.Error as e:
+                print(f"Pruning finished jobs failed: {str(e)}")
+
+    def _finish(self, job_id: str, result: Dict[str, Any], http_status: int) -> None:
+        status = "completed" if result.get("success") else "failed"
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = NULL, result = ?, http_status = ?, "
+                "updated_at = ? WHERE id = ?",
+                (status, json.dumps(result), http_status, time.time(), job_id)
+            )
+        with self._lock:
+            self._secrets.pop(job_id, None)
+        with self._changed:
+            self._changed.notify_all()
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ?",
+                (*fields.values(), time.time(), job_id)
+            )
+        with self._changed:
+            self._changed.notify_all()
+
+    def _workers(self) -> ThreadPoolExecutor:
+        # Created on first use so no threads exist before a server forks
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="job"
+                )
+            return self._executor
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per operation (commits on success)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+def _pid_alive(pid: int) -> bool:
+    """Whether a process with this pid exists on this machine"""
+    if os.name == "nt":
+        # os.kill() would terminate it; assume the owner is still running
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
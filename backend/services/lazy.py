@@ -0,0 +1,90 @@
+"""
+Lazy service and module proxies for ShipNote
+Defers building a service (or importing a heavy library) until it is first
+used, so importing the app is cheap and each service can be preloaded
+explicitly (e.g. before a production server forks its workers).
+"""
+
+import importlib
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+class LazyModule:
+    """
+    Module proxy that imports the real module on first attribute access.
+
+    Example:
+        anthropic = LazyModule("anthropic")
+        anthropic.Anthropic(...)  # "import anthropic" happens here
+    """
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def __getattr__(self, attr: str) -> Any:
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                if self.__dict__["_module"] is None:
+                    self.__dict__["_module"] = importlib.import_module(self.__dict__["_name"])
+                module = self.__dict__["_module"]
+        return getattr(module, attr)
+
+
+class LazyService:
+    """
+    Proxy that builds the wrapped service on first attribute access.
+
+    Example:
+        ai_service = LazyService(AIService, "ai")
+        ai_service.generate_release_notes(...)  # AIService() is built here
+    """
+
+    def __init__(self, factory: Callable[[], Any], name: str):
+        # Set through __dict__ so __getattr__ is never involved
+        self.__dict__["_factory"] = factory
+        self.__dict__["_name"] = name
+        self.__dict__["_instance"] = None
+        self.__dict__["_lock"] = threading.Lock()
+        self.__dict__["load_seconds"] = None
+
+    def load(self) -> Any:
+        """
+        Build the service now if it has not been built yet
+
+        Returns:
+            The service instance
+        """
+        instance = self.__dict__["_instance"]
+        if instance is not None:
+            return instance
+
+        with self.__dict__["_lock"]:
+            if self.__dict__["_instance"] is None:
+                start = time.perf_counter()
+                self.__dict__["_instance"] = self.__dict__["_factory"]()
+                self.__dict__["load_seconds"] = time.perf_counter() - start
+            return self.__dict__["_instance"]
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the service has been built"""
+        return self.__dict__["_instance"] is not None
+
+    @property
+    def name(self) -> str:
+        return self.__dict__["_name"]
+
+    def instance(self) -> Optional[Any]:
+        """The service instance if it has been built, else None"""
+        return self.__dict__["_instance"]
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.load(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self.load(), attr, value)
@@ -0,0 +1,250 @@
+"""
+Git Log Parser for ShipNote
+Turns pasted `git log` output into commit records in a single pass.
+
+Recognized formats (detected line by line, so they may even be mixed):
+- oneline:  "a83b1c9 fix(auth): resolve token bug" (with or without decorations)
+- medium / full / fuller: "commit <sha>" blocks with Author:/Date: headers
+  and an indented message
+- pipe:     the CLI's "%h|%cd|%an|%s" format
+followed by optional --name-status, --numstat or --stat file lines.
+File lines are only taken in a commit's file block (a run of file lines
+after its header or message, ended by a blank line), and a line starting
+with a hash-like word is read as a new oneline commit, not as numstat.
+Lines that match none of them become one commit each, as before.
+"""
+
+import io
+import itertools
+import re
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+
+
+COMMIT_HEADER_RE = re.compile(r"^commit ([0-9a-f]{7,40})\b")
+PIPE_RE = re.compile(r"^([0-9a-f]{7,40})\|([^|]*)\|([^|]*)\|(.*)$")
+ONELINE_RE = re.compile(r"^([0-9a-f]{7,40}) (?:\([^()]*\) )?(.*)$")
+# "1234567 10 bugs fixed" is a oneline commit, not a --numstat line
+HASH_WORD_RE = re.compile(r"^[0-9a-f]{7,40} ")
+
+# Tabs often turn into runs of spaces when output is copied from a terminal
+NAME_STATUS_RE = re.compile(r"^([AMDTUXB]|[RC]\d{0,3})(?:\t| {2,})(.+)$")
+NUMSTAT_RE = re.compile(r"^(\d+|-)\s+(\d+|-)\s+(.+)$")
+PATH_SEPARATOR_RE = re.compile(r"\t| {2,}")
+STAT_RE = re.compile(r"^ (\S.*?)\s+\|\s+(?:\d+|Bin)")
+
+AUTHOR_RE = re.compile(r"^Author:\s*(.*?)(?:\s*<[^>]*>)?\s*$")
+DATE_RE = re.compile(r"^(?:Author)?Date:\s*(.*)$")
+# Headers of the full / fuller formats that carry nothing we use
+OTHER_HEADER_RE = re.compile(r"^(?:Merge|Commit|CommitDate):")
+
+NAME_STATUS_CODES = frozenset("AMDTUXBRC")
+
+FILE_STATUSES = {
+    "A": "added",
+    "M": "modified",
+    "D": "removed",
+    "R": "renamed",
+    "C": "copied",
+    "T": "changed"
+}
+
+# Line kinds of the commit currently being built
+_MEDIUM_HEADERS, _MEDIUM_MESSAGE, _SINGLE_LINE = range(3)
+
+
+def detect_format(text: str) -> str:
+    """
+    Name the format of a git log from its first non-blank line
+
+    Args:
+        text: Raw git log text
+
+    Returns:
+        "medium", "pipe", "oneline" or "text"
+    """
+    for line in io.StringIO(text):
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        if COMMIT_HEADER_RE.match(line):
+            return "medium"
+        if PIPE_RE.match(line):
+            return "pipe"
+        if ONELINE_RE.match(line):
+            return "oneline"
+        return "text"
+    return "text"
+
+
+def parse_git_log(source: Union[str, Iterable[str]], limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Parse git log output into commits, yielding each one as soon as it is complete
+
+    Args:
+        source: The log text, or any iterable of lines (e.g. an open file)
+        limit: Stop after this many commits (optional)
+
+    Yields:
+        Commit dicts with hash, message, author and date, plus files
+        (filename/status), files_changed, and additions/deletions when
+        the log lists them
+
+    Example:
+        commits = list(parse_git_log(request_text))
+    """
+    if isinstance(source, str):
+        source = io.StringIO(source)
+
+    commits = _parse(source)
+    return itertools.islice(commits, limit) if limit else commits
+
+
+def _parse(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    current = None
+    state = None
+    message = []
+    # A blank line after file lines ends the current commit's file block
+    files_done = False
+
+    def finish():
+        if message:
+            current["message"] = "\n".join(message).strip()
+            message.clear()
+        return current
+
+    for index, line in enumerate(lines):
+        line = line.rstrip("\r\n")
+
+        if not line.strip():
+            if current is not None and "files" in current:
+                files_done = True
+            if state == _MEDIUM_MESSAGE:
+                # Keeps paragraph breaks of multi-line messages
+                message.append("")
+            elif state == _MEDIUM_HEADERS and current is not None:
+                state = _MEDIUM_MESSAGE
+            continue
+
+        match = COMMIT_HEADER_RE.match(line)
+        if match:
+            if current is not None:
+                yield finish()
+            current = _new_commit(match.group(1))
+            state = _MEDIUM_HEADERS
+            files_done = False
+            continue
+
+        if state == _MEDIUM_HEADERS:
+            match = AUTHOR_RE.match(line)
+            if match:
+                current["author"] = match.group(1) or "Unknown"
+                continue
+            match = DATE_RE.match(line)
+            if match:
+                current["date"] = match.group(1).strip()
+                continue
+            if OTHER_HEADER_RE.match(line):
+                continue
+            state = _MEDIUM_MESSAGE
+
+        if state == _MEDIUM_MESSAGE and line.startswith("    "):
+            message.append(line[4:])
+            continue
+
+        match = PIPE_RE.match(line)
+        if match:
+            if current is not None:
+                yield finish()
+            current = _new_commit(match.group(1))
+            current["date"] = match.group(2).strip()
+            current["author"] = match.group(3).strip() or "Unknown"
+            current["message"] = match.group(4).strip()
+            state = _SINGLE_LINE
+            files_done = False
+            continue
+
+        hash_first = HASH_WORD_RE.match(line) is not None
+        in_file_block = current is not None and not files_done
+        if in_file_block and not hash_first and _add_file_line(current, line):
+            continue
+
+        match = ONELINE_RE.match(line) if hash_first else None
+        if match:
+            if current is not None:
+                yield finish()
+            current = _new_commit(match.group(1))
+            current["message"] = match.group(2).strip()
+            state = _SINGLE_LINE
+            files_done = False
+            continue
+
+        if state == _MEDIUM_MESSAGE:
+            # Message pasted without its indentation
+            message.append(line.strip())
+            continue
+
+        # Unrecognized line: treat it as a commit message of its own
+        if current is not None:
+            yield finish()
+        current = _new_commit(f"commit-{index}")
+        current["message"] = line.strip()
+        state = _SINGLE_LINE
+        files_done = False
+
+    if current is not None:
+        yield finish()
+
+
+def _new_commit(hash_val: str) -> Dict[str, Any]:
+    return {
+        "hash": hash_val,
+        "message": "",
+        "author": "Unknown",
+        "date": ""
+    }
+
+
+def _add_file_line(commit: Dict[str, Any], line: str) -> bool:
+    """
+    Add a --name-status, --numstat or --stat line to a commit
+
+    Returns:
+        True if the line was a file line
+    """
+    # Dispatch on the first character so most lines skip the regexes
+    first = line[0]
+
+    if first in NAME_STATUS_CODES:
+        match = NAME_STATUS_RE.match(line)
+        if match:
+            path = match.group(2)
+            if first in "RC":
+                # Renames and copies list the old and the new path
+                path = PATH_SEPARATOR_RE.split(path)[-1]
+            _add_file(commit, path.strip(), FILE_STATUSES.get(first, "modified"))
+            return True
+
+    elif first.isdigit() or first == "-":
+        match = NUMSTAT_RE.match(line)
+        if match:
+            additions, deletions = match.group(1), match.group(2)
+            commit["additions"] = commit.get("additions", 0) + (int(additions) if additions != "-" else 0)
+            commit["deletions"] = commit.get("deletions", 0) + (int(deletions) if deletions != "-" else 0)
+            _add_file(commit, match.group(3).strip(), "modified")
+            return True
+
+    elif first == " ":
+        match = STAT_RE.match(line)
+        if match:
+            _add_file(commit, match.group(1), "modified")
+            return True
+        # --stat summary ("3 files changed, 10 insertions(+)")
+        return " changed" in line and "file" in line
+
+    return False
+
+
+def _add_file(commit: Dict[str, Any], filename: str, status: str) -> None:
+    files = commit.setdefault("files", [])
+    files.append({"filename": filename, "status": status})
+    commit["files_changed"] = len(files)
@@ -0,0 +1,316 @@
+"""
+Metrics for ShipNote
+In-process counters, gauges and histograms rendered in the Prometheus text
+exposition format by the /metrics endpoint.
+
+Each process keeps its own metrics; behind a pre-fork server every scrape
+is answered by one worker, so scrape the workers individually (or run one
+worker) when exact totals matter.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+
+# Seconds; spans quick cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# (labels, value) pairs of one metric family
+Samples = List[Tuple[Dict[str, str], float]]
+
+
+class _Metric:
+    """Base class: a named metric family with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels: str) -> float:
+        """Current value for a label set (0 if never recorded)"""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Samples:
+        """Current (labels, value) pairs"""
+        with self._lock:
+            items = list(self._values.items())
+        return [(dict(zip(self.labelnames, key)), value) for key, value in items]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Counter(_Metric):
+    """A value that only goes up (requests served, tokens used, ...)"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down (requests in flight, ...)"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """
+        Count the block as in progress while it runs
+
+        Example:
+            with LLM_IN_FLIGHT.track():
+                client.messages.create(...)
+        """
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies) in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (not cumulative), then sum and count
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """
+        Observe how long the block takes
+
+        Example:
+            with STAGE_SECONDS.time(stage="git_read"):
+                commits = repo.iter_commits(...)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def value(self, **labels: str) -> float:
+        """Number of observations for a label set"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, ([*s[0]], s[1], s[2])) for key, s in self._values.items())
+
+        lines = []
+        for key, (counts, total, count) in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds the metrics of this process and renders them for /metrics.
+
+    Collectors are callbacks run at scrape time for values that live
+    elsewhere (e.g. cache sizes); each returns a list of
+    (name, kind, help, samples) metric families.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], List[Tuple[str, str, str, Samples]]]) -> None:
+        """
+        Add a callback that reports extra metric families at scrape time
+
+        Args:
+            collector: collector() -> [(name, kind, help, [(labels, value), ...]), ...]
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Returns:
+            The exposition text (version 0.0.4)
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"Error in metrics collector: {str(e)}")
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}"
+                             for labels, value in samples)
+
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# Registry of this process and the metrics the services record
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "shipnote_http_requests_total", "HTTP requests served", ("endpoint", "method", "status")
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "shipnote_http_request_duration_seconds",
+    "Time to serve an HTTP request, including streamed bodies", ("endpoint",)
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "shipnote_http_requests_in_flight", "HTTP requests being served", ("endpoint",)
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "shipnote_stage_duration_seconds",
+    "Time spent per pipeline stage (admission_wait, git_clone, git_fetch, git_read, github_fetch, llm_call, llm_first_token, render, compress, decompress)", ("stage",)
+)
+LLM_REQUESTS = REGISTRY.counter(
+    "shipnote_llm_requests_total", "Calls to the Claude API", ("outcome",)
+)
+LLM_TOKENS = REGISTRY.counter(
+    "shipnote_llm_tokens_total", "Tokens used by Claude API calls", ("type",)
+)
+LLM_IN_FLIGHT = REGISTRY.gauge(
+    "shipnote_llm_calls_in_flight", "Claude API calls waiting for an answer"
+)
+GITHUB_IN_FLIGHT = REGISTRY.gauge(
+    "shipnote_github_requests_in_flight", "GitHub API calls waiting for an answer"
+)
+ADMISSION_WAITING = REGISTRY.gauge(
+    "shipnote_admission_waiting", "Requests waiting in the admission queue"
+)
+ADMISSION_REJECTED = REGISTRY.counter(
+    "shipnote_admission_rejected_total",
+    "Requests turned away by admission control (queue_full, timeout, evicted)", ("endpoint", "reason")
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "shipnote_cache_requests_total", "Cache lookups by cache and result (hit or miss)", ("cache", "result")
+)
+
+
+def _cache_hit_ratios() -> List[Tuple[str, str, str, Samples]]:
+    # Derived from CACHE_REQUESTS so dashboards get the ratio without PromQL
+    totals = {}
+    for labels, count in CACHE_REQUESTS.samples():
+        hits, lookups = totals.get(labels["cache"], (0.0, 0.0))
+        if labels["result"] == "hit":
+            hits += count
+        totals[labels["cache"]] = (hits, lookups + count)
+
+    samples = [
+        ({"cache": cache}, hits / lookups)
+        for cache, (hits, lookups) in sorted(totals.items()) if lookups
+    ]
+    return [("shipnote_cache_hit_ratio", "gauge", "Share of cache lookups that were hits", samples)]
+
+
+REGISTRY.register_collector(_cache_hit_ratios)
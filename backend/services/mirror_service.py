@@ -0,0 +1,407 @@
+"""
+Mirror Service for ShipNote
+Keeps a pool of bare mirror clones of remote repositories, keyed by URL, so
+generating notes for a clone URL costs an incremental `git fetch` instead
+of a full clone.
+
+- Each mirror has a lock file: syncing (clone / fetch / maintenance) takes
+  it exclusively, reading commits takes it shared. Readers only ask for
+  the exclusive lock when the mirror is missing or due for a fetch. The
+  locks are flock() locks, so they also coordinate the worker processes of
+  one server.
+- Fetches are skipped when the mirror was fetched less than fetch_ttl
+  seconds ago.
+- Maintenance (gc --auto, commit-graph with changed-path filters) runs at
+  most once per maintenance_interval per mirror.
+- When the pool grows past max_bytes, the least recently used mirrors that
+  nobody is reading are deleted. Each mirror records its size after a sync,
+  so this does not walk the whole pool.
+
+URLs come from unauthenticated requests, so only https:// URLs on allowed
+hosts are mirrored, and git runs without the server's SSH keys, credential
+helpers or system / global config.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterable, Iterator, List
+from urllib.parse import urlsplit
+
+from .lazy import LazyModule
+from .metrics import CACHE_REQUESTS, STAGE_SECONDS
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# GitPython is imported on first use
+git = LazyModule("git")
+
+
+# Never prompt for or look up credentials, and ignore the server's git
+# config: a private URL fails right away instead of being cloned with the
+# server's identity
+GIT_ENV = {
+    "GIT_TERMINAL_PROMPT": "0",
+    "GIT_ASKPASS": "echo",
+    "GIT_SSH_COMMAND": "ssh -o BatchMode=yes -o IdentitiesOnly=yes -i /dev/null",
+    "GIT_CONFIG_NOSYSTEM": "1",
+    "GIT_CONFIG_GLOBAL": os.devnull
+}
+
+# Passed to every git command: no credential helpers, https transport only
+GIT_CONFIG_ARGS = (
+    "-c", "credential.helper=",
+    "-c", "protocol.allow=never",
+    "-c", "protocol.https.allow=always"
+)
+
+DEFAULT_ALLOWED_HOSTS = ("github.com", "gitlab.com", "bitbucket.org", "codeberg.org")
+
+# Marker files inside a mirror (mtime = when it last happened)
+FETCHED_MARKER = "shipnote-fetched"
+MAINTAINED_MARKER = "shipnote-maintained"
+# Size of the mirror in bytes, written after every sync
+SIZE_MARKER = "shipnote-size"
+
+
+class MirrorError(Exception):
+    """Raised when a repository URL is not allowed or cannot be cloned / fetched"""
+
+
+class MirrorService:
+    """
+    Pool of bare mirror clones under root_dir.
+
+    Example:
+        with mirror_service.open("https://github.com/owner/repo") as repo_path:
+            commits = git_service.get_commits(repo_path, "v1.0", "HEAD")
+    """
+
+    def __init__(self, root_dir: str, max_bytes: int = 2 * 1024 * 1024 * 1024,
+                 fetch_ttl: float = 30.0, maintenance_interval: float = 24 * 3600,
+                 timeout: float = 300.0, allowed_hosts: Iterable[str] = DEFAULT_ALLOWED_HOSTS):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        self.fetch_ttl = fetch_ttl
+        self.maintenance_interval = maintenance_interval
+        self.timeout = timeout
+        self.allowed_hosts = {h.lower() for h in allowed_hosts}
+
+        # Used instead of flock() where fcntl is unavailable (Windows)
+        self._thread_locks = {}
+        self._thread_locks_lock = threading.Lock()
+
+        os.makedirs(self.root_dir, exist_ok=True)
+        self._remove_stale_clones()
+
+    def normalize_url(self, url: str) -> str:
+        """
+        Normalize a clone URL and check that it may be mirrored
+
+        Only https:// URLs on allowed hosts are accepted. Local paths,
+        file://, ssh:// (which would use the server's keys), git:// and
+        transport helpers are rejected.
+
+        Args:
+            url: Clone URL
+
+        Returns:
+            The normalized URL (lowercase host, no trailing slash or .git)
+
+        Raises:
+            MirrorError: If the URL is not https://, has credentials or its host is not allowed
+        """
+        url = (url or "").strip()
+        if "::" in url or re.search(r"\s", url):
+            # "transport::address" runs a git remote helper
+            raise MirrorError("Repository URL must be an https:// URL")
+
+        try:
+            parts = urlsplit(url)
+            port = parts.port
+        except ValueError:
+            raise MirrorError("Repository URL is malformed")
+        if parts.scheme != "https" or not parts.hostname:
+            raise MirrorError("Repository URL must be an https:// URL")
+        if parts.username or parts.password:
+            raise MirrorError("Credentials in repository URLs are not supported")
+
+        host = parts.hostname.lower()
+        if host not in self.allowed_hosts:
+            raise MirrorError(f"Repositories on {host} are not allowed")
+
+        path = parts.path.rstrip("/")
+        if path.endswith(".git"):
+            path = path[:-4]
+        if not path.strip("/"):
+            raise MirrorError("Repository URL has no repository path")
+
+        netloc = f"{host}:{port}" if port else host
+        return f"https://{netloc}{path}"
+
+    @contextmanager
+    def open(self, url: str) -> Iterator[str]:
+        """
+        Bring the mirror of a URL up to date and hold it for reading
+
+        Args:
+            url: Clone URL
+
+        Yields:
+            Path of the bare mirror, which is not evicted until the block exits
+
+        Raises:
+            MirrorError: If the URL is not allowed or the clone / fetch failed
+        """
+        url = self.normalize_url(url)
+        name = self._mirror_name(url)
+        path = os.path.join(self.root_dir, f"{name}.git")
+
+        # A fresh mirror (the common case) is read under the shared lock
+        # only, so readers of one repository do not queue behind each other
+        with self._locked(name, exclusive=False):
+            if self._is_fresh(path):
+                CACHE_REQUESTS.inc(cache="mirror", result="hit")
+                self._touch(self._lock_path(name))
+                yield path
+                return
+
+        # Otherwise sync under the exclusive lock. Another worker may have
+        # synced while we waited for it; _sync checks the fetch age again
+        with self._locked(name, exclusive=True) as lock:
+            synced = self._sync(url, path)
+            if synced:
+                self._record_size(path)
+            self._touch(self._lock_path(name))
+            lock.share()
+            yield path
+
+        if synced:
+            self._evict(keep=name)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the pool size
+
+        Returns:
+            Dict with mirrors, bytes and max_bytes
+        """
+        sizes = [self._recorded_size(path) for path in self._mirror_paths()]
+        return {"mirrors": len(sizes), "bytes": sum(sizes), "max_bytes": self.max_bytes}
+
+    def _is_fresh(self, path: str) -> bool:
+        """True if the mirror exists and was fetched less than fetch_ttl seconds ago"""
+        return os.path.isdir(path) and self._age(os.path.join(path, FETCHED_MARKER)) < self.fetch_ttl
+
+    def _sync(self, url: str, path: str) -> bool:
+        """
+        Clone or fetch the mirror (caller holds its exclusive lock)
+
+        Returns:
+            True if git was run
+        """
+        if not os.path.isdir(path):
+            CACHE_REQUESTS.inc(cache="mirror", result="miss")
+            with STAGE_SECONDS.time(stage="git_clone"):
+                self._clone(url, path)
+            return True
+
+        CACHE_REQUESTS.inc(cache="mirror", result="hit")
+        fetched = os.path.join(path, FETCHED_MARKER)
+        if self._age(fetched) < self.fetch_ttl:
+            return False
+
+        with STAGE_SECONDS.time(stage="git_fetch"):
+            self._git(path, "fetch", "--prune", "--quiet", "origin")
+        self._touch(fetched)
+
+        if self._age(os.path.join(path, MAINTAINED_MARKER)) >= self.maintenance_interval:
+            self._maintain(path)
+        return True
+
+    def _clone(self, url: str, path: str) -> None:
+        # Clone next to the final path and rename, so a failed or interrupted
+        # clone never looks like a usable mirror
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            self._git(self.root_dir, "clone", "--mirror", "--quiet", "--", url, tmp_path)
+            for key, value in (("core.commitGraph", "true"),
+                               ("fetch.writeCommitGraph", "true"),
+                               ("gc.writeCommitGraph", "true")):
+                self._git(tmp_path, "config", key, value)
+            self._git(tmp_path, "commit-graph", "write", "--reachable", "--changed-paths")
+            self._touch(os.path.join(tmp_path, FETCHED_MARKER))
+            self._touch(os.path.join(tmp_path, MAINTAINED_MARKER))
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.isdir(tmp_path):
+                shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def _maintain(self, path: str) -> None:
+        """Repack loose objects and rewrite the commit-graph so log walks stay fast"""
+        try:
+            with STAGE_SECONDS.time(stage="git_maintenance"):
+                self._git(path, "gc", "--auto", "--quiet")
+                self._git(path, "commit-graph", "write", "--reachable", "--changed-paths")
+            self._touch(os.path.join(path, MAINTAINED_MARKER))
+        except MirrorError as e:
+            # Reads still work without maintenance; try again next time
+            print(f"Error maintaining mirror {path}: {str(e)}")
+
+    def _evict(self, keep: str) -> None:
+        """Delete least recently used mirrors until the pool fits in max_bytes"""
+        mirrors = []
+        for path in self._mirror_paths():
+            name = os.path.basename(path)[:-len(".git")]
+            mirrors.append((self._age(self._lock_path(name)), name, path, self._recorded_size(path)))
+
+        total = sum(size for _, _, _, size in mirrors)
+        # Oldest (largest age) first
+        for _, name, path, size in sorted(mirrors, reverse=True):
+            if total <= self.max_bytes:
+                return
+            if name == keep:
+                continue
+            with self._locked(name, exclusive=True, blocking=False) as lock:
+                if lock is None:
+                    # Being read or synced right now
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                print(f"Evicted mirror {name} ({size // (1024 * 1024)} MB)")
+
+    @contextmanager
+    def _locked(self, name: str, exclusive: bool, blocking: bool = True):
+        """
+        Hold the lock of one mirror
+
+        Yields:
+            A lock handle (with share() to downgrade to a shared lock), or
+            None if blocking is False and the lock is taken
+        """
+        if fcntl is None:
+            with self._thread_locks_lock:
+                lock = self._thread_locks.setdefault(name, threading.Lock())
+            if not lock.acquire(blocking):
+                yield None
+                return
+            try:
+                yield _ThreadLockHandle()
+            finally:
+                lock.release()
+            return
+
+        with open(self._lock_path(name), "a+b") as f:
+            flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            try:
+                fcntl.flock(f.fileno(), flags if blocking else flags | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield None
+                return
+            try:
+                yield _FileLockHandle(f)
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _git(self, cwd: str, *args: str) -> str:
+        try:
+            return git.Git(cwd).execute(
+                ["git", *GIT_CONFIG_ARGS, *args], env=GIT_ENV, kill_after_timeout=self.timeout
+            )
+        except git.GitCommandError as e:
+            # GitPython formats stderr as "\n  stderr: '...'"
+            stderr = re.sub(r"^stderr: '(.*)'$", r"\1", (e.stderr or "").strip(), flags=re.S)
+            raise MirrorError(f"git {args[0]} failed: {stderr.strip() or e.status}")
+
+    def _mirror_paths(self) -> List[str]:
+        return [
+            os.path.join(self.root_dir, entry) for entry in os.listdir(self.root_dir)
+            if entry.endswith(".git") and os.path.isdir(os.path.join(self.root_dir, entry))
+        ]
+
+    def _remove_stale_clones(self) -> None:
+        # Leftovers of clones interrupted by a crash or kill, and lock files
+        # of URLs whose clone failed
+        for entry in os.listdir(self.root_dir):
+            path = os.path.join(self.root_dir, entry)
+            if ".git.tmp-" in entry and self._age(path) > self.timeout:
+                shutil.rmtree(path, ignore_errors=True)
+            elif (entry.endswith(".lock") and self._age(path) > self.timeout
+                  and not os.path.isdir(path[:-len(".lock")] + ".git")):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _lock_path(self, name: str) -> str:
+        return os.path.join(self.root_dir, f"{name}.lock")
+
+    @staticmethod
+    def _mirror_name(url: str) -> str:
+        # Readable and unique: last path segment plus a hash of the URL
+        slug = re.sub(r"[^\w.-]", "_", url.rsplit("/", 1)[-1])[:40]
+        return f"{slug}-{hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]}"
+
+    def _record_size(self, path: str) -> int:
+        size = self._size(path)
+        with open(os.path.join(path, SIZE_MARKER), "w") as f:
+            f.write(str(size))
+        return size
+
+    def _recorded_size(self, path: str) -> int:
+        try:
+            with open(os.path.join(path, SIZE_MARKER)) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            pass
+        # Mirrors synced before the size marker existed
+        try:
+            return self._record_size(path)
+        except OSError:
+            return self._size(path)
+
+    @staticmethod
+    def _size(path: str) -> int:
+        total = 0
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                except OSError:
+                    pass
+        return total
+
+    @staticmethod
+    def _age(path: str) -> float:
+        try:
+            return time.time() - os.path.getmtime(path)
+        except OSError:
+            return float("inf")
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        with open(path, "a"):
+            pass
+        os.utime(path, None)
+
+
+class _FileLockHandle:
+    def __init__(self, f):
+        self._f = f
+
+    def share(self) -> None:
+        """Let other readers in while this one reads"""
+        fcntl.flock(self._f.fileno(), fcntl.LOCK_SH)
+
+
+class _ThreadLockHandle:
+    def share(self) -> None:
+        # A plain lock cannot be shared; readers stay serialized
+        pass
@@ -0,0 +1,417 @@
+"""
+Pipeline Service for ShipNote
+The fetch + generate workflows behind the generation endpoints, shared by
+the synchronous endpoints, the background job queue and bulk generation.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Callable, Iterator, Optional, Tuple
+
+from .changelog_store import github_repo_id, local_repo_id, remote_repo_id
+from .metrics import STAGE_SECONDS
+from .mirror_service import MirrorError
+
+
+class PipelineService:
+    """
+    Runs the changelog generation pipelines.
+
+    Each pipeline takes the endpoint's JSON input and an optional progress
+    callback (called with the name of the stage being entered) and returns
+    a (response_dict, http_status) tuple.
+
+    Bulk generation runs many pipelines at once: commits are fetched in
+    parallel, while the AI calls of all bulk requests together are limited
+    to bulk_ai_concurrency at a time.
+
+    With a changelog store, ranges are resolved to commit SHAs first and
+    notes already stored for them are served without fetching commits or
+    calling the AI.
+    """
+
+    def __init__(self, git_service, ai_service, github_service, changelog_store=None,
+                 mirror_service=None):
+        self.git_service = git_service
+        self.ai_service = ai_service
+        self.github_service = github_service
+        self.changelog_store = changelog_store
+        self.mirror_service = mirror_service
+
+        self.bulk_max_targets = int(os.getenv("BULK_MAX_TARGETS", "100"))
+        self.bulk_fetch_workers = int(os.getenv("BULK_FETCH_WORKERS", "8"))
+        # Shared by every bulk request of this process
+        self._bulk_ai_slots = threading.BoundedSemaphore(int(os.getenv("BULK_AI_CONCURRENCY", "4")))
+
+    def generate_from_repo(self, data: Dict[str, Any],
+                           progress: Optional[Callable[[str], None]] = None) -> Tuple[Dict[str, Any], int]:
+        """
+        Read commits from a local repository (or a mirror of a clone URL)
+        and generate release notes
+
+        Args:
+            data: {"repo_path" or "repo_url", "from", "to", "limit"}
+            progress: Called with "fetching_commits" and "generating_notes"
+
+        Returns:
+            (response dict, HTTP status)
+        """
+        progress = progress or (lambda stage: None)
+        fetched, error = self._fetch_repo(data, progress)
+        if error:
+            return error
+
+        progress("generating_notes")
+        return self._generate(*fetched), 200
+
+    def generate_from_github_url(self, data: Dict[str, Any],
+                                 progress: Optional[Callable[[str], None]] = None) -> Tuple[Dict[str, Any], int]:
+        """
+        Parse a GitHub URL, fetch its commits and generate release notes
+
+        Args:
+            data: {"access_token", "repo_url", "since", "until", "base", "head",
+                   "limit", "include_files"}
+            progress: Called with "fetching_commits" and "generating_notes"
+
+        Returns:
+            (response dict, HTTP status)
+        """
+        progress = progress or (lambda stage: None)
+        fetched, error = self._fetch_github(data, progress)
+        if error:
+            return error
+
+        progress("generating_notes")
+        return self._generate(*fetched), 200
+
+    def lookup_release(self, data: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        """
+        Find stored release notes by ref range, e.g. two tags, without generating
+
+        The refs are resolved again (cached for GitHub) and the notes are
+        only returned if they still point at the stored commits. Once a ref
+        has moved, the next generation for the range replaces the entry.
+        For GitHub, the caller's token must be able to read the repository.
+
+        Args:
+            data: {"repo_path"} or {"repo_url", "access_token"}, plus "from" and "to"
+
+        Returns:
+            (response dict, HTTP status)
+        """
+        if self.changelog_store is None:
+            return {"success": False, "error": "The changelog store is disabled"}, 404
+
+        from_ref = data.get('from') or data.get('base')
+        to_ref = data.get('to') or data.get('head') or 'HEAD'
+
+        if data.get('repo_url'):
+            access_token = data.get('access_token')
+            if not access_token:
+                return {"success": False, "error": "Access token is required"}, 400
+            parsed = self.github_service.parse_github_url(data['repo_url'])
+            if not parsed:
+                return {"success": False, "error": "Invalid GitHub URL format"}, 400
+            owner, repo = parsed['owner'], parsed['repo']
+            repo_id = github_repo_id(f"{owner}/{repo}")
+            resolve = lambda ref: self.github_service.resolve_ref(access_token, owner, repo, ref)
+            check_access = lambda: self.github_service.check_repo_access(access_token, owner, repo)
+        elif data.get('repo_path'):
+            repo_id = local_repo_id(data['repo_path'])
+            resolve = lambda ref: self.git_service.resolve_ref(data['repo_path'], ref)
+            check_access = None
+        else:
+            return {"success": False, "error": "Repository URL or path is required"}, 400
+
+        # Full SHAs resolve without asking GitHub, so access is checked on its own
+        if check_access is not None:
+            access = check_access()
+            if not access["success"]:
+                return {"success": False, "error": access["error"]}, access["status"]
+
+        entry = self.changelog_store.find(repo_id, from_ref, to_ref)
+        if entry is None:
+            return {"success": False, "error": "No stored notes for this range"}, 404
+
+        try:
+            current = (resolve(from_ref) if from_ref else "", resolve(to_ref))
+        except Exception as e:
+            return {"success": False, "error": f"Could not resolve {from_ref or ''}..{to_ref}: {str(e)}"}, 404
+
+        if current != (entry["base_sha"], entry["head_sha"]):
+            return {"success": False, "error": "No stored notes for this range"}, 404
+
+        return {
+            "success": True,
+            "commits": entry["commits"],
+            "notes": entry["notes"],
+            "commit_count": len(entry["commits"]),
+            "base_sha": entry["base_sha"],
+            "head_sha": entry["head_sha"],
+            "generated_at": entry["created_at"]
+        }, 200
+
+    def generate_bulk(self, targets: List[Dict[str, Any]],
+                      access_token: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Generate release notes for many targets, yielding each result as it completes
+
+        A target is the input of generate_from_repo (has "repo_path") or of
+        generate_from_github_url (has "repo_url"). Results come in completion
+        order; each carries the target's index in the request.
+
+        Args:
+            targets: List of target dicts
+            access_token: GitHub token for "repo_url" targets that have none
+
+        Yields:
+            One dict per target: {"index", "status", ...pipeline response},
+            then a summary {"done", "total", "succeeded", "failed", "seconds"}
+        """
+        start = time.perf_counter()
+        succeeded = 0
+        workers = max(1, min(self.bulk_fetch_workers, len(targets)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk")
+        try:
+            futures = {
+                executor.submit(self._run_bulk_target, target, access_token): index
+                for index, target in enumerate(targets)
+            }
+            for future in as_completed(futures):
+                try:
+                    result, status = future.result()
+                except Exception as e:
+                    print(f"Error in bulk target {futures[future]}: {str(e)}")
+                    result, status = {"success": False, "error": str(e)}, 500
+                if result.get("success"):
+                    succeeded += 1
+                yield {"index": futures[future], "status": status, **result}
+        finally:
+            # The client may have gone away: drop the targets not started yet
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        yield {
+            "done": True,
+            "total": len(targets),
+            "succeeded": succeeded,
+            "failed": len(targets) - succeeded,
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+
+    def _run_bulk_target(self, target: Dict[str, Any],
+                         access_token: Optional[str]) -> Tuple[Dict[str, Any], int]:
+        if not isinstance(target, dict):
+            return {"success": False, "error": "Target must be an object"}, 400
+
+        if target.get("repo_url") and (target.get("access_token") or access_token):
+            if access_token and not target.get("access_token"):
+                target = {**target, "access_token": access_token}
+            fetched, error = self._fetch_github(target)
+        elif target.get("repo_path") or target.get("repo_url"):
+            # Without a token, clone URLs are read from the mirror pool
+            fetched, error = self._fetch_repo(target)
+        else:
+            return {"success": False, "error": "Target needs a repo_path or a repo_url"}, 400
+
+        if error:
+            return error
+
+        commits, from_ref, to_ref, stored = fetched
+        if (stored.get("notes") is not None
+                or self.ai_service.get_cached_release_notes(commits, from_ref, to_ref) is not None):
+            # Served from the store or the notes cache, no need to wait for an AI slot
+            return self._generate(*fetched), 200
+
+        with self._bulk_ai_slots:
+            return self._generate(*fetched), 200
+
+    def _fetch_repo(self, data: Dict[str, Any], progress: Callable[[str], None] = lambda stage: None):
+        """
+        Read the commits of a local repository, or of the mirror of a clone URL
+
+        Returns:
+            ((commits, from_ref, to_ref, stored), None), or (None, (error dict, HTTP status));
+            see _lookup_stored() for stored
+        """
+        repo_path = data.get('repo_path')
+        repo_url = data.get('repo_url')
+
+        if not repo_path and not repo_url:
+            return None, ({"success": False, "error": "Repository path or URL is required"}, 400)
+
+        progress("fetching_commits")
+        if repo_path:
+            return self._read_repo(repo_path, local_repo_id(repo_path), data)
+
+        if self.mirror_service is None:
+            return None, ({"success": False, "error": "Cloning repositories is disabled"}, 400)
+
+        try:
+            repo_id = remote_repo_id(self.mirror_service.normalize_url(repo_url))
+            with self.mirror_service.open(repo_url) as mirror_path:
+                return self._read_repo(mirror_path, repo_id, data)
+        except MirrorError as e:
+            return None, ({"success": False, "error": str(e)}, 400)
+
+    def _read_repo(self, repo_path: str, repo_id: str, data: Dict[str, Any]):
+        """
+        Read the commits of a repository on disk (see _fetch_repo)
+        """
+        from_ref = data.get('from', None)
+        to_ref = data.get('to', 'HEAD')
+        limit = data.get('limit', 50)
+
+        stored = self._lookup_stored(
+            repo_id, from_ref, to_ref, f"limit={limit}",
+            lambda ref: self.git_service.resolve_ref(repo_path, ref)
+        )
+        if stored.get("notes") is not None:
+            return (stored["commits"], from_ref, to_ref, stored), None
+
+        commits = self.git_service.get_commits(repo_path, from_ref, to_ref, limit=limit)
+
+        if not commits:
+            return None, ({"success": False, "error": "No commits found in the specified range"}, 400)
+
+        return (commits, from_ref, to_ref, stored), None
+
+    def _fetch_github(self, data: Dict[str, Any], progress: Callable[[str], None] = lambda stage: None):
+        """
+        Parse a GitHub URL and fetch its commits
+
+        Returns:
+            ((commits, from_ref, to_ref, stored), None), or (None, (error dict, HTTP status));
+            see _lookup_stored() for stored
+        """
+        access_token = data.get('access_token')
+        repo_url = data.get('repo_url')
+        since = data.get('since')
+        until = data.get('until')
+        base = data.get('base')
+        head = data.get('head') or 'HEAD'
+        limit = data.get('limit', 100)
+        include_files = data.get('include_files', False)
+
+        if not access_token:
+            return None, ({"success": False, "error": "Access token is required"}, 400)
+
+        if not repo_url:
+            return None, ({"success": False, "error": "Repository URL is required"}, 400)
+
+        # Step 1: Parse the GitHub URL
+        parsed = self.github_service.parse_github_url(repo_url)
+        if not parsed:
+            return None, ({"success": False, "error": "Invalid GitHub URL format"}, 400)
+
+        owner = parsed['owner']
+        repo = parsed['repo']
+
+        # Step 2: Fetch commits from GitHub
+        # A base/head range uses the compare endpoint (exactly the commits in
+        # the range). GraphQL returns stats for the whole page in one request,
+        # so file names only cost extra requests for commits that changed files
+        progress("fetching_commits")
+        stored = {}
+        if base:
+            # Only base/head ranges are stored; since/until windows are not
+            # a fixed set of commits
+            stored = self._lookup_stored(
+                github_repo_id(f"{owner}/{repo}"), base, head,
+                f"limit={limit or ''},files={int(bool(include_files))}",
+                lambda ref: self.github_service.resolve_ref(access_token, owner, repo, ref)
+            )
+            if stored.get("notes") is not None:
+                # Stored commits come from our database, and full SHAs resolve
+                # without a request: check the caller may read the repository
+                access = self.github_service.check_repo_access(access_token, owner, repo)
+                if not access["success"]:
+                    return None, ({"success": False, "error": access["error"]}, access["status"])
+                return (stored["commits"], base, head, stored), None
+
+        with STAGE_SECONDS.time(stage="github_fetch"):
+            if base:
+                commits_result = self.github_service.fetch_compare_commits(
+                    access_token, owner, repo, base, head, limit, include_files=include_files
+                )
+            elif include_files:
+                commits_result = self.github_service.fetch_repo_commits_graphql(
+                    access_token, owner, repo, since, until, limit, include_files=True
+                )
+            else:
+                commits_result = self.github_service.fetch_repo_commits(
+                    access_token, owner, repo, since, until, limit
+                )
+
+        if not commits_result.get('success'):
+            return None, (commits_result, 400)
+
+        commits = commits_result.get('commits', [])
+
+        if not commits:
+            return None, ({"success": False, "error": "No commits found in the specified range"}, 400)
+
+        if base:
+            return (commits, base, head, stored), None
+        return (commits, since, until or 'HEAD', stored), None
+
+    def _lookup_stored(self, repo_id: str, from_ref: Optional[str], to_ref: str, variant: str,
+                       resolve: Callable[[str], str]) -> Dict[str, Any]:
+        """
+        Resolve a range to commit SHAs and look up notes stored for it
+
+        Args:
+            repo_id: Repository identity for the store
+            from_ref: Starting ref (None for "up to to_ref")
+            to_ref: Ending ref
+            variant: Request options that change which commits are included
+            resolve: Resolves a ref to a full commit SHA
+
+        Returns:
+            {} without a store or when the refs cannot be resolved (the
+            fetch reports the error), otherwise {"key": range key} plus the
+            stored "notes" and "commits" when the range was found
+        """
+        if self.changelog_store is None:
+            return {}
+
+        try:
+            key = (repo_id, resolve(from_ref) if from_ref else "", resolve(to_ref), variant)
+            entry = self.changelog_store.get(key)
+        except Exception as e:
+            print(f"Changelog store lookup failed for {from_ref or ''}..{to_ref}: {str(e)}")
+            return {}
+
+        if entry is None:
+            return {"key": key}
+        return {"key": key, "notes": entry["notes"], "commits": entry["commits"]}
+
+    def _generate(self, commits: List[Dict[str, Any]], from_ref: Optional[str],
+                  to_ref: str, stored: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Generate release notes for fetched commits and build the response
+
+        Notes found in the changelog store are returned as they are; newly
+        generated notes for a resolved range are added to it.
+        """
+        stored = stored or {}
+        release_notes = stored.get("notes")
+        if release_notes is None:
+            release_notes = self.ai_service.generate_release_notes(commits, from_ref, to_ref)
+            if release_notes and stored.get("key"):
+                try:
+                    self.changelog_store.put(stored["key"], from_ref, to_ref, release_notes, commits)
+                except Exception as e:
+                    print(f"Error storing release notes: {str(e)}")
+
+        result = {
+            "success": True,
+            "commits": commits,
+            "notes": release_notes,
+            "commit_count": len(commits)
+        }
+        if stored.get("key"):
+            result["stored"] = "notes" in stored
+        return result
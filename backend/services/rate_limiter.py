@@ -0,0 +1,248 @@
+"""
+Rate Limit Scheduler for ShipNote
+Paces outbound GitHub API calls per access token using the
+X-RateLimit-Remaining / X-RateLimit-Reset headers, backs off on secondary
+rate limits (Retry-After) and lets interactive requests go before
+background work.
+"""
+
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+
+# Request priorities (lower value = more important)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a request would have to wait longer than allowed for quota
+    """
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(
+            f"GitHub rate limit exceeded. Try again in {int(retry_after) + 1} seconds."
+        )
+
+
+class _TokenState:
+    """Quota bookkeeping for one token and one rate limit resource"""
+
+    def __init__(self):
+        self.remaining = None      # Unknown until the first response
+        self.reset = 0.0           # Epoch seconds when the window resets
+        self.blocked_until = 0.0   # Secondary limit / Retry-After backoff
+        self.last_request = 0.0
+        self.interactive_waiting = 0
+        self.interactive_active = 0
+
+
+class RateLimitScheduler:
+    """
+    Per-token scheduler for GitHub API calls.
+
+    Every call is wrapped in acquire() / release(). acquire() blocks until
+    the call may go out:
+    - while a Retry-After / secondary limit backoff is active
+    - when quota is exhausted, until the window resets
+    - when quota is low, calls are spread evenly over the rest of the window
+    - background calls wait for in-flight interactive calls and leave
+      background_reserve requests of quota for interactive use
+    If the wait would be longer than the priority's maximum wait,
+    RateLimitExceeded is raised instead so the user gets a fast error.
+    """
+
+    def __init__(self, background_reserve: int = 500, pace_below: int = 200,
+                 max_wait: Optional[Dict[int, float]] = None, max_retries: int = 3):
+        self.background_reserve = background_reserve
+        self.pace_below = pace_below
+        self.max_wait = max_wait or {PRIORITY_INTERACTIVE: 60.0, PRIORITY_BACKGROUND: 900.0}
+        self.max_retries = max_retries
+        self._states = {}
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    @staticmethod
+    def make_key(authorization: str, resource: str = "core") -> str:
+        """
+        Build the state key for a token and a rate limit resource
+
+        Args:
+            authorization: Authorization header value
+            resource: GitHub rate limit resource ("core", "graphql", ...)
+
+        Returns:
+            Hashed key, so raw tokens are not kept around
+        """
+        return hashlib.sha256(f"{resource}\n{authorization}".encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def priority(self, level: int):
+        """
+        Run the calls made by the current thread with the given priority
+
+        Example:
+            with scheduler.priority(PRIORITY_BACKGROUND):
+                github_service.get_user_repositories(token)
+        """
+        previous = self.current_priority()
+        self._local.priority = level
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def current_priority(self) -> int:
+        """Priority of calls made by the current thread"""
+        return getattr(self._local, "priority", PRIORITY_INTERACTIVE)
+
+    def acquire(self, key: str, priority: int) -> None:
+        """
+        Wait until a call may be sent
+
+        Args:
+            key: Key from make_key()
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND
+
+        Raises:
+            RateLimitExceeded: If the required wait exceeds the maximum wait
+        """
+        deadline = time.time() + self.max_wait.get(priority, 60.0)
+
+        with self._cond:
+            state = self._states.setdefault(key, _TokenState())
+            if priority == PRIORITY_INTERACTIVE:
+                state.interactive_waiting += 1
+            try:
+                while True:
+                    delay = self._delay(state, priority)
+                    if delay <= 0:
+                        break
+                    if time.time() + delay > deadline:
+                        raise RateLimitExceeded(delay)
+                    # Woken up early by release() when quota information changes
+                    self._cond.wait(timeout=delay)
+            finally:
+                if priority == PRIORITY_INTERACTIVE:
+                    state.interactive_waiting -= 1
+
+            if priority == PRIORITY_INTERACTIVE:
+                state.interactive_active += 1
+            state.last_request = time.time()
+            if state.remaining is not None:
+                # Reserve quota for this call until the response tells us more
+                state.remaining -= 1
+
+    def release(self, key: str, priority: int, response: Any, attempt: int = 0) -> Optional[float]:
+        """
+        Record the outcome of a call
+
+        Args:
+            key: Key from make_key()
+            priority: Priority passed to acquire()
+            response: requests.Response, or None if the call failed
+            attempt: Number of earlier attempts for this call (for backoff)
+
+        Returns:
+            Seconds to wait before retrying if the call hit a rate limit, else None
+        """
+        with self._cond:
+            state = self._states.setdefault(key, _TokenState())
+            if priority == PRIORITY_INTERACTIVE:
+                state.interactive_active -= 1
+
+            retry_after = None
+            if response is not None:
+                retry_after = self._update(state, response, attempt)
+
+            self._cond.notify_all()
+            return retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get a summary of the tracked tokens
+
+        Returns:
+            Dict with the number of tokens tracked, blocked and low on quota
+        """
+        now = time.time()
+        with self._cond:
+            states = list(self._states.values())
+        return {
+            "tokens": len(states),
+            "blocked": sum(1 for s in states if s.blocked_until > now),
+            "low_quota": sum(
+                1 for s in states if s.remaining is not None and s.remaining < self.pace_below
+            )
+        }
+
+    def _delay(self, state: _TokenState, priority: int) -> float:
+        # Caller must hold self._cond
+        now = time.time()
+
+        if state.blocked_until > now:
+            return state.blocked_until - now
+
+        if priority != PRIORITY_INTERACTIVE and (state.interactive_waiting or state.interactive_active):
+            # Re-checked as soon as an interactive call is released
+            return 1.0
+
+        if state.remaining is None:
+            return 0
+
+        reserve = self.background_reserve if priority != PRIORITY_INTERACTIVE else 0
+        if state.remaining <= reserve:
+            if state.reset > now:
+                return state.reset - now
+            # The window has rolled over; the next response tells us the new quota
+            state.remaining = None
+            return 0
+
+        if state.remaining < self.pace_below and state.reset > now:
+            # Spread the remaining quota evenly over the rest of the window
+            interval = (state.reset - now) / max(state.remaining, 1)
+            wait = state.last_request + interval - now
+            if wait > 0:
+                return wait
+
+        return 0
+
+    def _update(self, state: _TokenState, response: Any, attempt: int) -> Optional[float]:
+        # Caller must hold self._cond
+        now = time.time()
+        headers = response.headers
+
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        try:
+            if remaining is not None:
+                state.remaining = int(remaining)
+            if reset is not None:
+                state.reset = float(reset)
+        except ValueError:
+            pass
+
+        if response.status_code not in (403, 429):
+            return None
+
+        retry_after = None
+        if headers.get("Retry-After"):
+            try:
+                retry_after = float(headers["Retry-After"])
+            except ValueError:
+                retry_after = 60.0
+        elif remaining == "0":
+            # Primary limit: wait for the window to reset
+            retry_after = max(state.reset - now, 1.0)
+        elif response.status_code == 429 or "secondary rate limit" in response.text.lower():
+            # Secondary limit without Retry-After: back off exponentially from one minute
+            retry_after = min(60.0 * (2 ** attempt), 900.0)
+
+        if retry_after is not None:
+            state.blocked_until = max(state.blocked_until, now + retry_after)
+        return retry_after
@@ -0,0 +1,253 @@
+"""
+Response Cache for ShipNote
+Stores GitHub API responses together with their ETag / Last-Modified
+validators so repeated polls can be revalidated with conditional requests.
+A 304 Not Modified answer does not count against the GitHub rate limit.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from .cache import Cache
+from .metrics import CACHE_REQUESTS
+
+
+# The disk layer is pruned once every this many writes
+DISK_PRUNE_EVERY = 200
+
+
+class ResponseCache:
+    """
+    Layered cache for GitHub API responses.
+
+    The memory layer is an LRU bounded by the total size of the cached
+    bodies. The optional disk layer keeps entries across restarts and is
+    enabled by passing a directory; it is bounded by disk_max_bytes, pruning
+    the least recently used files (by mtime, which reads refresh). The optional shared layer (a Cache on
+    the SQLite or Redis backend) lets every worker revalidate against
+    validators that any other worker stored. Keys are hashed, so access
+    tokens are never written to disk or sent to the shared cache.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, disk_dir: Optional[str] = None,
+                 shared: Optional[Cache] = None, disk_max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._size = 0
+        self._disk_writes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(headers: Dict[str, str], url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build a cache key for a request
+
+        The Authorization and Accept headers are part of the key so every
+        token gets its own entries.
+
+        Args:
+            headers: Request headers
+            url: Request URL
+            params: Query parameters (optional)
+
+        Returns:
+            Hex digest identifying the request
+        """
+        parts = [
+            headers.get("Authorization", ""),
+            headers.get("Accept", ""),
+            url,
+            json.dumps(params or {}, sort_keys=True, default=str)
+        ]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response, falling back to the disk and shared layers
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Dict with etag, last_modified, link and body, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                CACHE_REQUESTS.inc(cache="github_response", result="hit")
+                return entry
+
+        entry = self._read_disk(key)
+        if entry is None:
+            entry = self._read_shared(key)
+        with self._lock:
+            if entry is None:
+                self._stats["misses"] += 1
+                CACHE_REQUESTS.inc(cache="github_response", result="miss")
+                return None
+            self._stats["hits"] += 1
+            self._store_memory(key, entry)
+        CACHE_REQUESTS.inc(cache="github_response", result="hit")
+        return entry
+
+    def set(self, key: str, etag: Optional[str], last_modified: Optional[str],
+            link: Optional[str], body: bytes) -> None:
+        """
+        Store a response that carried an ETag or Last-Modified validator
+
+        Args:
+            key: Key from make_key()
+            etag: ETag response header
+            last_modified: Last-Modified response header
+            link: Link response header (needed for pagination)
+            body: Raw response body
+        """
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "link": link,
+            "body": body
+        }
+        with self._lock:
+            self._store_memory(key, entry)
+        self._write_disk(key, entry)
+        if self.shared is not None:
+            self.shared.set(key, self._serialize(entry))
+
+    def record_not_modified(self) -> None:
+        """Count a 304 response that was answered from the cache"""
+        with self._lock:
+            self._stats["not_modified"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters
+
+        Returns:
+            Dict with hits, misses, not_modified, entries and bytes
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "disk": bool(self.disk_dir),
+                "shared": self.shared is not None
+            }
+
+    def _store_memory(self, key: str, entry: Dict[str, Any]) -> None:
+        # Caller must hold self._lock
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old["body"])
+
+        if len(entry["body"]) > self.max_bytes:
+            return
+
+        self._entries[key] = entry
+        self._size += len(entry["body"])
+
+        # Evict least recently used entries until we fit again
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted["body"])
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.cache")
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline().decode("utf-8"))
+                header["body"] = f.read()
+            # Mark as recently used so pruning keeps it
+            os.utime(path, None)
+            return header
+        except (OSError, ValueError):
+            return None
+
+    def _read_shared(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.shared is None:
+            return None
+        data = self.shared.get(key)
+        if data is None:
+            return None
+        header, _, body = data.partition(b"\n")
+        try:
+            entry = json.loads(header.decode("utf-8"))
+        except ValueError:
+            return None
+        entry["body"] = body
+        return entry
+
+    @staticmethod
+    def _serialize(entry: Dict[str, Any]) -> bytes:
+        # Same layout as the disk files: JSON header line, then the raw body
+        header = {k: v for k, v in entry.items() if k != "body"}
+        return json.dumps(header).encode("utf-8") + b"\n" + entry["body"]
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(self._serialize(entry))
+            # Atomic rename so readers never see a half-written file
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"WARNING: Could not write response cache file: {str(e)}")
+            return
+
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % DISK_PRUNE_EVERY == 0
+        if prune:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        files = []
+        try:
+            with os.scandir(self.disk_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".cache"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+
+        size = sum(file_size for _, file_size, _ in files)
+        if size <= self.disk_max_bytes:
+            return
+        # Drop the least recently used files until roughly 80% of the budget is left
+        excess = size - int(self.disk_max_bytes * 0.8)
+        for _, file_size, path in sorted(files):
+            if excess <= 0:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Already removed by another worker
+                continue
+            excess -= file_size
@@ -0,0 +1,231 @@
+"""
+Response helpers for ShipNote
+Compression negotiation (gzip / brotli), gzip-encoded request bodies,
+field selection for commit-heavy payloads and a faster JSON provider for
+Flask.
+"""
+
+import gzip
+import io
+import json
+import zlib
+from typing import Dict, Any, Iterable, List, Optional, Union
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.wrappers import Response
+
+from .metrics import STAGE_SECONDS
+
+# Optional accelerators; the standard library is used when they are missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Responses smaller than this are sent as is (compression would not pay off)
+MIN_COMPRESS_BYTES = 1024
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/plain", "text/markdown", "text/html")
+
+# Largest request body accepted once inflated
+MAX_INFLATED_BYTES = 32 * 1024 * 1024
+
+# Keys kept by select_fields() whatever the selection, so failures stay visible
+ALWAYS_KEPT = ("success", "error")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that uses orjson when it is installed.
+
+    Keys are not sorted and non-ASCII text is not escaped, which makes large
+    responses cheaper to build and smaller on the wire.
+    """
+
+    sort_keys = False
+    ensure_ascii = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("indent"):
+            # Debug mode pretty-prints responses
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def parse_fields(value: Union[str, List[str], None]) -> Optional[List[str]]:
+    """
+    Parse a field selection ("notes,commit_count,commits.hash" or a list)
+
+    Args:
+        value: Comma-separated string, list of names, or None
+
+    Returns:
+        List of field paths, or None to keep every field
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    fields = [str(f).strip() for f in value if str(f).strip()]
+    return fields or None
+
+
+def select_fields(data: Any, fields: Optional[Iterable[str]],
+                  always: Iterable[str] = ALWAYS_KEPT) -> Any:
+    """
+    Keep only the selected fields of a response
+
+    A top-level name keeps that key whole; a dotted path such as
+    "commits.hash" keeps only that field of each item of a list (or of a
+    nested dict).
+
+    Example:
+        select_fields(result, ["notes", "commits.hash", "commits.message"])
+
+    Args:
+        data: Response dict
+        fields: Field paths from parse_fields(), or None to keep everything
+        always: Top-level keys that are always kept when present
+
+    Returns:
+        The reduced response
+    """
+    if fields is None or not isinstance(data, dict):
+        return data
+
+    # Nested dict of selected names; None keeps the whole value
+    tree = {}
+    for path in fields:
+        parts = path.split(".")
+        node = tree
+        for part in parts[:-1]:
+            if node.get(part, {}) is None:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+
+    selected = _select(data, tree)
+    for key in always:
+        if key in data:
+            selected.setdefault(key, data[key])
+    return selected
+
+
+def _select(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [_select(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: _select(value[key], sub) for key, sub in tree.items() if key in value}
+    return value
+
+
+def compress_response(response, accept_encodings, min_size: int = MIN_COMPRESS_BYTES):
+    """
+    Compress a response body with the best encoding the client accepts
+
+    Brotli is preferred when installed, then gzip. Streamed responses
+    (SSE, NDJSON) and small or already-encoded bodies are left alone.
+
+    Args:
+        response: Flask response (used as an after_request hook)
+        accept_encodings: request.accept_encodings of the current request
+        min_size: Smallest body worth compressing, in bytes
+
+    Returns:
+        The response
+    """
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+
+    offered = ["br", "gzip"] if brotli is not None else ["gzip"]
+    encoding = accept_encodings.best_match(offered)
+    if encoding == "br":
+        # Low quality levels are fast enough for per-request compression
+        body = brotli.compress(body, quality=4)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=5)
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+class GzipRequestMiddleware:
+    """
+    WSGI middleware that inflates request bodies sent with
+    Content-Encoding: gzip, so the views read plain JSON.
+
+    Bodies that inflate to more than max_bytes are refused with 413 before
+    they are fully inflated (no gzip bombs), broken ones with 400 and other
+    encodings with 415.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_INFLATED_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    def __call__(self, environ, start_response):
+        encoding = environ.get("HTTP_CONTENT_ENCODING", "").strip().lower()
+        if encoding in ("", "identity"):
+            return self.app(environ, start_response)
+        if encoding not in ("gzip", "x-gzip"):
+            return self._error(415, f"Unsupported request Content-Encoding: {encoding}")(environ, start_response)
+
+        try:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        if length > self.max_bytes:
+            return self._error(413, "Request body is too large")(environ, start_response)
+
+        with STAGE_SECONDS.time(stage="decompress"):
+            compressed = environ["wsgi.input"].read(length) if length > 0 else b""
+            inflater = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            try:
+                body = inflater.decompress(compressed, self.max_bytes + 1)
+            except zlib.error:
+                return self._error(400, "Request body is not valid gzip")(environ, start_response)
+        if len(body) > self.max_bytes:
+            return self._error(413, "Request body is too large once decompressed")(environ, start_response)
+        if not inflater.eof:
+            return self._error(400, "Request body is truncated gzip")(environ, start_response)
+
+        environ = dict(environ)
+        environ["wsgi.input"] = io.BytesIO(body)
+        environ["CONTENT_LENGTH"] = str(len(body))
+        del environ["HTTP_CONTENT_ENCODING"]
+        return self.app(environ, start_response)
+
+    @staticmethod
+    def _error(status: int, message: str) -> Response:
+        return Response(json.dumps({"success": False, "error": message}), status=status,
+                        mimetype="application/json")
@@ -0,0 +1,334 @@
+"""
+Webhook Service for ShipNote
+Ingests GitHub push webhooks, keeps the pushed commits per repository and
+precomputes the "unreleased" and "latest release" notes in the background,
+through the same pipeline as /api/github/generate-from-url so a later
+request for the range is served without another Claude call.
+"""
+
+import hashlib
+import hmac
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Optional
+
+from .cache import decode, encode
+from .changelog_store import github_repo_id
+from .config import load_config
+from .rate_limiter import PRIORITY_BACKGROUND
+
+load_config()
+
+# "before" of a push that created the ref
+NULL_SHA = "0" * 40
+
+
+class WebhookService:
+    """
+    Service for GitHub push webhooks.
+
+    Commits are stored per repository in push order (oldest first). Tags
+    pushed to refs/tags/ mark release boundaries in that sequence:
+    - "unreleased" is everything after the newest tag
+    - "latest release" is everything between the two newest tags
+
+    Notes are precomputed with GITHUB_WEBHOOK_TOKEN by running the request
+    a user would send (base/head of the tags, or the newest commits) through
+    the pipeline service. It fetches the commits from GitHub rather than
+    using the payload's, so the prompt matches and the result lands in the
+    changelog store (tag ranges) or the notes cache. Without a token,
+    nothing is precomputed.
+
+    Force pushes and deleted refs also remove the notes stored for them
+    from the changelog store (when one is given).
+
+    With db_path, the commits and tags of each repository are kept in
+    SQLite, so they survive restarts and every worker process sees every
+    delivery. Without it they live in this process's memory only.
+    """
+
+    def __init__(self, pipeline_service, github_service, max_commits: int = 5000, changelog_store=None,
+                 db_path: Optional[str] = None):
+        self.pipeline_service = pipeline_service
+        self.github_service = github_service
+        self.changelog_store = changelog_store
+        self.secret = os.getenv("GITHUB_WEBHOOK_SECRET")
+
+        # Optional token used to precompute notes and to backfill pushes
+        # that GitHub truncated (the payload lists at most 20 commits)
+        self.token = os.getenv("GITHUB_WEBHOOK_TOKEN")
+
+        self.max_commits = max_commits
+        self.db_path = db_path
+        self._repos = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="precompute")
+        self._pending = set()
+
+        if not self.secret:
+            print("WARNING: GITHUB_WEBHOOK_SECRET not set, webhook deliveries will be rejected")
+        elif not self.token:
+            print("WARNING: GITHUB_WEBHOOK_TOKEN not set, pushed ranges will not be precomputed")
+
+        if self.db_path:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                with conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS webhook_repos (
+                            full_name TEXT PRIMARY KEY,
+                            state BLOB NOT NULL,
+                            updated_at REAL NOT NULL
+                        )
+                    """)
+            finally:
+                conn.close()
+
+    def verify_signature(self, body: bytes, signature_header: Optional[str]) -> bool:
+        """
+        Check the X-Hub-Signature-256 header of a webhook delivery
+
+        Args:
+            body: Raw request body
+            signature_header: Value of X-Hub-Signature-256 ("sha256=<hex>")
+
+        Returns:
+            True if the signature matches the configured secret
+        """
+        if not self.secret or not signature_header or not signature_header.startswith("sha256="):
+            return False
+
+        expected = hmac.new(self.secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature_header[len("sha256="):])
+
+    def handle_event(self, event: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process a verified webhook delivery
+
+        Args:
+            event: Value of the X-GitHub-Event header
+            payload: Parsed JSON payload
+
+        Returns:
+            Dict describing what was ingested and queued
+        """
+        if event == "ping":
+            return {"success": True, "event": "ping"}
+
+        if event != "push":
+            return {"success": True, "event": event, "ignored": True}
+
+        repository = payload.get("repository") or {}
+        full_name = repository.get("full_name")
+        ref = payload.get("ref", "")
+        if not full_name:
+            return {"success": False, "error": "Payload has no repository"}
+
+        default_branch = repository.get("default_branch") or repository.get("master_branch") or "main"
+
+        if (payload.get("forced") or payload.get("deleted")) and self.changelog_store is not None:
+            # History of this ref was rewritten: drop notes of ranges ending at
+            # or starting from it and of the commit it used to point at
+            before = payload.get("before", "")
+            removed = self.changelog_store.invalidate(
+                github_repo_id(full_name),
+                ref=ref.split("/", 2)[-1],
+                # All zeros: the ref did not exist before this push
+                sha=before if before and before != NULL_SHA else None
+            )
+            if removed:
+                print(f"Removed {removed} stored changelog(s) of rewritten {full_name} {ref}")
+
+        if ref.startswith("refs/tags/"):
+            tag = ref[len("refs/tags/"):]
+            with self._repo_state(full_name) as state:
+                state["tags"] = [t for t in state["tags"] if t[0] != tag]
+                if not payload.get("deleted"):
+                    # For annotated tags "after" is the tag object; head_commit is the commit
+                    sha = (payload.get("head_commit") or {}).get("id") or payload.get("after", "")
+                    state["tags"].append((tag, sha))
+            queued = self._queue_precompute(full_name)
+            return {"success": True, "event": "push", "tag": tag, "queued": queued}
+
+        if ref != f"refs/heads/{default_branch}":
+            return {"success": True, "event": "push", "ignored": True}
+
+        commits = [self._format_commit(c) for c in payload.get("commits", [])]
+
+        # GitHub lists at most 20 commits per push; fetch the rest if we can
+        before = payload.get("before", "")
+        if len(commits) >= 20 and self.token and before and before != NULL_SHA:
+            owner, repo = full_name.split("/", 1)
+            with self.github_service.rate_limiter.priority(PRIORITY_BACKGROUND):
+                result = self.github_service.fetch_compare_commits(
+                    self.token, owner, repo, payload["before"], payload["after"]
+                )
+            if result.get("success"):
+                # Compare results are newest first; the store is oldest first
+                commits = list(reversed(result["commits"]))
+
+        with self._repo_state(full_name) as state:
+            if payload.get("forced"):
+                # History was rewritten: earlier commits may no longer exist
+                state["commits"] = []
+            known = {c["sha"] for c in state["commits"]}
+            state["commits"].extend(c for c in commits if c["sha"] not in known)
+            del state["commits"][:-self.max_commits]
+
+        queued = self._queue_precompute(full_name)
+        return {"success": True, "event": "push", "ingested": len(commits), "queued": queued}
+
+    def get_ranges(self, full_name: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the "unreleased" and "latest_release" commit ranges of a repository
+
+        Args:
+            full_name: Repository "owner/name"
+
+        Returns:
+            Dict of range name -> {"from", "to", "commits"} (commits newest first)
+        """
+        with self._repo_state(full_name, write=False) as state:
+            commits = list(state["commits"])
+            tags = list(state["tags"])
+
+        positions = {c["sha"]: i for i, c in enumerate(commits)}
+        # Only tags that point at a stored commit can bound a range
+        located = [(name, positions[sha]) for name, sha in tags if sha in positions]
+
+        ranges = {}
+        if located:
+            latest_tag, latest_pos = located[-1]
+            unreleased = commits[latest_pos + 1:]
+            if len(located) > 1:
+                previous_tag, previous_pos = located[-2]
+                release = commits[previous_pos + 1:latest_pos + 1]
+                if release:
+                    ranges["latest_release"] = {
+                        "from": previous_tag,
+                        "to": latest_tag,
+                        "commits": list(reversed(release))
+                    }
+            unreleased_from = latest_tag
+        else:
+            unreleased = commits
+            unreleased_from = None
+
+        if unreleased:
+            ranges["unreleased"] = {
+                "from": unreleased_from,
+                "to": "HEAD",
+                "commits": list(reversed(unreleased))
+            }
+        return ranges
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the precompute worker
+
+        Args:
+            wait: Wait for the precomputation in progress to finish
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _queue_precompute(self, full_name: str) -> List[str]:
+        """
+        Queue background generation of the repository's notes
+
+        Returns:
+            Names of the ranges queued
+        """
+        if not self.token or self.pipeline_service is None:
+            return []
+
+        ranges = self.get_ranges(full_name)
+        queued = []
+        for name, info in ranges.items():
+            key = (full_name, name, len(info["commits"]), info["commits"][0]["sha"])
+            with self._lock:
+                if key in self._pending:
+                    continue
+                self._pending.add(key)
+            self._executor.submit(self._precompute, key, info["from"], info["to"])
+            queued.append(name)
+        return queued
+
+    def _precompute(self, key: tuple, from_ref: Optional[str], to_ref: str) -> None:
+        # The request a user would send for this range, so the prompt (and
+        # the store key) is the same: a tag range, or the newest commits
+        request = {"access_token": self.token, "repo_url": f"https://github.com/{key[0]}"}
+        if from_ref:
+            request["base"] = from_ref
+            request["head"] = to_ref
+        try:
+            with self.github_service.rate_limiter.priority(PRIORITY_BACKGROUND):
+                # Returns right away if the notes are already stored or cached
+                result, _ = self.pipeline_service.generate_from_github_url(request)
+            if not result.get("success"):
+                print(f"Could not precompute notes for {key[0]} {key[1]}: {result.get('error')}")
+        except Exception as e:
+            print(f"Error precomputing notes for {key[0]}: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    @contextmanager
+    def _repo_state(self, full_name: str, write: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Hold the state of one repository: {"commits": [...], "tags": [(name, sha), ...]}
+
+        With a database, the state is read in a write transaction (so
+        deliveries handled by other processes are not lost) and saved when
+        the block exits without an error.
+        """
+        with self._lock:
+            if not self.db_path:
+                yield self._repos.setdefault(full_name, {"commits": [], "tags": []})
+                return
+
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            try:
+                if write:
+                    conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT state FROM webhook_repos WHERE full_name = ?", (full_name,)
+                ).fetchone()
+                state = decode(bytes(row[0])) if row else {"commits": [], "tags": []}
+                yield state
+                if write:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO webhook_repos (full_name, state, updated_at) VALUES (?, ?, ?)",
+                        (full_name, encode(state), time.time())
+                    )
+                    conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+
+    def _format_commit(self, commit: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert a commit from a push payload into ShipNote's commit format
+        """
+        author = commit.get("author") or {}
+        files = (
+            [{"filename": f, "status": "added"} for f in commit.get("added", [])]
+            + [{"filename": f, "status": "removed"} for f in commit.get("removed", [])]
+            + [{"filename": f, "status": "modified"} for f in commit.get("modified", [])]
+        )
+        return {
+            "hash": commit["id"][:7],  # Short hash
+            "sha": commit["id"],
+            "message": commit.get("message", ""),
+            "author": author.get("username") or author.get("name") or "Unknown",
+            "date": commit.get("timestamp", ""),
+            "url": commit.get("url", ""),
+            "files": files
+        }
@@ -0,0 +1,189 @@
+"""
+Test script for the ShipNote admission controller
+==============================
+Runs on its own (no server needed):
+
+    python test_admission.py      or      python -m pytest test_admission.py
+
+Waiting requests are run in threads; the tests poll stats() until they
+are queued.
+"""
+
+import sys
+import threading
+import time
+
+from services.admission import AdmissionController, AdmissionRejected
+from services.rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+
+class Request(threading.Thread):
+    """Calls acquire() in a thread and records the ticket or the rejection"""
+
+    def __init__(self, controller, endpoint, priority=PRIORITY_INTERACTIVE):
+        super().__init__(daemon=True)
+        self.controller = controller
+        self.endpoint = endpoint
+        self.priority = priority
+        self.ticket = None
+        self.error = None
+        self.start()
+
+    def run(self):
+        try:
+            self.ticket = self.controller.acquire(self.endpoint, self.priority)
+        except AdmissionRejected as e:
+            self.error = e
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_in_flight_limit():
+    controller = AdmissionController(max_in_flight=2, queue_size=0)
+    first = controller.acquire("/notes")
+    second = controller.acquire("/notes")
+    assert controller.stats() == {"in_flight": 2, "waiting": 0, "endpoints": {"/notes": 2}}
+
+    controller.release(first)
+    controller.release(second)
+    assert controller.stats() == {"in_flight": 0, "waiting": 0, "endpoints": {}}
+
+
+def test_queue_full():
+    controller = AdmissionController(max_in_flight=1, queue_size=1, max_wait=5)
+    running = controller.acquire("/notes")
+
+    waiting = Request(controller, "/notes")
+    wait_for(lambda: controller.stats()["waiting"] == 1)
+
+    # The queue holds one request already: the next one is turned away at once
+    start = time.monotonic()
+    try:
+        controller.acquire("/notes")
+        assert False, "request should be rejected"
+    except AdmissionRejected as e:
+        assert e.status_code == 503
+        assert e.retry_after >= 1
+    assert time.monotonic() - start < 0.5
+
+    # The queued request runs once the slot is released
+    controller.release(running)
+    waiting.join(2)
+    assert waiting.ticket is not None and waiting.error is None
+    controller.release(waiting.ticket)
+
+
+def test_wait_timeout():
+    controller = AdmissionController(max_in_flight=1, queue_size=1, max_wait=0.2)
+    running = controller.acquire("/notes")
+    start = time.monotonic()
+    try:
+        controller.acquire("/notes")
+        assert False, "request should time out"
+    except AdmissionRejected as e:
+        assert e.status_code == 503
+    assert 0.15 < time.monotonic() - start < 1.0
+    assert controller.stats()["waiting"] == 0
+    controller.release(running)
+
+
+def test_endpoint_limit_429_vs_503():
+    controller = AdmissionController(max_in_flight=2, queue_size=0,
+                                     endpoint_limits={"/bulk": 1})
+    bulk = controller.acquire("/bulk")
+
+    # The endpoint is at its limit but the server is not: 429
+    try:
+        controller.acquire("/bulk")
+        assert False, "request should be rejected"
+    except AdmissionRejected as e:
+        assert e.status_code == 429
+
+    # Other endpoints still get in, until the whole server is full: 503
+    notes = controller.acquire("/notes")
+    try:
+        controller.acquire("/notes")
+        assert False, "request should be rejected"
+    except AdmissionRejected as e:
+        assert e.status_code == 503
+
+    controller.release(bulk)
+    controller.release(notes)
+
+
+def test_interactive_evicts_background():
+    controller = AdmissionController(max_in_flight=1, queue_size=1, max_wait=5)
+    running = controller.acquire("/notes")
+
+    background = Request(controller, "/bulk", PRIORITY_BACKGROUND)
+    wait_for(lambda: controller.stats()["waiting"] == 1)
+
+    # A full queue: the interactive request takes the background one's place
+    interactive = Request(controller, "/notes", PRIORITY_INTERACTIVE)
+    background.join(2)
+    assert background.error is not None
+    assert background.error.status_code == 503
+    assert controller.stats()["waiting"] == 1
+
+    controller.release(running)
+    interactive.join(2)
+    assert interactive.ticket is not None
+    controller.release(interactive.ticket)
+
+    # Background requests never evict each other (or interactive ones)
+    running = controller.acquire("/notes")
+    waiting = Request(controller, "/notes", PRIORITY_INTERACTIVE)
+    wait_for(lambda: controller.stats()["waiting"] == 1)
+    try:
+        controller.acquire("/bulk", PRIORITY_BACKGROUND)
+        assert False, "request should be rejected"
+    except AdmissionRejected:
+        pass
+    controller.release(running)
+    waiting.join(2)
+    controller.release(waiting.ticket)
+
+
+def test_priority_order():
+    controller = AdmissionController(max_in_flight=1, queue_size=2, max_wait=5)
+    running = controller.acquire("/notes")
+
+    background = Request(controller, "/bulk", PRIORITY_BACKGROUND)
+    wait_for(lambda: controller.stats()["waiting"] == 1)
+    interactive = Request(controller, "/notes", PRIORITY_INTERACTIVE)
+    wait_for(lambda: controller.stats()["waiting"] == 2)
+
+    # The interactive request arrived later but goes first
+    controller.release(running)
+    interactive.join(2)
+    assert interactive.ticket is not None
+    assert background.is_alive()
+
+    controller.release(interactive.ticket)
+    background.join(2)
+    assert background.ticket is not None
+    controller.release(background.ticket)
+
+
+def main():
+    tests = [test_in_flight_limit, test_queue_full, test_wait_timeout,
+             test_endpoint_limit_429_vs_503, test_interactive_evicts_background,
+             test_priority_order]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Test script for the ShipNote cache backends
+==============================
+Runs on its own (no server, no Redis needed):
+
+    python test_cache.py      or      python -m pytest test_cache.py
+
+The Redis backend is tested against a tiny Redis-protocol stand-in
+(GET / SET [PX] / DEL / PING / AUTH / SELECT) started in a thread.
+"""
+
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+from services.cache import (
+    Cache, MemoryBackend, RedisBackend, SQLiteBackend, FORMAT_VERSION,
+    create_backend, decode, encode
+)
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Answers RESP2 commands from a dict shared by all connections"""
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self.server.execute(args))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        super().__init__(("127.0.0.1", 0), FakeRedisHandler)
+        self.password = password
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def execute(self, args):
+        command = args[0].upper()
+        with self.lock:
+            if command == b"PING":
+                return b"+PONG\r\n"
+            if command in (b"AUTH", b"SELECT"):
+                if command == b"AUTH" and args[1].decode() != self.password:
+                    return b"-WRONGPASS invalid password\r\n"
+                return b"+OK\r\n"
+            if command == b"SET":
+                expires = None
+                if len(args) == 5 and args[3].upper() == b"PX":
+                    expires = time.time() + int(args[4]) / 1000
+                self.data[args[1]] = (args[2], expires)
+                return b"+OK\r\n"
+            if command == b"GET":
+                value, expires = self.data.get(args[1], (None, None))
+                if value is None or (expires is not None and expires <= time.time()):
+                    return b"$-1\r\n"
+                return b"$%d\r\n%s\r\n" % (len(value), value)
+            if command == b"DEL":
+                return b":%d\r\n" % (1 if self.data.pop(args[1], None) else 0)
+        return b"-ERR unknown command\r\n"
+
+
+def start_fake_redis(password=None):
+    server = FakeRedisServer(password)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def check_backend(backend):
+    """Round trip, overwrite, delete and expiry on any backend"""
+    cache = Cache("test", backend)
+    notes = "# Release Notes\n\n" + "- fixed a bug\n" * 200
+
+    assert cache.get("missing") is None
+    cache.set("notes", notes)
+    assert cache.get("notes") == notes
+    cache.set("notes", "updated")
+    assert cache.get("notes") == "updated"
+    cache.set("commits", [{"hash": "a83b1c9", "files": [{"filename": "app.py"}]}])
+    assert cache.get("commits")[0]["files"][0]["filename"] == "app.py"
+    cache.set("raw", b"\x00\xffbody")
+    assert cache.get("raw") == b"\x00\xffbody"
+
+    cache.delete("notes")
+    assert cache.get("notes") is None
+
+    cache.set("short", "gone soon", ttl=0.05)
+    assert cache.get("short") == "gone soon"
+    time.sleep(0.1)
+    assert cache.get("short") is None
+
+
+def test_encoding():
+    """Values are versioned, large ones compressed"""
+    small = encode({"sha": "abc"})
+    assert small[0] == FORMAT_VERSION
+    assert decode(small) == {"sha": "abc"}
+
+    large_text = "- fixed a bug in the parser\n" * 500
+    large = encode(large_text)
+    assert len(large) < len(large_text) / 5
+    assert decode(large) == large_text
+
+    try:
+        decode(bytes((FORMAT_VERSION + 1, 0)) + b"{}")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Values from another format version must be rejected")
+
+
+def test_memory_backend():
+    check_backend(MemoryBackend())
+
+    backend = MemoryBackend(max_entries=2)
+    cache = Cache("lru", backend)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_sqlite_backend():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.db")
+        check_backend(create_backend(f"sqlite:///{path}"))
+
+        # A second backend on the same file (another worker) sees the values
+        first = Cache("shared", SQLiteBackend(path))
+        second = Cache("shared", SQLiteBackend(path))
+        first.set("key", "value")
+        assert second.get("key") == "value"
+
+        # Writes from several threads
+        def write(n):
+            for i in range(50):
+                first.set(f"{n}-{i}", i)
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert second.get("3-49") == 49
+
+
+def test_redis_backend():
+    server = start_fake_redis(password="s3cret")
+    try:
+        port = server.server_address[1]
+        check_backend(create_backend(f"redis://:s3cret@127.0.0.1:{port}/1"))
+
+        # Connections are reused
+        backend = RedisBackend("127.0.0.1", port, password="s3cret")
+        cache = Cache("pool", backend)
+        for i in range(20):
+            cache.set(str(i), i)
+            assert cache.get(str(i)) == i
+        assert len(backend._idle) == 1
+
+        # A wrong password is logged and served as a miss, not raised
+        assert Cache("denied", RedisBackend("127.0.0.1", port, password="wrong")).get("x") is None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_redis_unreachable():
+    # Nothing listens on this port: lookups must degrade to misses
+    server = start_fake_redis()
+    port = server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+    cache = Cache("down", RedisBackend("127.0.0.1", port, timeout=0.5))
+    cache.set("key", "value")
+    assert cache.get("key") is None
+
+
+def main():
+    tests = [test_encoding, test_memory_backend, test_sqlite_backend,
+             test_redis_backend, test_redis_unreachable]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
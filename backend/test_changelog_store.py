@@ -0,0 +1,133 @@
+"""
+Test script for the ShipNote changelog store
+==============================
+Runs on its own (no server needed):
+
+    python test_changelog_store.py      or      python -m pytest test_changelog_store.py
+
+Every test uses a fresh SQLite database in a temporary directory.
+"""
+
+import os
+import sys
+import tempfile
+
+from services.changelog_store import (
+    ChangelogStore, github_repo_id, local_repo_id, remote_repo_id
+)
+
+
+REPO = github_repo_id("Acme/App")
+COMMITS = [{"hash": "a1b2c3d", "message": "feat: x"}]
+
+
+def open_store(directory, model="claude", prompt_version="1"):
+    return ChangelogStore(os.path.join(directory, "changelogs.db"), model, prompt_version)
+
+
+def test_repo_ids():
+    assert github_repo_id("Acme/App") == "github.com/acme/app"
+    assert remote_repo_id("https://github.com/acme/app") == "url:https://github.com/acme/app"
+    with tempfile.TemporaryDirectory() as directory:
+        link = os.path.join(directory, "link")
+        os.symlink(directory, link)
+        # Symlinked paths are the same repository
+        assert local_repo_id(link) == local_repo_id(directory)
+
+
+def test_lookup_key():
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_store(directory)
+        key = (REPO, "base1", "head1", "limit=50")
+        assert store.get(key) is None
+
+        store.put(key, "v1.0", "v1.1", "## Features", COMMITS)
+        entry = store.get(key)
+        assert entry["notes"] == "## Features"
+        assert entry["commits"] == COMMITS
+        assert (entry["base_sha"], entry["head_sha"], entry["variant"]) == ("base1", "head1", "limit=50")
+
+        # Every part of the key matters
+        assert store.get((REPO, "base1", "head1", "limit=100")) is None
+        assert store.get((REPO, "base1", "head2", "limit=50")) is None
+        assert store.get((REPO, "", "head1", "limit=50")) is None
+        assert store.get((github_repo_id("acme/other"), "base1", "head1", "limit=50")) is None
+
+        # So do the model and prompt version the store was opened with
+        assert open_store(directory, model="other").get(key) is None
+        assert open_store(directory, prompt_version="2").get(key) is None
+        assert open_store(directory).get(key)["notes"] == "## Features"
+
+
+def test_find_by_ref_names():
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_store(directory)
+        store.put((REPO, "", "head1", "v"), None, "main", "first", COMMITS)
+        store.put((REPO, "base1", "head1", "v"), "v1.0", "v1.1", "range", COMMITS)
+
+        assert store.find(REPO, None, "main")["notes"] == "first"
+        found = store.find(REPO, "v1.0", "v1.1")
+        assert (found["base_sha"], found["head_sha"], found["notes"]) == ("base1", "head1", "range")
+        assert store.find(REPO, "v1.0", "v1.2") is None
+        assert open_store(directory, prompt_version="2").find(REPO, "v1.0", "v1.1") is None
+
+
+def test_moved_ref_deletes_orphan():
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_store(directory)
+        old_key = (REPO, "base1", "head1", "v")
+        store.put(old_key, "v1.0", "v1.1", "old", COMMITS)
+
+        # v1.1 was re-pushed: the old entry has no name left and is removed
+        new_key = (REPO, "base1", "head2", "v")
+        store.put(new_key, "v1.0", "v1.1", "new", COMMITS)
+        assert store.get(old_key) is None
+        assert store.find(REPO, "v1.0", "v1.1")["notes"] == "new"
+
+        # An entry still reachable through another name is kept
+        store.put(new_key, "v1.0", "release", "new", COMMITS)
+        store.put((REPO, "base1", "head3", "v"), "v1.0", "v1.1", "newer", COMMITS)
+        assert store.get(new_key)["notes"] == "new"
+
+
+def test_invalidate():
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_store(directory)
+        store.put((REPO, "", "head1", "v"), None, "main", "main", COMMITS)
+        store.put((REPO, "", "head1", "v"), None, "v2.0", "main", COMMITS)
+        store.put((REPO, "base1", "head2", "v"), "v1.0", "feature", "feature", COMMITS)
+        other = github_repo_id("acme/other")
+        store.put((other, "", "head1", "v"), None, "main", "other", COMMITS)
+
+        assert store.invalidate(REPO) == 0
+
+        # Branch deleted: its names go, but head1 is still reachable as v2.0
+        assert store.invalidate(REPO, ref="main") == 0
+        assert store.find(REPO, None, "main") is None
+        assert store.get((REPO, "", "head1", "v")) is not None
+
+        # Force push rewrote head1: every range touching it goes
+        assert store.invalidate(REPO, sha="head1") == 1
+        assert store.get((REPO, "", "head1", "v")) is None
+        assert store.find(REPO, "v1.0", "feature")["notes"] == "feature"
+
+        # Other repositories are untouched
+        assert store.get((other, "", "head1", "v"))["notes"] == "other"
+
+
+def main():
+    tests = [test_repo_ids, test_lookup_key, test_find_by_ref_names,
+             test_moved_ref_deletes_orphan, test_invalidate]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Test script for the ShipNote git log parser
+==============================
+Runs on its own (no server needed):
+
+    python test_log_parser.py      or      python -m pytest test_log_parser.py
+
+Covers every format the parser recognizes, mixed input, file lines and
+the lines that must not be mistaken for them.
+"""
+
+import sys
+
+from services.log_parser import detect_format, parse_git_log
+
+
+def parse(text, limit=None):
+    return list(parse_git_log(text, limit))
+
+
+def test_oneline():
+    commits = parse(
+        "a83b1c9 (HEAD -> main, origin/main, tag: v1.2) fix(auth): resolve token bug\n"
+        "4f2e8d1 feat: add export\n"
+    )
+    assert [c["hash"] for c in commits] == ["a83b1c9", "4f2e8d1"]
+    assert commits[0]["message"] == "fix(auth): resolve token bug"
+    assert commits[1]["message"] == "feat: add export"
+    assert commits[0]["author"] == "Unknown"
+    assert "files" not in commits[0]
+
+
+def test_oneline_not_numstat():
+    # A oneline commit whose message starts with a number is not a numstat line
+    commits = parse("b1d4e2a (HEAD -> main, tag: v1) feat: y\n1234567 10 bugs fixed")
+    assert [c["hash"] for c in commits] == ["b1d4e2a", "1234567"]
+    assert commits[1]["message"] == "10 bugs fixed"
+    assert "files" not in commits[0]
+    assert "additions" not in commits[0]
+
+
+def test_medium():
+    commits = parse(
+        "commit 9fceb02d0ae598e95dc970b74767f19372d61af8\n"
+        "Merge: 1c2d3e4 5f6a7b8\n"
+        "Author: Jane Doe <jane@example.com>\n"
+        "Date:   Mon Oct 5 14:00:00 2026 +0200\n"
+        "\n"
+        "    feat: add login\n"
+        "\n"
+        "    Longer description.\n"
+        "\n"
+        "commit 1c2d3e4f\n"
+        "Author: John <john@example.com>\n"
+        "Date:   Sun Oct 4 09:00:00 2026 +0200\n"
+        "\n"
+        "    fix: typo\n"
+    )
+    assert len(commits) == 2
+    assert commits[0]["hash"] == "9fceb02d0ae598e95dc970b74767f19372d61af8"
+    assert commits[0]["author"] == "Jane Doe"
+    assert commits[0]["date"] == "Mon Oct 5 14:00:00 2026 +0200"
+    assert commits[0]["message"] == "feat: add login\n\nLonger description."
+    assert commits[1]["author"] == "John"
+    assert commits[1]["message"] == "fix: typo"
+
+
+def test_fuller():
+    commits = parse(
+        "commit abcdef1234567\n"
+        "Author:     Jane Doe <jane@example.com>\n"
+        "AuthorDate: Mon Oct 5 14:00:00 2026 +0200\n"
+        "Commit:     Bot <bot@example.com>\n"
+        "CommitDate: Mon Oct 5 15:00:00 2026 +0200\n"
+        "\n"
+        "    chore: bump deps\n"
+    )
+    assert len(commits) == 1
+    assert commits[0]["author"] == "Jane Doe"
+    assert commits[0]["date"] == "Mon Oct 5 14:00:00 2026 +0200"
+    assert commits[0]["message"] == "chore: bump deps"
+
+
+def test_medium_unindented_message():
+    commits = parse(
+        "commit abcdef1\n"
+        "Author: Jane <jane@example.com>\n"
+        "\n"
+        "feat: pasted without indentation\n"
+    )
+    assert len(commits) == 1
+    assert commits[0]["message"] == "feat: pasted without indentation"
+
+
+def test_pipe():
+    commits = parse(
+        "a1b2c3d|2026-10-05|Jane Doe|feat: add login\n"
+        "e4f5a6b|2026-10-04||fix: a|b in message\n"
+    )
+    assert len(commits) == 2
+    assert commits[0]["date"] == "2026-10-05"
+    assert commits[0]["author"] == "Jane Doe"
+    assert commits[0]["message"] == "feat: add login"
+    assert commits[1]["author"] == "Unknown"
+    assert commits[1]["message"] == "fix: a|b in message"
+
+
+def test_name_status():
+    commits = parse(
+        "a1b2c3d|2026-10-05|Jane|feat: move things\n"
+        "A\tsrc/new.py\n"
+        "M  src/changed.py\n"
+        "D\tsrc/old.py\n"
+        "R100\tsrc/a.py\tsrc/b.py\n"
+        "C75  src/c.py  src/d.py\n"
+        "\n"
+        "e4f5a6b|2026-10-04|Jane|fix: one\n"
+        "M\tREADME.md\n"
+    )
+    assert len(commits) == 2
+    assert commits[0]["files"] == [
+        {"filename": "src/new.py", "status": "added"},
+        {"filename": "src/changed.py", "status": "modified"},
+        {"filename": "src/old.py", "status": "removed"},
+        {"filename": "src/b.py", "status": "renamed"},
+        {"filename": "src/d.py", "status": "copied"},
+    ]
+    assert commits[0]["files_changed"] == 5
+    assert commits[1]["files"] == [{"filename": "README.md", "status": "modified"}]
+
+
+def test_numstat():
+    commits = parse(
+        "a1b2c3d feat: numbers\n"
+        "10\t2\tsrc/app.py\n"
+        "-\t-\tassets/logo.png\n"
+        "3       0       docs/guide.md\n"
+        "b2c3d4e fix: more\n"
+        "1\t1\tsrc/app.py\n"
+    )
+    assert len(commits) == 2
+    assert commits[0]["additions"] == 13
+    assert commits[0]["deletions"] == 2
+    assert [f["filename"] for f in commits[0]["files"]] == ["src/app.py", "assets/logo.png", "docs/guide.md"]
+    assert commits[1]["additions"] == 1
+    assert commits[1]["files_changed"] == 1
+
+
+def test_stat():
+    commits = parse(
+        "commit abcdef1\n"
+        "Author: Jane <jane@example.com>\n"
+        "Date:   Mon Oct 5 14:00:00 2026 +0200\n"
+        "\n"
+        "    feat: stat\n"
+        "\n"
+        " src/app.py    | 12 ++++++++----\n"
+        " assets/logo.png | Bin 0 -> 1024 bytes\n"
+        " 2 files changed, 8 insertions(+), 4 deletions(-)\n"
+        "\n"
+        "commit 1234abc\n"
+        "Author: John <john@example.com>\n"
+        "\n"
+        "    fix: next\n"
+    )
+    assert len(commits) == 2
+    assert commits[0]["message"] == "feat: stat"
+    assert [f["filename"] for f in commits[0]["files"]] == ["src/app.py", "assets/logo.png"]
+    assert commits[0]["files_changed"] == 2
+    assert commits[1]["message"] == "fix: next"
+
+
+def test_file_lines_outside_block():
+    # After the blank line that ends a file block, a numstat-looking line
+    # starts a commit of its own instead of growing the previous one
+    commits = parse(
+        "a1b2c3d|2026-10-05|Jane|feat: one\n"
+        "M\tsrc/app.py\n"
+        "\n"
+        "5 10 reasons to upgrade\n"
+    )
+    assert len(commits) == 2
+    assert commits[0]["files_changed"] == 1
+    assert "additions" not in commits[0]
+    assert commits[1]["hash"] == "commit-3"
+    assert commits[1]["message"] == "5 10 reasons to upgrade"
+
+
+def test_unrecognized_lines():
+    commits = parse("Fixed the login page\n\nAdded dark mode\n")
+    assert [c["hash"] for c in commits] == ["commit-0", "commit-2"]
+    assert [c["message"] for c in commits] == ["Fixed the login page", "Added dark mode"]
+
+
+def test_mixed_formats():
+    commits = parse(
+        "a83b1c9 fix: oneline\n"
+        "commit 9fceb02\n"
+        "Author: Jane <jane@example.com>\n"
+        "\n"
+        "    feat: medium\n"
+        "\n"
+        "e4f5a6b|2026-10-04|John|docs: pipe\n"
+        "Plain text line\n"
+    )
+    assert [c["message"] for c in commits] == ["fix: oneline", "feat: medium", "docs: pipe", "Plain text line"]
+
+
+def test_crlf_and_limit():
+    text = "a83b1c9 one\r\nb83b1c9 two\r\nc83b1c9 three\r\n"
+    commits = parse(text)
+    assert [c["message"] for c in commits] == ["one", "two", "three"]
+    assert [c["hash"] for c in parse(text, limit=2)] == ["a83b1c9", "b83b1c9"]
+
+    # Any iterable of lines works, e.g. an open file
+    assert len(list(parse_git_log(iter(["a83b1c9 one\n", "b83b1c9 two\n"])))) == 2
+
+
+def test_detect_format():
+    assert detect_format("\ncommit abcdef1\nAuthor: x\n") == "medium"
+    assert detect_format("a1b2c3d|2026-10-05|Jane|feat\n") == "pipe"
+    assert detect_format("a1b2c3d (HEAD -> main) feat\n") == "oneline"
+    assert detect_format("Fixed a bug\n") == "text"
+    assert detect_format("") == "text"
+
+
+def main():
+    tests = [test_oneline, test_oneline_not_numstat, test_medium, test_fuller,
+             test_medium_unindented_message, test_pipe, test_name_status,
+             test_numstat, test_stat, test_file_lines_outside_block,
+             test_unrecognized_lines, test_mixed_formats, test_crlf_and_limit,
+             test_detect_format]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+Test script for the ShipNote generation pipelines
+==============================
+Runs on its own (no server, no GitHub or Claude access needed):
+
+    python test_pipeline_service.py      or      python -m pytest test_pipeline_service.py
+
+GitHub is replaced by a small in-process stand-in for the few endpoints
+the pipelines call; it only lets the owner's tokens read the private
+repository. Claude is replaced by a stand-in that counts its calls.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+from services.changelog_store import ChangelogStore, github_repo_id
+from services.github_service import GitHubService
+from services.pipeline_service import PipelineService
+from services.webhook_service import WebhookService
+
+
+OWNER_TOKEN = "owner-token"
+WEBHOOK_TOKEN = "webhook-token"
+BASE_SHA = "a" * 40
+HEAD_SHA = "b" * 40
+REPO_URL = "https://github.com/acme/private"
+API = "https://api.github.com/repos/acme/private"
+
+# History of acme/private, oldest first, and its tags
+HISTORY = [f"{i}" * 40 for i in range(1, 5)]
+REFS = {"v1.0": HISTORY[0], "v1.1": HISTORY[2], "HEAD": HISTORY[3]}
+
+
+def make_response(url, status_code, body, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = url
+    response._content = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    response.headers.update(headers or {})
+    return response
+
+
+def rest_commit(sha):
+    return {
+        "sha": sha,
+        "commit": {"message": f"feat: change {sha[0]}",
+                   "author": {"name": "Jane Doe", "date": "2026-10-01T12:00:00Z"}},
+        "author": {"login": "jane"},
+        "html_url": f"https://github.com/acme/private/commit/{sha}"
+    }
+
+
+class FakeGitHub:
+    """Answers GitHub API calls for acme/private, readable only with the owner's tokens"""
+
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, url, headers, priority=None, resource="core", **kwargs):
+        self.calls.append(url)
+        if headers.get("Authorization") not in (f"Bearer {OWNER_TOKEN}", f"Bearer {WEBHOOK_TOKEN}"):
+            # GitHub hides private repositories from other tokens
+            return make_response(url, 404, {"message": "Not Found"})
+        if url == API:
+            return make_response(url, 200, {"full_name": "acme/private", "private": True},
+                                 {"ETag": '"repo"'})
+        if url == f"{API}/commits":
+            return make_response(url, 200, [rest_commit(sha) for sha in reversed(HISTORY)])
+        if url.startswith(f"{API}/commits/") and url.rsplit("/", 1)[-1] in REFS:
+            return make_response(url, 200, REFS[url.rsplit("/", 1)[-1]].encode("utf-8"))
+        if url.startswith(f"{API}/compare/"):
+            base, head = url.rsplit("/", 1)[-1].split("...")
+            commits = HISTORY[HISTORY.index(base) + 1:HISTORY.index(head) + 1]
+            return make_response(url, 200, {"commits": [rest_commit(sha) for sha in commits]})
+        return make_response(url, 404, {"message": "Not Found"})
+
+
+class FakeAI:
+    """Counts generations; nothing is cached here, only in the changelog store"""
+
+    def __init__(self):
+        self.generated = []
+
+    def generate_release_notes(self, commits, from_ref=None, to_ref="HEAD"):
+        self.generated.append((from_ref, to_ref, [c["sha"] for c in commits]))
+        return f"Notes for {from_ref}..{to_ref}"
+
+    def get_cached_release_notes(self, commits, from_ref=None, to_ref="HEAD"):
+        return None
+
+
+def make_pipeline(directory, ai_service=None):
+    github = GitHubService()
+    fake = FakeGitHub()
+    github._request = fake.request
+    store = ChangelogStore(os.path.join(directory, "changelogs.db"), "model", "1")
+    # The private notes another user generated for a SHA-only range
+    store.put((github_repo_id("acme/private"), BASE_SHA, HEAD_SHA, "limit=100,files=0"),
+              BASE_SHA, HEAD_SHA, "Secret release notes", [{"hash": "bbbbbbb", "message": "secret"}])
+    pipeline = PipelineService(git_service=None, ai_service=ai_service, github_service=github,
+                               changelog_store=store)
+    return pipeline, fake
+
+
+def test_lookup_with_sha_refs_checks_access():
+    with tempfile.TemporaryDirectory() as directory:
+        pipeline, fake = make_pipeline(directory)
+        request = {"repo_url": REPO_URL, "from": BASE_SHA, "to": HEAD_SHA}
+
+        result, status = pipeline.lookup_release({**request, "access_token": "someone-else"})
+        assert status in (403, 404)
+        assert "notes" not in result and "commits" not in result
+        assert fake.calls, "GitHub must be asked even for full SHAs"
+
+        result, status = pipeline.lookup_release({**request, "access_token": OWNER_TOKEN})
+        assert status == 200
+        assert result["notes"] == "Secret release notes"
+
+
+def test_generate_with_sha_refs_checks_access():
+    with tempfile.TemporaryDirectory() as directory:
+        pipeline, fake = make_pipeline(directory)
+        request = {"repo_url": REPO_URL, "base": BASE_SHA, "head": HEAD_SHA}
+
+        result, status = pipeline.generate_from_github_url({**request, "access_token": "someone-else"})
+        assert status in (403, 404)
+        assert "notes" not in result and "commits" not in result
+
+        # The owner is served the stored notes (no AI service is needed)
+        result, status = pipeline.generate_from_github_url({**request, "access_token": OWNER_TOKEN})
+        assert status == 200
+        assert result["notes"] == "Secret release notes"
+        assert result["stored"] is True
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def push(webhook, ref, after, commits=(), before="0" * 40):
+    return webhook.handle_event("push", {
+        "ref": ref,
+        "before": before,
+        "after": after,
+        "repository": {"full_name": "acme/private", "default_branch": "main"},
+        "head_commit": {"id": after},
+        # Push payloads carry usernames, local timestamps and file lists:
+        # notes must not be generated from these
+        "commits": [{"id": sha, "message": f"feat: change {sha[0]}",
+                     "author": {"name": "Jane Doe", "username": "jane"},
+                     "timestamp": "2026-10-01T14:00:00+02:00",
+                     "added": ["new.py"]} for sha in commits]
+    })
+
+
+def test_webhook_precompute_is_reused():
+    with tempfile.TemporaryDirectory() as directory:
+        ai = FakeAI()
+        pipeline, _ = make_pipeline(directory, ai_service=ai)
+        webhook = WebhookService(pipeline, pipeline.github_service,
+                                 changelog_store=pipeline.changelog_store)
+        webhook.token = WEBHOOK_TOKEN
+
+        push(webhook, "refs/heads/main", HISTORY[3], HISTORY)
+        push(webhook, "refs/tags/v1.0", HISTORY[0])
+        result = push(webhook, "refs/tags/v1.1", HISTORY[2])
+        assert "latest_release" in result["queued"]
+        wait_for(lambda: not webhook._pending)
+        webhook.shutdown(wait=True)
+
+        assert ("v1.0", "v1.1", [HISTORY[2], HISTORY[1]]) in ai.generated
+        calls = len(ai.generated)
+
+        # The user's request for the same range is served without Claude
+        result, status = pipeline.generate_from_github_url({
+            "access_token": OWNER_TOKEN, "repo_url": REPO_URL, "base": "v1.0", "head": "v1.1"
+        })
+        assert status == 200
+        assert result["stored"] is True
+        assert result["notes"] == "Notes for v1.0..v1.1"
+        assert len(ai.generated) == calls
+
+        # So is a lookup of the tag range
+        result, status = pipeline.lookup_release({
+            "access_token": OWNER_TOKEN, "repo_url": REPO_URL, "from": "v1.0", "to": "v1.1"
+        })
+        assert status == 200 and result["notes"] == "Notes for v1.0..v1.1"
+
+
+def test_webhook_without_token_precomputes_nothing():
+    with tempfile.TemporaryDirectory() as directory:
+        ai = FakeAI()
+        pipeline, _ = make_pipeline(directory, ai_service=ai)
+        webhook = WebhookService(pipeline, pipeline.github_service)
+        webhook.token = None
+
+        push(webhook, "refs/heads/main", HISTORY[2], HISTORY)
+        assert push(webhook, "refs/tags/v1.0", HISTORY[0])["queued"] == []
+        webhook.shutdown(wait=True)
+        assert ai.generated == []
+
+
+def main():
+    tests = [test_lookup_with_sha_refs_checks_access, test_generate_with_sha_refs_checks_access,
+             test_webhook_precompute_is_reused, test_webhook_without_token_precomputes_nothing]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
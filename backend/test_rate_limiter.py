@@ -0,0 +1,186 @@
+"""
+Test script for the GitHub rate limit scheduler
+==============================
+Runs on its own (no server, no GitHub access needed):
+
+    python test_rate_limiter.py      or      python -m pytest test_rate_limiter.py
+
+Responses are small stand-ins carrying only the status code, headers and
+text the scheduler reads.
+"""
+
+import sys
+import threading
+import time
+
+from services.rate_limiter import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, RateLimitExceeded, RateLimitScheduler
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None, text=""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text
+
+
+def quota(remaining, reset_in, status_code=200, **headers):
+    return FakeResponse(status_code, {
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(time.time() + reset_in),
+        **headers
+    })
+
+
+def scheduler(**kwargs):
+    kwargs.setdefault("max_wait", {PRIORITY_INTERACTIVE: 0.5, PRIORITY_BACKGROUND: 0.5})
+    return RateLimitScheduler(**kwargs)
+
+
+def test_make_key():
+    key = RateLimitScheduler.make_key("Bearer secret")
+    assert "secret" not in key
+    assert key == RateLimitScheduler.make_key("Bearer secret", "core")
+    assert key != RateLimitScheduler.make_key("Bearer secret", "graphql")
+    assert key != RateLimitScheduler.make_key("Bearer other")
+
+
+def test_priority_is_per_thread():
+    limiter = scheduler()
+    assert limiter.current_priority() == PRIORITY_INTERACTIVE
+    seen = []
+    with limiter.priority(PRIORITY_BACKGROUND):
+        assert limiter.current_priority() == PRIORITY_BACKGROUND
+        thread = threading.Thread(target=lambda: seen.append(limiter.current_priority()))
+        thread.start()
+        thread.join()
+    assert seen == [PRIORITY_INTERACTIVE]
+    assert limiter.current_priority() == PRIORITY_INTERACTIVE
+
+
+def test_background_reserve():
+    # 400 left is below the background reserve of 500: only interactive calls go out
+    limiter = scheduler(background_reserve=500, pace_below=0)
+    key = limiter.make_key("token")
+    limiter.acquire(key, PRIORITY_INTERACTIVE)
+    limiter.release(key, PRIORITY_INTERACTIVE, quota(400, 120))
+
+    try:
+        limiter.acquire(key, PRIORITY_BACKGROUND)
+        assert False, "background call should wait for the reset"
+    except RateLimitExceeded as e:
+        assert 100 < e.retry_after <= 120
+
+    limiter.acquire(key, PRIORITY_INTERACTIVE)
+    limiter.release(key, PRIORITY_INTERACTIVE, quota(399, 120))
+
+
+def test_window_rollover():
+    # Exhausted quota whose window has already reset does not block
+    limiter = scheduler(background_reserve=0)
+    key = limiter.make_key("token")
+    limiter.acquire(key, PRIORITY_BACKGROUND)
+    limiter.release(key, PRIORITY_BACKGROUND, quota(0, -1))
+    limiter.acquire(key, PRIORITY_BACKGROUND)
+
+
+def test_background_waits_for_interactive():
+    limiter = scheduler(max_wait={PRIORITY_INTERACTIVE: 5, PRIORITY_BACKGROUND: 5})
+    key = limiter.make_key("token")
+    limiter.acquire(key, PRIORITY_INTERACTIVE)
+
+    acquired = threading.Event()
+
+    def background():
+        limiter.acquire(key, PRIORITY_BACKGROUND)
+        acquired.set()
+
+    thread = threading.Thread(target=background)
+    thread.start()
+    assert not acquired.wait(0.3)
+
+    # release() wakes the waiting background call right away
+    limiter.release(key, PRIORITY_INTERACTIVE, FakeResponse())
+    assert acquired.wait(0.5)
+    thread.join()
+
+
+def test_retry_after_backoff():
+    limiter = scheduler()
+    key = limiter.make_key("token")
+    limiter.acquire(key, PRIORITY_INTERACTIVE)
+    retry_after = limiter.release(key, PRIORITY_INTERACTIVE,
+                                  FakeResponse(429, {"Retry-After": "2"}))
+    assert retry_after == 2.0
+    assert limiter.stats()["blocked"] == 1
+
+    # Both priorities wait out the backoff; here longer than allowed
+    for priority in (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND):
+        try:
+            limiter.acquire(key, priority)
+            assert False, "call should be blocked by Retry-After"
+        except RateLimitExceeded as e:
+            assert 1 < e.retry_after <= 2
+
+    # Other tokens are not affected
+    limiter.acquire(limiter.make_key("other"), PRIORITY_INTERACTIVE)
+
+
+def test_secondary_and_primary_limits():
+    limiter = scheduler()
+    key = limiter.make_key("token")
+
+    # Secondary limit without Retry-After: exponential backoff from one minute
+    secondary = FakeResponse(403, {}, "You have exceeded a secondary rate limit")
+    limiter.acquire(key, PRIORITY_INTERACTIVE)
+    assert limiter.release(key, PRIORITY_INTERACTIVE, secondary, attempt=0) == 60.0
+    assert limiter.release(key, PRIORITY_INTERACTIVE, secondary, attempt=1) == 120.0
+    assert limiter.release(key, PRIORITY_INTERACTIVE, secondary, attempt=10) == 900.0
+
+    # Primary limit: wait for the window to reset
+    limiter = scheduler()
+    key = limiter.make_key("token")
+    limiter.acquire(key, PRIORITY_INTERACTIVE)
+    retry_after = limiter.release(key, PRIORITY_INTERACTIVE, quota(0, 30, status_code=403))
+    assert 25 < retry_after <= 30
+
+    # A plain 403 (no quota problem) is not retried
+    limiter = scheduler()
+    key = limiter.make_key("token")
+    limiter.acquire(key, PRIORITY_INTERACTIVE)
+    assert limiter.release(key, PRIORITY_INTERACTIVE, FakeResponse(403, {}, "Forbidden")) is None
+
+
+def test_pacing_when_quota_is_low():
+    # 10 calls left for 10 seconds: one call per second
+    limiter = scheduler(background_reserve=0, pace_below=200)
+    key = limiter.make_key("token")
+    limiter.acquire(key, PRIORITY_INTERACTIVE)
+    limiter.release(key, PRIORITY_INTERACTIVE, quota(10, 10))
+    try:
+        limiter.acquire(key, PRIORITY_INTERACTIVE)
+        assert False, "next call should be paced"
+    except RateLimitExceeded as e:
+        assert 0.5 < e.retry_after <= 1.2
+    assert limiter.stats()["low_quota"] == 1
+
+
+def main():
+    tests = [test_make_key, test_priority_is_per_thread, test_background_reserve,
+             test_window_rollover, test_background_waits_for_interactive,
+             test_retry_after_backoff, test_secondary_and_primary_limits,
+             test_pacing_when_quota_is_low]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
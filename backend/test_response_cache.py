@@ -0,0 +1,97 @@
+"""
+Test script for the ShipNote GitHub response cache
+==============================
+Runs on its own (no server, no GitHub access needed):
+
+    python test_response_cache.py      or      python -m pytest test_response_cache.py
+
+Every test uses a fresh disk directory in a temporary directory.
+"""
+
+import os
+import sys
+import tempfile
+
+from services.response_cache import DISK_PRUNE_EVERY, ResponseCache
+
+
+def key(n):
+    return ResponseCache.make_key({"Authorization": "Bearer token"}, f"https://api.github.com/{n}")
+
+
+def store(cache, n, size=100):
+    cache.set(key(n), f'"etag-{n}"', None, None, b"x" * size)
+
+
+def disk_files(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".cache")]
+
+
+def test_make_key():
+    headers = {"Authorization": "Bearer secret", "Accept": "application/json"}
+    assert "secret" not in ResponseCache.make_key(headers, "https://api.github.com/x")
+    assert ResponseCache.make_key(headers, "u", {"b": 1, "a": 2}) == \
+        ResponseCache.make_key(headers, "u", {"a": 2, "b": 1})
+    assert ResponseCache.make_key(headers, "u") != \
+        ResponseCache.make_key({**headers, "Authorization": "Bearer other"}, "u")
+
+
+def test_memory_lru():
+    cache = ResponseCache(max_bytes=250)
+    store(cache, 1)
+    store(cache, 2)
+    cache.get(key(1))
+    store(cache, 3)
+
+    # 2 was used least recently and no longer fits
+    assert cache.get(key(2)) is None
+    assert cache.get(key(1))["etag"] == '"etag-1"'
+    assert cache.stats()["bytes"] == 200
+
+
+def test_disk_survives_restart():
+    with tempfile.TemporaryDirectory() as directory:
+        store(ResponseCache(disk_dir=directory), 1)
+        entry = ResponseCache(disk_dir=directory).get(key(1))
+        assert entry["etag"] == '"etag-1"'
+        assert entry["body"] == b"x" * 100
+
+
+def test_disk_is_bounded():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(disk_dir=directory, disk_max_bytes=50 * 1024)
+        store(cache, "old")
+        os.utime(os.path.join(directory, f"{key('old')}.cache"), (1, 1))
+        store(cache, "read")
+        os.utime(os.path.join(directory, f"{key('read')}.cache"), (1, 1))
+
+        for n in range(DISK_PRUNE_EVERY - 3):
+            store(cache, n, size=1024)
+
+        # Reading from disk refreshes the file, so pruning keeps it
+        assert ResponseCache(disk_dir=directory).get(key("read")) is not None
+        # This write is the one that prunes
+        store(cache, "last", size=1024)
+
+        files = disk_files(directory)
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+        assert size <= 50 * 1024
+        assert f"{key('old')}.cache" not in files
+        assert f"{key('read')}.cache" in files
+
+
+def main():
+    tests = [test_make_key, test_memory_lru, test_disk_survives_restart, test_disk_is_bounded]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Test script for the ShipNote response helpers
+==============================
+Runs on its own (no server needed):
+
+    python test_responses.py      or      python -m pytest test_responses.py
+
+Compression is tested through a tiny Flask app using the same
+after_request hook and request middleware as create_app().
+"""
+
+import gzip
+import json
+import sys
+
+from flask import Flask, Response, jsonify, request
+
+from services.responses import (
+    FastJSONProvider, GzipRequestMiddleware, compress_response, parse_fields, select_fields
+)
+
+
+def make_app(max_bytes=64 * 1024):
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+
+    @app.route("/big")
+    def big():
+        return jsonify({"commits": [{"hash": f"{i:07x}", "message": "feat: ü" * 5} for i in range(200)]})
+
+    @app.route("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    @app.route("/stream")
+    def stream():
+        return Response((f"data: {i}\n\n" for i in range(500)), mimetype="text/event-stream")
+
+    @app.route("/binary")
+    def binary():
+        return Response(b"x" * 5000, mimetype="application/octet-stream")
+
+    @app.route("/echo", methods=["POST"])
+    def echo():
+        return jsonify({"length": request.content_length, "body": request.get_json()})
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, request.accept_encodings)
+
+    app.wsgi_app = GzipRequestMiddleware(app.wsgi_app, max_bytes=max_bytes)
+    return app
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields("") is None
+    assert parse_fields(" , ") is None
+    assert parse_fields("notes, commits.hash,") == ["notes", "commits.hash"]
+    assert parse_fields(["notes", " count "]) == ["notes", "count"]
+
+
+def test_select_fields():
+    data = {
+        "success": True,
+        "notes": "## Features",
+        "commit_count": 2,
+        "commits": [
+            {"hash": "a1b2c3d", "message": "feat: x", "author": "Jane"},
+            {"hash": "e4f5a6b", "message": "fix: y", "author": "John"},
+        ],
+        "repo": {"owner": "acme", "name": "app"},
+    }
+
+    # None keeps everything
+    assert select_fields(data, None) is data
+
+    selected = select_fields(data, ["notes", "commits.hash", "repo.name"])
+    assert selected == {
+        "success": True,
+        "notes": "## Features",
+        "commits": [{"hash": "a1b2c3d"}, {"hash": "e4f5a6b"}],
+        "repo": {"name": "app"},
+    }
+
+    # A whole key wins over a dotted path below it, in either order
+    assert select_fields(data, ["commits", "commits.hash"])["commits"] == data["commits"]
+    assert select_fields(data, ["commits.hash", "commits"])["commits"] == data["commits"]
+
+    # success / error are always kept; unknown names are ignored
+    failure = {"success": False, "error": "boom", "notes": None}
+    assert select_fields(failure, ["missing"]) == {"success": False, "error": "boom"}
+
+    # Non-dict payloads are returned as is
+    assert select_fields(["a"], ["x"]) == ["a"]
+
+
+def test_fast_json_provider():
+    app = Flask(__name__)
+    provider = FastJSONProvider(app)
+    text = provider.dumps({"b": 1, "a": "ü", 3: "int key"})
+    # Keys keep their order and non-ASCII text is not escaped
+    assert text.index('"b"') < text.index('"a"')
+    assert "ü" in text
+    assert provider.loads(text)["a"] == "ü"
+
+
+def test_compress_response():
+    client = make_app().test_client()
+
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    body = json.loads(gzip.decompress(response.get_data()))
+    assert len(body["commits"]) == 200
+
+    # No Accept-Encoding: plain body
+    response = client.get("/big")
+    assert "Content-Encoding" not in response.headers
+    assert len(response.get_json()["commits"]) == 200
+
+    # Small bodies, streams and non-text types are left alone
+    assert "Content-Encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data().startswith(b"data: 0")
+    assert "Content-Encoding" not in client.get("/binary", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def post(client, body, encoding="gzip"):
+    return client.post("/echo", data=body, content_type="application/json",
+                       headers={"Content-Encoding": encoding} if encoding else {})
+
+
+def test_gzip_request_bodies():
+    client = make_app().test_client()
+    payload = json.dumps({"commits": ["feat: x"] * 100}).encode("utf-8")
+
+    response = post(client, gzip.compress(payload))
+    assert response.status_code == 200
+    assert response.get_json() == {"length": len(payload), "body": json.loads(payload)}
+
+    # x-gzip is the same encoding; identity and no header pass through
+    assert post(client, gzip.compress(payload), "x-gzip").status_code == 200
+    assert post(client, payload, "identity").get_json()["body"] == json.loads(payload)
+    assert post(client, payload, None).get_json()["body"] == json.loads(payload)
+
+
+def test_gzip_request_errors():
+    client = make_app(max_bytes=64 * 1024).test_client()
+    payload = json.dumps({"commits": ["feat: x"] * 100}).encode("utf-8")
+    compressed = gzip.compress(payload)
+
+    # A small body that inflates past the limit (gzip bomb) is refused early
+    bomb = gzip.compress(b"[" + b" " * (10 * 1024 * 1024) + b"]")
+    assert len(bomb) < 64 * 1024
+    response = post(client, bomb)
+    assert response.status_code == 413
+    assert response.get_json()["success"] is False
+
+    # So is a compressed body that is already too large
+    assert post(client, b"x" * (65 * 1024)).status_code == 413
+
+    response = post(client, b"not gzip at all")
+    assert response.status_code == 400
+    assert "not valid gzip" in response.get_json()["error"]
+
+    response = post(client, compressed[:len(compressed) // 2])
+    assert response.status_code == 400
+    assert "truncated" in response.get_json()["error"]
+
+    response = post(client, payload, "br")
+    assert response.status_code == 415
+    assert "br" in response.get_json()["error"]
+
+
+def main():
+    tests = [test_parse_fields, test_select_fields, test_fast_json_provider,
+             test_compress_response, test_gzip_request_bodies, test_gzip_request_errors]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""
+WSGI entry point for production servers
+========================================
+Builds the app with all fork-safe services preloaded, so a pre-fork server
+(see gunicorn.conf.py) loads them once in its master process:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import app as shipnote
+
+app = shipnote.create_app(preload=True)
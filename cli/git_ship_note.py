@@ -5,76 +5,412 @@ import requests
 import argparse
 import tempfile
 import shutil
+import hashlib
+import gzip
+import re
 import os
 import sys
 import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
 from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+from rich.text import Text
 
 console = Console()
 
 API_URL = os.getenv("GITSCRIBE_API", "http://localhost:5000")
 
-def clone_repo(git_url, depth=100):
-    temp_dir = tempfile.mkdtemp(prefix="gitscribe_repo_")
-    console.print(f"Cloning repository (last {depth} commits)...")
+class GitScribeError(Exception):
+    """A step failed; main() prints the message and exits, batch mode records it per repository"""
+
+def get_cache_dir():
+    """Per-user directory for cached clones (GITSCRIBE_CACHE_DIR overrides it)"""
+    override = os.getenv("GITSCRIBE_CACHE_DIR")
+    if override:
+        return override
+    if sys.platform.startswith("win"):
+        base = os.getenv("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform.startswith("darwin"):
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "gitscribe", "repos")
+
+def cached_repo_path(git_url):
+    """Cache directory of one repository URL (readable name plus a hash of the URL)"""
+    normalized = git_url.strip().rstrip("/")
+    if normalized.endswith(".git"):
+        normalized = normalized[:-4]
+    name = re.sub(r"[^\w.-]", "_", normalized.rsplit("/", 1)[-1])[:40] or "repo"
+    digest = hashlib.sha256(normalized.lower().encode("utf-8")).hexdigest()[:16]
+    return os.path.join(get_cache_dir(), f"{name}-{digest}")
+
+def clone_repo(git_url, dest=None):
+    """
+    Blobless partial clone without a checkout: only commits and trees are
+    downloaded, which is all that `git log --name-status` reads.
+    Clones into a new temporary directory unless dest is given.
+    """
+    target = dest or tempfile.mkdtemp(prefix="gitscribe_repo_")
+    console.print("Cloning repository (commits and file lists only)...")
     result = subprocess.run(
-        ["git", "clone", "--depth", str(depth), git_url, temp_dir],
+        ["git", "clone", "--filter=blob:none", "--no-checkout", "--quiet", git_url, target],
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         text=True,
     )
     if result.returncode != 0:
-        console.print(f"Git clone failed:\n{result.stderr}")
-        remove_readonly_and_delete(temp_dir)
-        sys.exit(1)
+        if os.path.exists(target):
+            remove_readonly_and_delete(target)
+        raise GitScribeError(f"Git clone failed:\n{result.stderr}")
     console.print("Repository cloned successfully")
-    return temp_dir
+    return target
+
+# One lock per cache entry, so batch threads never update the same clone at once
+_repo_locks = {}
+_repo_locks_guard = threading.Lock()
+
+def repo_lock(path):
+    with _repo_locks_guard:
+        return _repo_locks.setdefault(path, threading.Lock())
+
+def get_cached_repo(git_url):
+    """
+    Return an up-to-date partial clone of git_url from the cache directory.
+    The first run clones; later runs only fetch objects that are new.
+    """
+    path = cached_repo_path(git_url)
+    with repo_lock(path):
+        return update_cached_repo(git_url, path)
+
+def update_cached_repo(git_url, path):
+    """Fetch into the clone at path, or clone git_url there (caller holds the path's lock)"""
+    if os.path.isdir(os.path.join(path, ".git")):
+        console.print("Fetching new commits into cached clone...")
+        # The clone remembers its blob filter, so the fetch skips blobs too
+        result = subprocess.run(
+            ["git", "-C", path, "fetch", "--prune", "--quiet", "origin"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if result.returncode == 0:
+            return path
+        console.print(f"Updating the cached clone failed, cloning again:\n{result.stderr}")
+        remove_readonly_and_delete(path)
+    elif os.path.exists(path):
+        # Left behind by something else (not a clone): it would block the rename below
+        console.print(f"Replacing {path}, which is not a git clone")
+        if os.path.isdir(path):
+            remove_readonly_and_delete(path)
+        else:
+            os.remove(path)
+
+    os.makedirs(get_cache_dir(), exist_ok=True)
+    # Clone next to the cache entry and rename, so an interrupted clone is never reused.
+    # mkdtemp gives every process and thread its own directory.
+    temp_path = tempfile.mkdtemp(prefix=f"{os.path.basename(path)}.tmp-", dir=get_cache_dir())
+    clone_repo(git_url, dest=temp_path)
+    try:
+        os.replace(temp_path, path)
+    except OSError:
+        # Another process finished the same clone first; use theirs
+        remove_readonly_and_delete(temp_path)
+        if not os.path.isdir(os.path.join(path, ".git")):
+            raise
+    return path
+
+def find_local_repo(path):
+    """Top-level directory of the git repository containing path"""
+    result = subprocess.run(
+        ["git", "-C", path, "rev-parse", "--show-toplevel"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise GitScribeError(f"Not a git repository: {os.path.abspath(path)}")
+    repo_path = result.stdout.strip()
+
+    shallow = subprocess.run(
+        ["git", "-C", repo_path, "rev-parse", "--is-shallow-repository"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if shallow.stdout.strip() == "true":
+        console.print("[yellow]This is a shallow clone; older commits may be missing[/yellow]")
+
+    console.print(f"Using local repository: {repo_path}")
+    return repo_path
+
+def get_log_ref(repo_path):
+    """The remote's default branch in a clone (fetches do not move local HEAD), else HEAD"""
+    result = subprocess.run(
+        ["git", "-C", repo_path, "rev-parse", "--verify", "--quiet", "origin/HEAD"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return "origin/HEAD" if result.returncode == 0 else "HEAD"
 
-def get_raw_git_log(repo_path, limit=100):
+def get_remote_head(git_url):
+    """Commit SHA of the remote's HEAD from `git ls-remote` (no clone needed), or None"""
+    try:
+        result = subprocess.run(
+            ["git", "ls-remote", "--", git_url, "HEAD"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=30,
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+        )
+    except subprocess.TimeoutExpired:
+        return None
+    fields = result.stdout.split()
+    return fields[0] if result.returncode == 0 and fields else None
+
+def get_local_head(repo_path, ref="HEAD"):
+    """Commit SHA that ref points at in a local repository, or None"""
+    result = subprocess.run(
+        ["git", "-C", repo_path, "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return result.stdout.strip() if result.returncode == 0 else None
+
+def get_server_info(api_url):
+    """
+    What the backend reports on /health, or None if it is unreachable:
+    the model and prompt version it generates with, and whether it accepts
+    gzip-compressed request bodies
+    """
+    try:
+        response = requests.get(f"{api_url}/health", timeout=5)
+        data = response.json() if response.status_code == 200 else None
+    except (requests.RequestException, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    # Older servers do not report these; their results are cached as "unversioned"
+    # and requests to them are sent uncompressed
+    return {
+        "model": data.get("model"),
+        "prompt_version": data.get("prompt_version"),
+        "gzip": "gzip" in (data.get("request_encodings") or [])
+    }
+
+RESULT_CACHE_ENTRIES = 200
+
+def result_cache_path(source, head_sha, limit, server):
+    """
+    Cache file of a rendered changelog. The key covers everything the
+    changelog depends on: the repository, the commit it was read from, the
+    commit limit and the model / prompt version of the backend.
+    """
+    key = json.dumps([source, head_sha, limit, server.get("model"), server.get("prompt_version")])
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(get_cache_dir(), ".changelogs", f"{digest}.json")
+
+def load_cached_result(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or not entry.get("notes"):
+        return None
+    # Recently used entries survive pruning
+    os.utime(path, None)
+    return entry
+
+def save_cached_result(path, changelog, commit_count, head_sha):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    entry = {"notes": changelog, "commit_count": commit_count, "head": head_sha, "created_at": time.time()}
+    temp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(temp_path, path)
+
+    # Keep the most recently used entries only
+    entries = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json")]
+    if len(entries) > RESULT_CACHE_ENTRIES:
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for stale in entries[RESULT_CACHE_ENTRIES:]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+def show_cached_changelog(path):
+    """Display a cached changelog; returns False if there is none"""
+    entry = load_cached_result(path)
+    if entry is None:
+        return False
+    created = time.strftime("%b %d, %I:%M %p", time.localtime(entry.get("created_at", 0)))
+    console.print(f"[green]No new commits since {created}; showing the cached changelog (--refresh regenerates it)[/green]")
+    display_changelog_terminal(entry["notes"], entry["commit_count"])
+    offer_to_save(entry["notes"], entry["commit_count"])
+    return True
+
+# File statuses of --name-status, named like the GitHub API names them
+FILE_STATUSES = {
+    "A": "added",
+    "M": "modified",
+    "D": "removed",
+    "R": "renamed",
+    "C": "copied",
+    "T": "changed"
+}
+
+def get_git_commits(repo_path, limit=100, ref="HEAD", detect_renames=False):
+    """Read up to limit commits (with their changed files) as the commit records /api/generate-notes takes"""
     console.print(f"Reading up to last {limit} commits...")
     
-    # Get commit info with files changed
+    # Records start with \x1e and fields are separated by \x1f, so subjects
+    # and file names can contain anything
     cmd = [
         "git", "-C", repo_path, "log", f"-{limit}",
-        '--pretty=format:%h|%cd|%an|%s',
+        '--pretty=format:%x1e%h%x1f%cd%x1f%an%x1f%s',
         '--date=format:%b %d, %I:%M %p',
-        '--name-status'  # Shows file changes (A=added, M=modified, D=deleted)
+        '--name-status',  # Shows file changes (A=added, M=modified, D=deleted)
+        # Rename detection would download file contents in partial clones
+        '--find-renames' if detect_renames else '--no-renames',
+        ref
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    result = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="replace")
     if result.returncode != 0:
-        console.print("Failed to get git log")
-        sys.exit(1)
+        raise GitScribeError(f"Failed to get git log: {result.stderr.strip()}")
     
-    # Count actual commits retrieved
-    commits = [line for line in result.stdout.strip().split('\n') if '|' in line]
-    actual_count = len(commits)
-    
-    console.print(f"{actual_count} commit{'s' if actual_count != 1 else ''} extracted")
-    return result.stdout.strip(), actual_count
+    commits = parse_git_log(result.stdout)
+    console.print(f"{len(commits)} commit{'s' if len(commits) != 1 else ''} extracted")
+    return commits
+
+def parse_git_log(raw_log):
+    """Commit records from the output of the git log command in get_git_commits()"""
+    commits = []
+    for record in raw_log.split("\x1e"):
+        lines = record.strip("\n").split("\n")
+        fields = lines[0].split("\x1f")
+        if len(fields) != 4:
+            continue
+        short_hash, date, author, subject = fields
+        commit = {"hash": short_hash, "date": date, "author": author, "message": subject}
+        
+        files = []
+        for line in lines[1:]:
+            parts = line.split("\t")
+            if len(parts) < 2 or not parts[0]:
+                continue
+            # Renames and copies list the old and the new path
+            files.append({"filename": parts[-1], "status": FILE_STATUSES.get(parts[0][0], "modified")})
+        if files:
+            commit["files"] = files
+            commit["files_changed"] = len(files)
+        commits.append(commit)
+    return commits
+
+def request_changelog(commits, api_url, stream=False, compress=False):
+    """
+    POST the commits to the backend; with stream=True, servers that support
+    it answer with Server-Sent Events
 
-def generate_changelog(raw_log, api_url):
+    With compress=True (for servers that report gzip support on /health)
+    bodies of 1 KB or more are gzip-compressed; if the server still refuses
+    the encoding, the request is sent once more uncompressed.
+    """
     console.print("Sending commit data to AI backend for changelog generation...")
+    body = json.dumps({"commits": commits, "stream": stream}).encode("utf-8")
+    if compress and len(body) >= 1024:
+        response = post_changelog_body(gzip.compress(body, compresslevel=6), api_url, stream, "gzip")
+        if response.status_code not in (400, 415):
+            return response
+        response.close()
+    return post_changelog_body(body, api_url, stream)
+
+def post_changelog_body(body, api_url, stream, encoding=None):
+    headers = {"Content-Type": "application/json"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
     try:
-        response = requests.post(
-            url=f"{api_url}/api/generate-from-text",
-            json={"git_log_text": raw_log},
+        return requests.post(
+            url=f"{api_url}/api/generate-notes",
+            data=body,
+            headers=headers,
+            stream=stream,
             timeout=90
         )
     except requests.RequestException as e:
-        console.print(f"Failed to reach backend API: {e}")
-        sys.exit(1)
+        raise GitScribeError(f"Failed to reach backend API: {e}")
 
+def read_changelog_response(response):
+    """Changelog text from a (non-streamed) JSON response"""
     if response.status_code == 200:
         data = response.json()
         if data.get("success"):
             console.print("Changelog generated successfully!\n")
             return data.get("notes")
         else:
-            console.print(f"API error: {data.get('error')}")
-            sys.exit(1)
+            raise GitScribeError(f"API error: {data.get('error')}")
     else:
-        console.print(f"Request failed with status code {response.status_code}")
-        sys.exit(1)
+        raise GitScribeError(f"Request failed with status code {response.status_code}")
+
+def generate_changelog(commits, api_url, compress=False):
+    return read_changelog_response(request_changelog(commits, api_url, compress=compress))
+
+def is_event_stream(response):
+    return response.status_code == 200 and response.headers.get("Content-Type", "").startswith("text/event-stream")
+
+def iter_events(response):
+    """Yield (event, data) pairs of a Server-Sent Events response"""
+    response.encoding = "utf-8"
+    event, data = "message", []
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                field, _, value = line.partition(":")
+                if field == "event":
+                    event = value.strip()
+                elif field == "data":
+                    data.append(value[1:] if value.startswith(" ") else value)
+            elif data:
+                yield event, json.loads("\n".join(data))
+                event, data = "message", []
+    except requests.RequestException as e:
+        raise GitScribeError(f"Lost connection to backend API: {e}")
+
+def stream_changelog_terminal(response, commit_count):
+    """
+    Display a streamed changelog while it is generated
+
+    Finished lines are printed as they complete; the line being written is
+    shown below them and replaced until it is done.
+    """
+    print_changelog_header(commit_count)
+    changelog, pending = "", ""
+    with Live(Text(""), console=console, refresh_per_second=12, transient=True) as live:
+        for event, data in iter_events(response):
+            if event == "notes":
+                changelog += data["text"]
+                pending += data["text"]
+                *lines, pending = pending.split("\n")
+                for line in lines:
+                    print_changelog_line(line)
+                live.update(Text(pending.strip(), style="dim"))
+            elif event == "error":
+                live.stop()
+                raise GitScribeError(f"API error: {data.get('error')}")
+            elif event == "done":
+                changelog = data.get("notes") or changelog
+    print_changelog_line(pending)
+    print_changelog_footer()
+    return changelog
 
 def remove_readonly(func, path, excinfo):
     os.chmod(path, stat.S_IWRITE)
@@ -83,9 +419,16 @@ def remove_readonly(func, path, excinfo):
 def remove_readonly_and_delete(path):
     shutil.rmtree(path, onerror=remove_readonly)
 
-def display_changelog_terminal(changelog_text, commit_count):
-    """Display changelog in terminal with colors and formatting"""
-    
+SECTION_COLORS = {
+    'Features': 'green',
+    'Fixes': 'red',
+    'Improvements': 'blue',
+    'Documentation': 'cyan',
+    'Deletions': 'magenta',
+    'Other': 'yellow'
+}
+
+def print_changelog_header(commit_count):
     # Simple big yellow title with commit count
     console.print("\n")
     console.print("[bold yellow]" + "="*70 + "[/bold yellow]")
@@ -93,55 +436,55 @@ def display_changelog_terminal(changelog_text, commit_count):
     console.print(f"[bold yellow]                      (Last {commit_count} commit{'s' if commit_count != 1 else ''})                     [/bold yellow]")
     console.print("[bold yellow]" + "="*70 + "[/bold yellow]")
     console.print("\n")
+
+def print_changelog_footer():
+    console.print("\n" + "="*70 + "\n")
+
+def print_changelog_line(line):
+    """Print one line of the changelog: section headers and bullets get colors, other lines are skipped"""
+    line = line.strip()
+    if not line:
+        return
     
-    # Parse and display sections with colors
-    lines = changelog_text.strip().split('\n')
-    
-    section_colors = {
-        'Features': 'green',
-        'Fixes': 'red',
-        'Improvements': 'blue',
-        'Documentation': 'cyan',
-        'Deletions': 'magenta',
-        'Other': 'yellow'
-    }
+    # Section headers
+    if line.startswith('## '):
+        section_name = line.replace('##', '').strip().rstrip(':')
+        color = 'white'
+        
+        # Find matching color
+        for key, col in SECTION_COLORS.items():
+            if key.lower() in section_name.lower():
+                color = col
+                break
+        
+        # Simple section header without lines
+        console.print(f"\n[bold {color}]*** {section_name.upper()} ***[/bold {color}]\n")
     
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
+    # Bullet points
+    elif line.startswith('- '):
+        item = line[2:].strip()
         
-        # Section headers
-        if line.startswith('## '):
-            section_name = line.replace('##', '').strip().rstrip(':')
-            color = 'white'
-            
-            # Find matching color
-            for key, col in section_colors.items():
-                if key.lower() in section_name.lower():
-                    color = col
-                    break
-            
-            # Simple section header without lines
-            console.print(f"\n[bold {color}]*** {section_name.upper()} ***[/bold {color}]\n")
+        # Highlight timestamps in yellow
+        if '(' in item and ')' in item:
+            parts = item.rsplit('(', 1)
+            text_part = parts[0].strip()
+            time_part = '(' + parts[1]
+            console.print(f"  [white]•[/white] {text_part} [bold yellow]{time_part}[/bold yellow]")
+        else:
+            console.print(f"  [white]•[/white] {item}")
         
-        # Bullet points
-        elif line.startswith('- '):
-            item = line[2:].strip()
-            
-            # Highlight timestamps in yellow
-            if '(' in item and ')' in item:
-                parts = item.rsplit('(', 1)
-                text_part = parts[0].strip()
-                time_part = '(' + parts[1]
-                console.print(f"  [white]•[/white] {text_part} [bold yellow]{time_part}[/bold yellow]")
-            else:
-                console.print(f"  [white]•[/white] {item}")
-            
-            # Add extra space after each bullet point
-            console.print()
+        # Add extra space after each bullet point
+        console.print()
+
+def display_changelog_terminal(changelog_text, commit_count):
+    """Display changelog in terminal with colors and formatting"""
+    print_changelog_header(commit_count)
     
-    console.print("\n" + "="*70 + "\n")
+    # Parse and display sections with colors
+    for line in changelog_text.strip().split('\n'):
+        print_changelog_line(line)
+    
+    print_changelog_footer()
 
 def format_changelog_md(changelog_text, commit_count):
     """Format changelog for markdown file"""
@@ -201,28 +544,293 @@ def ask_save_to_file():
         else:
             console.print("[red]Please enter 'yes' or 'no'[/red]")
 
-def get_commit_count():
-    """Ask user how many commits to analyze (1-100)"""
+# Commits a changelog can cover when cloning a URL (local repositories have no cap)
+MAX_URL_LIMIT = 100
+
+def check_limit(limit, remote):
+    """Error message for an invalid --limit, or None if it is valid (or not given)"""
+    if limit is None:
+        return None
+    if limit < 1:
+        return "--limit must be at least 1"
+    if remote and limit > MAX_URL_LIMIT:
+        return f"--limit must be between 1 and {MAX_URL_LIMIT} with --url"
+    return None
+
+def get_commit_count(max_count=MAX_URL_LIMIT):
+    """Ask user how many commits to analyze (1-max_count, or any positive number if max_count is None)"""
+    allowed = f"1-{max_count}, " if max_count else ""
     while True:
         try:
-            response = console.input("[cyan]How many commits do you want to analyze? (1-100, default 50):[/cyan] ").strip()
+            response = console.input(f"[cyan]How many commits do you want to analyze? ({allowed}default 50):[/cyan] ").strip()
             if not response:
                 return 50  # Default
             count = int(response)
-            if 1 <= count <= 100:
+            if count >= 1 and (max_count is None or count <= max_count):
                 return count
+            elif max_count:
+                console.print(f"[red]Please enter a number between 1 and {max_count}[/red]")
             else:
-                console.print("[red]Please enter a number between 1 and 100[/red]")
+                console.print("[red]Please enter a positive number[/red]")
         except ValueError:
             console.print("[red]Please enter a valid number[/red]")
 
-def main():
-    parser = argparse.ArgumentParser(description="GitScribe CLI - Generate a changelog from a GitHub repo URL")
-    parser.add_argument("-u", "--url", type=str, help="GitHub repository URL to clone and analyze")
-    parser.add_argument("-n", "--limit", type=int, help="Number of recent commits to include (1-100)")
-    parser.add_argument("--api-url", type=str, default=API_URL, help="Backend API URL (default http://localhost:5000)")
-    parser.add_argument("--keep-temp", action="store_true", help="Keep temporary cloned repository (for debugging)")
-    args = parser.parse_args()
+def show_changelog(commits, api_url, result_cache=None, head_sha=None, compress=False):
+    """Generate the changelog, print it and offer to save it as Markdown (and to result_cache, if given)"""
+    commit_count = len(commits)
+    response = request_changelog(commits, api_url, stream=True, compress=compress)
+    if is_event_stream(response):
+        changelog = stream_changelog_terminal(response, commit_count)
+    else:
+        # Older servers ignore "stream" and answer with the whole changelog
+        changelog = read_changelog_response(response)
+        display_changelog_terminal(changelog, commit_count)
+    
+    if result_cache and changelog:
+        save_cached_result(result_cache, changelog, commit_count, head_sha)
+    offer_to_save(changelog, commit_count)
+
+def offer_to_save(changelog, commit_count):
+    # Ask user if they want to save to file
+    if ask_save_to_file():
+        save_to_temp_markdown(changelog, commit_count)
+    else:
+        console.print("[blue]Exiting without saving file.[/blue]")
+
+def parse_batch_file(path):
+    """
+    Read the targets of a batch file: one "SOURCE [RANGE]" per line
+
+    SOURCE is a repository URL or a local path, RANGE a git revision range
+    (v1.0..v1.1) or a single ref; without it the recent commits of the
+    default branch are used. Blank lines and lines starting with # are skipped.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError as e:
+        raise GitScribeError(f"Cannot read batch file: {e}")
+
+    targets = []
+    for number, line in enumerate(lines, 1):
+        parts = line.split()
+        if not parts or parts[0].startswith("#"):
+            continue
+        if len(parts) > 2:
+            raise GitScribeError(f"{path}:{number}: expected 'SOURCE [RANGE]', got: {line.strip()}")
+        targets.append({"source": parts[0], "range": parts[1] if len(parts) > 1 else None})
+    return targets
+
+def is_remote_source(source):
+    """URLs (https://, ssh://, git@host:owner/repo) are cloned, anything else is a local path"""
+    return "://" in source or re.match(r"^[\w.-]+@[\w.-]+:", source) is not None
+
+def qualify_range(repo_path, rev_range):
+    """
+    Point the branch names of a range at the remote branches: fetches into a
+    clone update origin/<branch>, not the local branch created by the clone
+    """
+    parts = re.split(r"(\.\.\.?)", rev_range)
+    for index, part in enumerate(parts):
+        if not part or part.startswith(".."):
+            continue
+        result = subprocess.run(
+            ["git", "-C", repo_path, "rev-parse", "--verify", "--quiet", f"refs/remotes/origin/{part}"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if result.returncode == 0:
+            parts[index] = f"origin/{part}"
+    return "".join(parts)
+
+def batch_output_names(targets):
+    """One Markdown file name per target, from the repository name and the range"""
+    names = set()
+    for target in targets:
+        source = target["source"].rstrip("/\\")
+        if source.endswith(".git"):
+            source = source[:-4]
+        base = re.sub(r"[^\w.-]", "_", re.split(r"[/\\:]", source)[-1])[:40] or "repo"
+        if target["range"]:
+            base += "-" + re.sub(r"[^\w.-]", "_", target["range"])[:60]
+        name, suffix = base, 2
+        while name in names:
+            name, suffix = f"{base}-{suffix}", suffix + 1
+        names.add(name)
+        target["output"] = f"{name}.md"
+
+def read_batch_source(source, source_targets, limit, no_cache):
+    """
+    Clone or fetch one repository and read the log of each of its targets.
+    Temporary clones are deleted once the logs are read.
+    """
+    start = time.perf_counter()
+    remote = is_remote_source(source)
+    if not remote:
+        repo_path = find_local_repo(source)
+    elif no_cache:
+        repo_path = clone_repo(source)
+    else:
+        repo_path = get_cached_repo(source)
+
+    try:
+        for target in source_targets:
+            if target["range"]:
+                ref = qualify_range(repo_path, target["range"]) if remote else target["range"]
+            else:
+                ref = get_log_ref(repo_path) if remote else "HEAD"
+            target["commits"] = get_git_commits(repo_path, limit, ref, detect_renames=not remote)
+            target["commit_count"] = len(target["commits"])
+    finally:
+        if remote and no_cache:
+            remove_readonly_and_delete(repo_path)
+    return time.perf_counter() - start
+
+def generate_batch_changelog(target, api_url, output_dir, compress=False, attempts=3):
+    """Generate one target's changelog and write it to output_dir, retrying when the server is busy"""
+    start = time.perf_counter()
+    for attempt in range(attempts):
+        response = request_changelog(target["commits"], api_url, compress=compress)
+        if response.status_code not in (429, 503) or attempt == attempts - 1:
+            break
+        # The server is at its generation limit; it says when to come back
+        try:
+            retry_after = float(response.headers.get("Retry-After", 5))
+        except ValueError:
+            retry_after = 5
+        time.sleep(min(retry_after, 60))
+    changelog = read_changelog_response(response)
+
+    path = os.path.join(output_dir, target["output"])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(format_changelog_md(changelog, target["commit_count"]))
+    target["generate_seconds"] = time.perf_counter() - start
+    return path
+
+def run_batch(batch_file, output_dir, limit, jobs, concurrency, api_url, no_cache):
+    """
+    Generate changelogs for every target of a batch file
+
+    Repositories are cloned / fetched by a pool of `jobs` workers (each
+    repository once, however many ranges it is listed with), and their
+    changelogs are requested from the backend as soon as their logs are
+    read, at most `concurrency` at a time.
+
+    Returns:
+        The exit code: 0 if every changelog was written, else 1
+    """
+    targets = parse_batch_file(batch_file)
+    if not targets:
+        raise GitScribeError(f"No repositories listed in {batch_file}")
+    batch_output_names(targets)
+    os.makedirs(output_dir, exist_ok=True)
+
+    server = get_server_info(api_url)
+    compress = bool(server and server["gzip"])
+
+    by_source = {}
+    for target in targets:
+        by_source.setdefault(target["source"], []).append(target)
+
+    # The single-repository steps print progress messages that would
+    # interleave; they are silenced and each finished target gets one line
+    out = Console()
+    out.print(f"Generating {len(targets)} changelog{'s' if len(targets) != 1 else ''} "
+                  f"from {len(by_source)} repositor{'ies' if len(by_source) != 1 else 'y'} "
+                  f"({jobs} clone/fetch workers, {concurrency} generation requests at a time)...")
+    start = time.perf_counter()
+
+    quiet, console.quiet = console.quiet, True
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as fetch_pool, \
+                ThreadPoolExecutor(max_workers=concurrency) as generate_pool:
+            fetches = {
+                fetch_pool.submit(read_batch_source, source, source_targets, limit, no_cache): source
+                for source, source_targets in by_source.items()
+            }
+            generations = {}
+            for future in as_completed(fetches):
+                for target in by_source[fetches[future]]:
+                    try:
+                        target["fetch_seconds"] = future.result()
+                    except Exception as e:
+                        target["error"] = str(e)
+                        report_batch_target(out, target)
+                        continue
+                    if not target["commit_count"]:
+                        target["error"] = "No commits found"
+                        report_batch_target(out, target)
+                        continue
+                    generations[generate_pool.submit(
+                        generate_batch_changelog, target, api_url, output_dir, compress
+                    )] = target
+
+            for future in as_completed(generations):
+                target = generations[future]
+                try:
+                    target["path"] = future.result()
+                except Exception as e:
+                    target["error"] = str(e)
+                report_batch_target(out, target)
+    finally:
+        console.quiet = quiet
+
+    print_batch_summary(out, targets, output_dir, time.perf_counter() - start)
+    return 1 if any(target.get("error") for target in targets) else 0
+
+def report_batch_target(out, target):
+    label = target["source"] + (f" {target['range']}" if target["range"] else "")
+    if target.get("error"):
+        out.print(f"[red]✗[/red] {label}: {' '.join(target['error'].split())}", highlight=False)
+    else:
+        out.print(f"[green]✓[/green] {label} -> {target['path']}", highlight=False)
+
+def print_batch_summary(out, targets, output_dir, seconds):
+    table = Table(title="Batch summary")
+    table.add_column("Repository")
+    table.add_column("Range")
+    table.add_column("Commits", justify="right")
+    table.add_column("Fetch", justify="right")
+    table.add_column("Generate", justify="right")
+    table.add_column("Result")
+
+    def duration(value):
+        return f"{value:.1f}s" if value is not None else "-"
+
+    for target in targets:
+        error = target.get("error")
+        table.add_row(
+            target["source"],
+            target["range"] or "latest",
+            str(target.get("commit_count", "-")),
+            duration(target.get("fetch_seconds")),
+            duration(target.get("generate_seconds")),
+            f"[red]{' '.join(error.split())}[/red]" if error else target["output"]
+        )
+    out.print(table)
+
+    written = sum(1 for target in targets if not target.get("error"))
+    out.print(f"{written}/{len(targets)} changelogs written to {os.path.abspath(output_dir)} in {seconds:.1f}s")
+
+def run_single(args):
+    info = get_server_info(args.api_url)
+    compress = bool(info and info["gzip"])
+    # Rendered changelogs are cached by repository, HEAD, limit and server
+    # prompt version (unless --no-cache, or the server is unreachable)
+    server = None if args.no_cache else info
+
+    if args.repo:
+        # Local mode: the history is already on disk, nothing to clone or clean up
+        repo_path = find_local_repo(args.repo)
+        commit_limit = args.limit if args.limit else get_commit_count(max_count=None)
+        head = get_local_head(repo_path) if server else None
+        result_cache = result_cache_path(f"local:{repo_path}", head, commit_limit, server) if head else None
+        if result_cache and not args.refresh and show_cached_changelog(result_cache):
+            return
+        commits = get_git_commits(repo_path, commit_limit, detect_renames=True)
+        show_changelog(commits, args.api_url, result_cache, head, compress)
+        return
 
     git_url = args.url
     if not git_url:
@@ -234,25 +842,69 @@ def main():
     # Get commit count from user if not provided via CLI arg
     commit_limit = args.limit if args.limit else get_commit_count()
 
-    repo_path = clone_repo(git_url, depth=commit_limit)
+    # An unchanged remote HEAD means the cached changelog is still current:
+    # no clone, fetch or generation needed
+    head = get_remote_head(git_url) if server else None
+    if head and not args.refresh:
+        if show_cached_changelog(result_cache_path(cached_repo_path(git_url), head, commit_limit, server)):
+            return
+
+    if args.no_cache:
+        repo_path = clone_repo(git_url)
+    else:
+        repo_path = get_cached_repo(git_url)
 
     try:
-        raw_log, commit_count = get_raw_git_log(repo_path, commit_limit)
-        changelog = generate_changelog(raw_log, args.api_url)
-        display_changelog_terminal(changelog, commit_count)
-        
-        # Ask user if they want to save to file
-        if ask_save_to_file():
-            save_to_temp_markdown(changelog, commit_count)
-        else:
-            console.print("[blue]Exiting without saving file.[/blue]")
+        log_ref = get_log_ref(repo_path)
+        commits = get_git_commits(repo_path, commit_limit, log_ref)
+        # Key the result by what was actually read: the fetch may have
+        # brought commits pushed after ls-remote ran
+        head = get_local_head(repo_path, log_ref) if server else None
+        result_cache = result_cache_path(cached_repo_path(git_url), head, commit_limit, server) if head else None
+        show_changelog(commits, args.api_url, result_cache, head, compress)
             
     finally:
-        if not args.keep_temp:
+        if not args.no_cache:
+            console.print(f"Cached clone kept at: {repo_path}")
+        elif not args.keep_temp:
             console.print("Cleaning up temporary repository clone...")
             remove_readonly_and_delete(repo_path)
         else:
             console.print(f"Temporary repository kept at: {repo_path}")
 
+def main():
+    parser = argparse.ArgumentParser(description="GitScribe CLI - Generate a changelog from a GitHub repo URL or a local repository")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("-u", "--url", type=str, help="GitHub repository URL to clone and analyze")
+    source.add_argument("-r", "--repo", nargs="?", const=".", metavar="PATH",
+                        help="Read commits from a local repository instead of cloning (default: current directory)")
+    source.add_argument("-b", "--batch", metavar="FILE",
+                        help="Generate changelogs for every 'SOURCE [RANGE]' line of FILE (URLs or local paths)")
+    parser.add_argument("-n", "--limit", type=int, help=f"Number of recent commits to include (1-{MAX_URL_LIMIT} with --url, any number with --repo or --batch)")
+    parser.add_argument("--api-url", type=str, default=API_URL, help="Backend API URL (default http://localhost:5000)")
+    parser.add_argument("--no-cache", action="store_true", help="Clone into a temporary directory instead of the cache directory, and do not use cached changelogs")
+    parser.add_argument("--refresh", action="store_true", help="Generate the changelog again even if a cached one is current")
+    parser.add_argument("--keep-temp", action="store_true", help="Keep temporary cloned repository (for debugging, with --no-cache)")
+    parser.add_argument("-o", "--output-dir", default="changelogs", help="Directory for the Markdown files of --batch (default ./changelogs)")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="Repositories cloned / fetched at a time with --batch (default 4)")
+    parser.add_argument("-c", "--concurrency", type=int, default=2, help="Generation requests in flight with --batch (default 2)")
+    args = parser.parse_args()
+
+    # The same check for every mode, before anything is cloned or prompted for
+    limit_error = check_limit(args.limit, remote=not (args.repo or args.batch))
+    if limit_error:
+        parser.error(limit_error)
+
+    try:
+        if args.batch:
+            if args.jobs < 1 or args.concurrency < 1:
+                parser.error("--jobs and --concurrency must be at least 1")
+            sys.exit(run_batch(args.batch, args.output_dir, args.limit or 50, args.jobs,
+                               args.concurrency, args.api_url, args.no_cache))
+        run_single(args)
+    except GitScribeError as e:
+        console.print(str(e))
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()